@@ -0,0 +1,131 @@
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
+from elevate.TravelGoal import TravelGoal
+from elevate.TripTable import TripTable
+
+
+class CompletedGoals:
+    """
+    The results of finished trips (request time, start floor, end floor, board time and finish time), stored
+    column-wise in typed numpy arrays.
+
+    The simulator appends every goal here as it completes instead of keeping the TravelGoal object around, which takes
+    a trip from a couple of hundred bytes of Python objects down to 32 bytes, and lets RunStats compute its aggregates
+    with a few vectorized operations. The arrays have spare room and double when they fill up, so appending is
+    amortized O(1). Goals are only turned back into TravelGoals when they're asked for.
+    """
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._times = np.empty(capacity, dtype=TripTable.time_dtype)
+        self._start_floors = np.empty(capacity, dtype=TripTable.floor_dtype)
+        self._end_floors = np.empty(capacity, dtype=TripTable.floor_dtype)
+        self._board_times = np.empty(capacity, dtype=TripTable.time_dtype)
+        self._finish_times = np.empty(capacity, dtype=TripTable.time_dtype)
+
+    @staticmethod
+    def from_travel_goals(goals: Iterable[TravelGoal]) -> 'CompletedGoals':
+        goals = list(goals)
+        completed = CompletedGoals(max(len(goals), 1))
+        for g in goals:
+            completed.append(g)
+        return completed
+
+    @staticmethod
+    def from_columns(times, start_floors, end_floors, board_times, finish_times) -> 'CompletedGoals':
+        completed = CompletedGoals(0)
+        completed._times = np.array(times, dtype=TripTable.time_dtype)
+        completed._start_floors = np.array(start_floors, dtype=TripTable.floor_dtype)
+        completed._end_floors = np.array(end_floors, dtype=TripTable.floor_dtype)
+        completed._board_times = np.array(board_times, dtype=TripTable.time_dtype)
+        completed._finish_times = np.array(finish_times, dtype=TripTable.time_dtype)
+        completed._size = len(completed._times)
+        assert all(len(c) == completed._size for c in [completed._start_floors, completed._end_floors,
+                                                       completed._board_times, completed._finish_times])
+        return completed
+
+    def _grow(self):
+        capacity = max(2 * len(self._times), 1)
+        for name in ["_times", "_start_floors", "_end_floors", "_board_times", "_finish_times"]:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, goal: TravelGoal):
+        if self._size == len(self._times):
+            self._grow()
+        i = self._size
+        self._times[i] = goal.time
+        self._start_floors[i] = goal.start_floor
+        self._end_floors[i] = goal.end_floor
+        self._board_times[i] = goal.board_time
+        self._finish_times[i] = goal.finish_time
+        self._size += 1
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._times[:self._size]
+
+    @property
+    def start_floors(self) -> np.ndarray:
+        return self._start_floors[:self._size]
+
+    @property
+    def end_floors(self) -> np.ndarray:
+        return self._end_floors[:self._size]
+
+    @property
+    def board_times(self) -> np.ndarray:
+        return self._board_times[:self._size]
+
+    @property
+    def finish_times(self) -> np.ndarray:
+        return self._finish_times[:self._size]
+
+    @property
+    def wait_times(self) -> np.ndarray:
+        """
+        :return: how long each person waited for an elevator
+        """
+        return self.board_times - self.times
+
+    @property
+    def total_times(self) -> np.ndarray:
+        """
+        :return: how long each trip took, from pressing the button to getting off
+        """
+        return self.finish_times - self.times
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return CompletedGoals.from_columns(self.times[item], self.start_floors[item], self.end_floors[item],
+                                               self.board_times[item], self.finish_times[item])
+        if item < 0:
+            item += self._size
+        if not 0 <= item < self._size:
+            raise IndexError("goal index out of range")
+        goal = TravelGoal(float(self._times[item]), int(self._start_floors[item]), int(self._end_floors[item]))
+        goal.board_time = float(self._board_times[item])
+        goal.finish_time = float(self._finish_times[item])
+        return goal
+
+    def __iter__(self) -> Iterator[TravelGoal]:
+        return iter(self.to_travel_goals())
+
+    def to_travel_goals(self) -> List[TravelGoal]:
+        goals = []
+        for t, s, e, b, f in zip(self.times.tolist(), self.start_floors.tolist(), self.end_floors.tolist(),
+                                 self.board_times.tolist(), self.finish_times.tolist()):
+            goal = TravelGoal(t, s, e)
+            goal.board_time = b
+            goal.finish_time = f
+            goals.append(goal)
+        return goals
+
+    def __repr__(self):
+        return "CompletedGoals({} goals)".format(self._size)
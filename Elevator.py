@@ -2,6 +2,7 @@ from typing import Set
 
 from elevate.Events import ElevatorStart
 from elevate.TravelGoal import TravelGoal
+from elevate.Tracing import tracer
 
 
 class Elevator:
@@ -24,9 +25,8 @@ class Elevator:
 
         self.velocity = 0
         self.is_stopped = False
-        print("Picking up {} travel goal(s) handling {}".format(
-            len(new_travel_goals), start_event.button_press_handled
-        ))
+        tracer.debug(start_event.time, "Picking up {} travel goal(s) handling {}",
+                     len(new_travel_goals), start_event.button_press_handled)
         for new_travel_goal in new_travel_goals:
             self.passenger_goals.add(new_travel_goal)
         self.last_start_event = start_event
@@ -73,7 +73,7 @@ class Elevator:
 
     @location.setter
     def location(self, location):
-        assert -1 <= location <= 40  # We allow a slight dip bellow to slow down.
+        assert -1 <= location  # We allow a slight dip bellow to slow down.
         self.__location = location
 
     def __repr__(self):
@@ -0,0 +1,195 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from elevate.Elevator import Elevator
+
+
+class _Columns:
+    """
+    Growable typed columns of one elevator's events.
+    """
+    def __init__(self, capacity):
+        self.size = 0
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.floors = np.empty(capacity, dtype=np.int32)
+        self.loads = np.empty(capacity, dtype=np.int32)
+        self.kinds = np.empty(capacity, dtype=np.int8)
+
+    def _resize(self, capacity):
+        for name in ["times", "floors", "loads", "kinds"]:
+            column = getattr(self, name)
+            resized = np.empty(capacity, dtype=column.dtype)
+            resized[:self.size] = column[:self.size]
+            setattr(self, name, resized)
+
+    def extend(self, times, floors, loads, kinds):
+        n = len(times)
+        if self.size + n > len(self.times):
+            self._resize(max(2 * len(self.times), self.size + n))
+        end = self.size + n
+        self.times[self.size:end] = times
+        self.floors[self.size:end] = floors
+        self.loads[self.size:end] = loads
+        self.kinds[self.size:end] = kinds
+        self.size = end
+
+    def keep_last(self, n):
+        if self.size > n:
+            for name in ["times", "floors", "loads", "kinds"]:
+                column = getattr(self, name)
+                column[:n] = column[self.size - n:self.size]
+            self.size = n
+
+
+class ElevatorHistory:
+    """
+    What every elevator did during a run: the time, floor, number of passengers on board and kind (start or stop) of
+    each of its events, in typed columns per elevator.
+
+    Events are written into a fixed-size chunk. When the chunk fills up (or the totals are asked for) it's folded in:
+    the distance travelled and the time spent moving are added to running totals with a few vectorized operations,
+    and then the events are moved to the retained history. Since the totals are kept separately, the retained history
+    can be thinned out (only every decimation-th event is kept) or bounded (only the last max_events are kept, like a
+    ring buffer), so that multi-day runs don't grow without bound, while distance and utilization stay exact.
+    """
+    START = 0
+    STOP = 1
+
+    def __init__(self, elevators: Iterable[Elevator], max_events=None, decimation=1, chunk_size=1024):
+        """
+        :param elevators: the elevators to record
+        :param max_events: the most events to keep per elevator (the most recent ones), or None to keep them all
+        :param decimation: only keep every decimation-th event of each elevator
+        :param chunk_size: how many events of an elevator to take in before folding them into the totals
+        """
+        assert decimation >= 1
+        self.max_events = max_events
+        self.decimation = decimation
+        self.chunk_size = chunk_size
+        self._slots = {}  # type: Dict[int, int]  # Elevator index to its position in the lists below
+        self._chunks = []  # type: List[_Columns]
+        self._retained = []  # type: List[_Columns]
+        self._num_events = []  # type: List[int]
+        # What the last folded event of each elevator was (time, floor, kind), to carry into the next chunk
+        self._last = []  # type: List[Tuple[float, int, int]]
+        self._distances = []  # type: List[float]  # In floors
+        self._moving_times = []  # type: List[float]
+        self._first_times = []  # type: List[float]
+        for e in elevators:
+            self.add_elevator(e)
+
+    def add_elevator(self, elevator: Elevator):
+        if elevator.index in self._slots:
+            return
+        self._slots[elevator.index] = len(self._chunks)
+        self._chunks.append(_Columns(self.chunk_size))
+        self._retained.append(_Columns(min(self.chunk_size, self.max_events or self.chunk_size)))
+        self._num_events.append(0)
+        self._last.append(None)
+        self._distances.append(0.)
+        self._moving_times.append(0.)
+        self._first_times.append(None)
+
+    def record(self, elevator: Elevator, time, floor, load, kind):
+        """
+        :param kind: ElevatorHistory.START or ElevatorHistory.STOP
+        """
+        i = self._slots[elevator.index]
+        chunk = self._chunks[i]
+        j = chunk.size
+        chunk.times[j] = time
+        chunk.floors[j] = floor
+        chunk.loads[j] = load
+        chunk.kinds[j] = kind
+        chunk.size += 1
+        if chunk.size == len(chunk.times):
+            self._fold(i)
+
+    def _fold(self, i):
+        chunk = self._chunks[i]
+        n = chunk.size
+        if n == 0:
+            return
+        times, floors, loads, kinds = chunk.times[:n], chunk.floors[:n], chunk.loads[:n], chunk.kinds[:n]
+
+        # The running totals, carrying on from the last event of the previous chunk
+        last = self._last[i]
+        if last is None:
+            self._first_times[i] = float(times[0])
+            prev_times, prev_floors, prev_kinds = times[:-1], floors[:-1], kinds[:-1]
+            cur_times, cur_floors, cur_kinds = times[1:], floors[1:], kinds[1:]
+        else:
+            prev_times = np.concatenate([[last[0]], times[:-1]])
+            prev_floors = np.concatenate([[last[1]], floors[:-1]])
+            prev_kinds = np.concatenate([[last[2]], kinds[:-1]])
+            cur_times, cur_floors, cur_kinds = times, floors, kinds
+        self._distances[i] += float(np.abs(cur_floors - prev_floors).sum())
+        moving = (prev_kinds == ElevatorHistory.START) & (cur_kinds == ElevatorHistory.STOP)
+        self._moving_times[i] += float((cur_times - prev_times)[moving].sum())
+        self._last[i] = (float(times[-1]), int(floors[-1]), int(kinds[-1]))
+
+        # Then retention
+        keep = slice((-self._num_events[i]) % self.decimation, n, self.decimation)
+        retained = self._retained[i]
+        retained.extend(times[keep], floors[keep], loads[keep], kinds[keep])
+        if self.max_events is not None:
+            retained.keep_last(self.max_events)
+        self._num_events[i] += n
+        chunk.size = 0
+
+    def flush(self):
+        """
+        Folds every pending event into the totals and the retained history.
+        """
+        for i in range(len(self._chunks)):
+            self._fold(i)
+
+    def _slot(self, elevator: Elevator) -> int:
+        self._fold(self._slots[elevator.index])
+        return self._slots[elevator.index]
+
+    def num_events(self, elevator: Elevator) -> int:
+        """
+        :return: how many events the elevator has had, retained or not
+        """
+        return self._num_events[self._slot(elevator)]
+
+    def columns(self, elevator: Elevator) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: the retained (times, floors, loads, kinds) of an elevator's events
+        """
+        retained = self._retained[self._slot(elevator)]
+        n = retained.size
+        return retained.times[:n], retained.floors[:n], retained.loads[:n], retained.kinds[:n]
+
+    def __getitem__(self, elevator: Elevator) -> List[Tuple[float, int, int]]:
+        """
+        :return: the retained (time, floor, load) of an elevator's events, the way they used to be recorded
+        """
+        times, floors, loads, _ = self.columns(elevator)
+        return list(zip(times.tolist(), floors.tolist(), loads.tolist()))
+
+    def distance(self, elevator: Elevator) -> float:
+        """
+        :return: the number of floors the elevator has travelled
+        """
+        return self._distances[self._slot(elevator)]
+
+    def total_distance(self) -> float:
+        self.flush()
+        return sum(self._distances)
+
+    def utilization(self, elevator: Elevator = None) -> float:
+        """
+        :return: the fraction of the time between their first and last events that the elevator (or all of them
+         together) spent between a start and the stop that followed it. nan if no time has passed.
+        """
+        self.flush()
+        slots = [self._slots[elevator.index]] if elevator is not None else range(len(self._chunks))
+        moving, elapsed = 0., 0.
+        for i in slots:
+            if self._last[i] is not None:
+                moving += self._moving_times[i]
+                elapsed += self._last[i][0] - self._first_times[i]
+        return moving / elapsed if elapsed > 0 else float("nan")
@@ -0,0 +1,93 @@
+from heapq import heappush, heappop, heapify
+from itertools import count
+from typing import Iterable, Iterator, List
+
+from elevate.Elevator import Elevator
+from elevate.Events import ElevatorEvent
+
+
+class ElevatorEventQueue:
+    """
+    A priority queue of elevator events, ordered by time and then by the order they were pushed in.
+
+    Rescheduling an elevator doesn't touch the heap: every elevator has a generation counter that is bumped when its
+    events are cancelled, and entries from an older generation are simply skipped when they reach the top. The heap is
+    compacted once stale entries outnumber live ones, so it never grows past twice the number of pending events.
+    """
+    def __init__(self, events: Iterable[ElevatorEvent] = ()):
+        self._heap = []  # of (time, sequence number, generation, event)
+        self._sequence = count()
+        self._generation = {}  # Elevator to its current generation
+        self._live = {}  # Elevator to the number of its events that are still pending
+        self._size = 0
+        for event in events:
+            self.push(event)
+
+    def push(self, event: ElevatorEvent):
+        elevator = event.elevator
+        heappush(self._heap, (event.time, next(self._sequence), self._generation.get(elevator, 0), event))
+        self._live[elevator] = self._live.get(elevator, 0) + 1
+        self._size += 1
+
+    def cancel(self, elevator: Elevator):
+        """
+        Drops every pending event of an elevator. This is O(1) - the entries are skipped lazily.
+        """
+        live = self._live.get(elevator, 0)
+        if live == 0:
+            return
+        self._generation[elevator] = self._generation.get(elevator, 0) + 1
+        self._live[elevator] = 0
+        self._size -= live
+        if len(self._heap) > 2 * self._size + 16:
+            self._compact()
+
+    def reschedule(self, elevators: Iterable[Elevator], events: Iterable[ElevatorEvent]):
+        """
+        Replaces all pending events of the given elevators with a new set of events.
+        :param elevators: the elevators whose events are being replaced
+        :param events: the new events (of those elevators), in any order
+        """
+        for elevator in elevators:
+            self.cancel(elevator)
+        # Sorting keeps the tie breaking independent of whatever order the events were generated in.
+        for event in sorted(events):
+            self.push(event)
+
+    def peek(self) -> ElevatorEvent:
+        self._drop_stale()
+        return self._heap[0][3]
+
+    def pop(self) -> ElevatorEvent:
+        self._drop_stale()
+        _, _, _, event = heappop(self._heap)
+        self._live[event.elevator] -= 1
+        self._size -= 1
+        return event
+
+    def events_for(self, elevator: Elevator) -> List[ElevatorEvent]:
+        """
+        :return: the pending events of one elevator, in the order they will be popped
+        """
+        generation = self._generation.get(elevator, 0)
+        return [entry[3] for entry in sorted(self._heap) if entry[3].elevator is elevator and entry[2] == generation]
+
+    def _is_stale(self, entry) -> bool:
+        return entry[2] != self._generation.get(entry[3].elevator, 0)
+
+    def _drop_stale(self):
+        while len(self._heap) > 0 and self._is_stale(self._heap[0]):
+            heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if not self._is_stale(entry)]
+        heapify(self._heap)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self) -> Iterator[ElevatorEvent]:
+        """
+        Iterates over the pending events in the order they will be popped, without popping them.
+        """
+        return (entry[3] for entry in sorted(self._heap) if not self._is_stale(entry))
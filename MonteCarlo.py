@@ -0,0 +1,162 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from math import sqrt
+from typing import Callable, Dict, List, Iterable
+
+import numpy as np
+
+from elevate.RandomStreams import RandomStream
+from elevate.RunStats import RunStats
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import TravelBehavior, OfficeBuildingTravelBehavior
+from elevate.TripSources import TripSource
+from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.RandomElevatorStrategy import RandomElevatorStrategy
+
+# Two sided 95% critical values of Student's t distribution for 1-30 degrees of freedom
+_t_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+_z_975 = 1.959964
+
+
+def t_critical_95(degrees_of_freedom) -> float:
+    """
+    From the table up to 30 degrees of freedom, and past that from the Cornish-Fisher expansion of t around the normal
+    quantile, which is good to better than 1e-4 there.
+    """
+    if degrees_of_freedom < 1:
+        return float("nan")
+    if degrees_of_freedom <= len(_t_95):
+        return _t_95[degrees_of_freedom - 1]
+    z, v = _z_975, degrees_of_freedom
+    return z + (z ** 3 + z) / (4 * v) + \
+        (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2) + \
+        (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3) + \
+        (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4)
+
+
+class SimulationConfig:
+    """
+    One cell of a Monte Carlo comparison: which strategy, in which building, with how many elevators.
+
+    Configs are shipped to worker processes, so the strategy is given as a factory (e.g. the strategy class itself)
+    rather than an instance, and everything here has to be picklable.
+    """
+    def __init__(self, strategy_factory: Callable[[], ElevatorStrategy], travel_behavior: TravelBehavior,
+                 num_elevators=3, num_people=None, label=None, trip_source: TripSource = None):
+        """
+        :param trip_source: the trips every replicate runs (e.g. a ReplayTripSource, which is cheap to ship to the
+         workers), instead of a day of num_people generated from each replicate's seed
+        """
+        self.strategy_factory = strategy_factory
+        self.travel_behavior = travel_behavior
+        self.num_elevators = num_elevators
+        self.num_people = num_people
+        self.trip_source = trip_source
+        self.label = label if label is not None else "{} / {} / {} elevators".format(
+            getattr(strategy_factory, "__name__", strategy_factory), type(travel_behavior).__name__, num_elevators)
+
+    def __repr__(self):
+        return self.label
+
+
+def run_replicate(config: SimulationConfig, seed: np.random.SeedSequence) -> RunStats:
+    """
+    Runs a single simulation. This is what the worker processes execute.
+    """
+    simulator = ElevatorSimulator(config.travel_behavior, config.strategy_factory(), config.num_elevators,
+                                  RandomStream(seed_sequence=seed))
+    return simulator.run(config.num_people, trip_source=config.trip_source)
+
+
+class Estimate:
+    """
+    The mean of a metric over replicates, with its sample standard deviation and a 95% confidence interval.
+    """
+    def __init__(self, values: List[float]):
+        self.n = len(values)
+        self.mean = sum(values) / self.n if self.n > 0 else float("nan")
+        self.sd = sqrt(sum((v - self.mean) ** 2 for v in values) / (self.n - 1)) if self.n > 1 else float("nan")
+        self.half_width = t_critical_95(self.n - 1) * self.sd / sqrt(self.n) if self.n > 1 else float("nan")
+        self.ci_low = self.mean - self.half_width
+        self.ci_high = self.mean + self.half_width
+
+    def __repr__(self):
+        return "{:.4g} ± {:.3g}".format(self.mean, self.half_width)
+
+
+class ConfigResults:
+    """
+    All the RunStats of one config, along with estimates of each metric.
+    """
+    metrics = ["avg_wait", "p90_wait", "p99_wait", "max_wait", "avg_total", "max_total", "total_dist"]
+
+    def __init__(self, config: SimulationConfig, stats: List[RunStats]):
+        self.config = config
+        self.stats = stats
+        self.estimates = {m: Estimate([getattr(s, m) for s in stats]) for m in ConfigResults.metrics}
+
+    def __getitem__(self, metric) -> Estimate:
+        return self.estimates[metric]
+
+    def difference(self, other: 'ConfigResults', metric) -> Estimate:
+        """
+        The paired difference (self - other) of a metric. Replicates share seeds across configs, so this has a much
+        tighter interval than comparing the two estimates would.
+        """
+        return Estimate([getattr(a, metric) - getattr(b, metric) for a, b in zip(self.stats, other.stats)])
+
+    def __repr__(self):
+        return "{}: {}".format(self.config, ", ".join(
+            "{}={}".format(m, self.estimates[m]) for m in ConfigResults.metrics))
+
+
+class MonteCarloRunner:
+    """
+    Runs num_replicates independent simulations of every config on a process pool.
+
+    Replicate i of every config uses the same seed, so configs are compared on the same simulated days (common random
+    numbers), which makes differences between strategies much less noisy than independent draws would. Replicate seeds
+    are spawned from root_seed up front, so results don't depend on the number of workers or the order jobs finish in.
+    """
+    def __init__(self, configs: Iterable[SimulationConfig], num_replicates, root_seed=0, max_workers=None):
+        self.configs = list(configs)
+        self.num_replicates = num_replicates
+        self.root_seed = root_seed
+        self.max_workers = max_workers
+
+    @staticmethod
+    def grid(strategy_factories: Iterable[Callable[[], ElevatorStrategy]], travel_behaviors: Iterable[TravelBehavior],
+             num_elevators: Iterable[int], num_people=None) -> List[SimulationConfig]:
+        """
+        :return: a config for every combination of strategy, travel behavior and number of elevators
+        """
+        return [SimulationConfig(s, b, n, num_people)
+                for s, b, n in product(strategy_factories, travel_behaviors, num_elevators)]
+
+    def replicate_seeds(self) -> List[np.random.SeedSequence]:
+        return [stream.seed_sequence for stream in RandomStream(self.root_seed).spawn(self.num_replicates)]
+
+    def run(self) -> List[ConfigResults]:
+        seeds = self.replicate_seeds()
+        jobs = [(c, s) for c in self.configs for s in seeds]
+        workers = self.max_workers if self.max_workers is not None else os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            stats = list(pool.map(run_replicate, [c for c, _ in jobs], [s for _, s in jobs],
+                                  chunksize=max(1, len(jobs) // (4 * workers))))
+        by_config = {}  # type: Dict[int, List[RunStats]]
+        for (config, _), s in zip(jobs, stats):
+            by_config.setdefault(id(config), []).append(s)
+        return [ConfigResults(c, by_config[id(c)]) for c in self.configs]
+
+
+if __name__ == "__main__":
+    runner = MonteCarloRunner(
+        MonteCarloRunner.grid([BoringElevatorStrategy, RandomElevatorStrategy],
+                              [OfficeBuildingTravelBehavior(40)], [3, 6], num_people=200),
+        num_replicates=20)
+    for results in runner.run():
+        print(results)
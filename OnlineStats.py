@@ -0,0 +1,149 @@
+import math
+from typing import Dict, List, Sequence
+
+from elevate.TravelGoal import TravelGoal
+
+
+class RunningMoments:
+    """
+    The count, mean, variance and extremes of a stream of numbers, in constant memory (Welford's algorithm, which stays
+    accurate where summing squares would cancel catastrophically).
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.
+        self._m2 = 0.  # The sum of squared differences from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @property
+    def variance(self) -> float:
+        """
+        :return: the sample variance (nan with fewer than 2 values)
+        """
+        return self._m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    @property
+    def sd(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    An estimate of one quantile of a stream of numbers in constant memory, using the P-squared algorithm (Jain and
+    Chlamtac, 1985).
+
+    Five markers track the minimum, the quantile, the quantiles halfway to it on either side, and the maximum. Each new
+    value shifts the markers' positions, and any marker that drifts a whole position from where it should be is moved
+    by piecewise-parabolic interpolation of its neighbours. Until five values have been seen the quantile is exact.
+    """
+    def __init__(self, p):
+        assert 0 < p < 1
+        self.p = p
+        self.n = 0
+        self._heights = []  # type: List[float]
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.n += 1
+        q = self._heights
+        if self.n <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell x falls in, stretching the ends if it's a new extreme
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the middle markers back towards where they should be
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self) -> float:
+        """
+        :return: the estimated quantile (nan before anything has been added)
+        """
+        if self.n == 0:
+            return float("nan")
+        if self.n <= 5:  # Still exact - interpolate between the values we have
+            q = self._heights
+            rank = self.p * (len(q) - 1)
+            low = int(rank)
+            high = min(low + 1, len(q) - 1)
+            return q[low] + (rank - low) * (q[high] - q[low])
+        return self._heights[2]
+
+
+class StreamingSummary:
+    """
+    Running moments plus a P-squared estimate of each of a few quantiles, for one stream of numbers.
+    """
+    def __init__(self, quantiles: Sequence[float]):
+        self.moments = RunningMoments()
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}  # type: Dict[float, P2Quantile]
+
+    def add(self, x):
+        self.moments.add(x)
+        for estimate in self.quantiles.values():
+            estimate.add(x)
+
+    def quantile(self, p) -> float:
+        return self.quantiles[p].value
+
+
+class OnlineGoalStats:
+    """
+    Wait and journey time statistics of completed goals, updated as each goal completes. Memory doesn't grow with the
+    number of goals, so long runs can report tail latency without keeping every goal.
+    """
+    quantiles = (.5, .9, .99)
+
+    def __init__(self, quantiles: Sequence[float] = quantiles):
+        self.wait = StreamingSummary(quantiles)
+        self.total = StreamingSummary(quantiles)
+
+    def add(self, goal: TravelGoal):
+        self.wait.add(goal.board_time - goal.time)
+        self.total.add(goal.finish_time - goal.time)
+
+    def __len__(self):
+        return self.wait.moments.n
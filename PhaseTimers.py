@@ -0,0 +1,82 @@
+import time
+from typing import Dict, Iterable, Iterator, TypeVar
+
+from elevate.OnlineStats import StreamingSummary
+
+T = TypeVar("T")
+
+
+class Phase:
+    """
+    The phases of a run that the simulator can time.
+    """
+    TRIP_GENERATION = "trip_generation"  # Generating trips (and handing them out as TravelGoals)
+    PLANNING = "planning"  # strategy.get_plan_update
+    EVENT_GENERATION = "event_generation"  # ElevatorSchedule.event_gen_and_apply
+    STATE_UPDATE = "state_update"  # ElevatorSchedule.update_elevator_state
+    SIMULATE = "simulate"  # Processing elevator events, apart from the replans they cause
+
+    all = [TRIP_GENERATION, PLANNING, EVENT_GENERATION, STATE_UPDATE, SIMULATE]
+
+
+class PhaseTimers:
+    """
+    Wall clock timers for the phases of a run: how many times each phase ran, how long it took in total, and a
+    P-squared estimate of its 99th percentile, all in constant memory.
+
+    Timing is done by the caller: it takes time.perf_counter() when a phase starts and calls record when it's done. The
+    simulator only does that when it was given timers, so when timing is off all a phase costs is checking for None.
+
+    Every second is put down to exactly one phase: a phase that others run inside of (processing events, which can
+    replan) is only charged for the time that isn't theirs, so the totals add up to no more than the run took.
+    """
+    def __init__(self, phases: Iterable[str] = Phase.all):
+        self.summaries = {phase: StreamingSummary((.99,)) for phase in phases}  # type: Dict[str, StreamingSummary]
+        self.recorded = 0.  # The time recorded so far, over all phases
+
+    def record(self, phase, start, recorded_at_start=None) -> float:
+        """
+        :param start: the time.perf_counter() at which the phase started
+        :param recorded_at_start: for a phase other phases run inside of, what recorded was when it started. The time
+         recorded since is theirs, and is left out of this phase's.
+        :return: the time.perf_counter() at which it ended, for a phase that starts right after
+        """
+        end = time.perf_counter()
+        elapsed = end - start
+        if recorded_at_start is not None:
+            elapsed -= self.recorded - recorded_at_start
+        self.summaries[phase].add(elapsed)
+        self.recorded += elapsed
+        return end
+
+    def timed(self, phase, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        :return: the items of iterable, with the time taken to produce each one recorded against phase (e.g. a lazy
+         TripSource generating its trips)
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(phase, start)
+            yield item
+
+    def count(self, phase) -> int:
+        return self.summaries[phase].moments.n
+
+    def total(self, phase) -> float:
+        summary = self.summaries[phase]
+        return summary.moments.mean * summary.moments.n
+
+    def p99(self, phase) -> float:
+        return self.summaries[phase].quantile(.99)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: {phase: {"total": seconds, "count": times run, "p99": seconds}} for every phase that ran
+        """
+        return {phase: {"total": self.total(phase), "count": self.count(phase), "p99": self.p99(phase)}
+                for phase in self.summaries if self.count(phase) > 0}
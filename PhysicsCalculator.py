@@ -1,10 +1,153 @@
-import functools
 from math import sqrt
-from typing import Tuple
+from typing import Tuple, Dict, List
 
+import numpy as np
 from prompt_toolkit.cache import memoized
 
 
+def travel_time(total_delta_loc, v_initial, a=1.2, v_max=8) -> float:
+    """
+    The same as ElevatorPhysicsCalculator(total_delta_loc, v_initial, a, v_max).delta_t, without building the
+    calculator. This is the hot path for elevators that are already moving.
+    """
+    if abs(v_initial) > v_max:
+        raise ValueError("Cannot have v_initial greater than v_max!")
+    a = abs(a) if total_delta_loc > 0 else -abs(a)
+    v_max = abs(v_max) if total_delta_loc > 0 else -v_max
+    if total_delta_loc == v_initial == 0:
+        return 0
+
+    # See ElevatorPhysicsCalculator.achieved_v_max
+    half_v0_2 = .5 * (v_initial ** 2)
+    if v_initial * total_delta_loc > 0 and abs(half_v0_2) > abs(total_delta_loc * a):
+        achieved_v_max = sqrt(half_v0_2 - total_delta_loc * a) * (-1 if v_initial > 0 else 1)
+        a = -a
+    else:
+        potential_v_max = sqrt(total_delta_loc * a + half_v0_2) * (1 if total_delta_loc >= 0 else -1)
+        achieved_v_max = max(potential_v_max, v_max) if total_delta_loc < 0 else min(potential_v_max, v_max)
+
+    # And ElevatorPhysicsCalculator.total_time
+    if total_delta_loc == achieved_v_max == 0:
+        return 0
+    return total_delta_loc / achieved_v_max + \
+        (achieved_v_max - v_initial) / a + \
+        (v_initial ** 2) / (2 * a * achieved_v_max)
+
+
+def states_at_t(total_delta_loc, v_initial, t, a=1.2, v_max=8) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized ElevatorPhysicsCalculator(total_delta_loc, v_initial, a, v_max).state_at_t(t) for a whole fleet at once.
+    :param total_delta_loc: array of distances (in meters) from where each trip started to where it stops
+    :param v_initial: array of the velocities each trip started with
+    :param t: array of the time elapsed since each trip started
+    :return: a (positions, velocities) tuple of arrays, positions being relative to where each trip started (meters)
+    """
+    d = np.asarray(total_delta_loc, dtype=np.float64)
+    v0 = np.asarray(v_initial, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    if np.any(np.abs(v0) > v_max):
+        raise ValueError("Cannot have v_initial greater than v_max!")
+    going_up = d > 0
+    a = np.where(going_up, abs(a), -abs(a))
+    v_max = np.where(going_up, abs(v_max), -v_max)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # achieved_v_max, including the case where we have to slow down, turn around and come back
+        half_v0_2 = .5 * (v0 ** 2)
+        reversed_trip = (v0 * d > 0) & (np.abs(half_v0_2) > np.abs(d * a))
+        reversed_v_max = np.sqrt(half_v0_2 - d * a) * np.where(v0 > 0, -1, 1)
+        potential_v_max = np.sqrt(d * a + half_v0_2) * np.where(d >= 0, 1, -1)
+        forward_v_max = np.where(d < 0, np.maximum(potential_v_max, v_max), np.minimum(potential_v_max, v_max))
+        at_rest = (d == 0) & (v0 == 0)
+        achieved_v_max = np.where(at_rest, 0, np.where(reversed_trip, reversed_v_max, forward_v_max))
+        a = np.where(reversed_trip & ~at_rest, -a, a)
+
+        # total_time
+        delta_t = np.where(
+            (d == 0) & (achieved_v_max == 0), 0,
+            d / achieved_v_max + (achieved_v_max - v0) / a + (v0 ** 2) / (2 * a * achieved_v_max))
+
+        # state_at_t: work out every phase, then pick the right one for each trip
+        accelerating_v = v0 + a * t
+        accelerating_p = v0 * t + .5 * a * (t ** 2)
+        decelerating_v = a * (delta_t - t)
+        decelerating_p = a * (delta_t * t - .5 * (t ** 2 + delta_t ** 2)) + d
+        accel_end_t = (achieved_v_max - v0) / a
+        accel_end_p = (achieved_v_max ** 2 - v0 ** 2) / (2 * a)
+        steady_p = accel_end_p + (t - accel_end_t) * achieved_v_max
+        decel_begin_t = delta_t - (v_max / a)
+
+        turning_around = a * d < 0
+        accelerating = np.where(turning_around, t < .5 * (delta_t - (v0 / a)), t < accel_end_t)
+        steady = ~turning_around & ~accelerating & (t < decel_begin_t)
+
+    positions = np.where(accelerating, accelerating_p, np.where(steady, steady_p, decelerating_p))
+    velocities = np.where(accelerating, accelerating_v, np.where(steady, achieved_v_max, decelerating_v))
+    # Right where deceleration starts, rounding can put |v| a hair past v_max. Right where it ends, it can leave a hair
+    # of velocity, which would otherwise read as the elevator still moving (and having to turn around to stop).
+    velocities = np.where(np.abs(velocities) < 1e-9, 0., velocities)
+    return positions, np.clip(velocities, -np.abs(v_max), np.abs(v_max))
+
+
+class TravelTimeTable:
+    """
+    Precomputed times to travel between any two floors from a standstill, for one kinematic profile (acceleration, max
+    speed and floor height).
+
+    Starting from rest the time only depends on how many floors apart the two floors are, so the table is built from
+    one entry per distance. It grows as taller buildings ask for it.
+
+    `times` is a (floors x floors) numpy array for strategies that want to look up many trips at once, e.g.
+    table.times[starts, stops]. Single lookups should use between, which returns a plain float.
+    """
+    _tables = {}  # type: Dict[Tuple[float, float, float], TravelTimeTable]
+
+    def __init__(self, a=1.2, v_max=8, meters_per_floor=3.9, num_floors=64):
+        self.a = a
+        self.v_max = v_max
+        self.meters_per_floor = meters_per_floor
+        self.by_distance = []  # type: List[float]
+        self._times = None
+        self.ensure_floors(num_floors)
+
+    @staticmethod
+    def for_profile(a=1.2, v_max=8, meters_per_floor=3.9) -> 'TravelTimeTable':
+        """
+        :return: the shared table of a kinematic profile, creating it if needed
+        """
+        key = (a, v_max, meters_per_floor)
+        if key not in TravelTimeTable._tables:
+            TravelTimeTable._tables[key] = TravelTimeTable(a, v_max, meters_per_floor)
+        return TravelTimeTable._tables[key]
+
+    def ensure_floors(self, num_floors):
+        """
+        Makes sure the table covers trips of up to num_floors floors.
+        """
+        if num_floors < len(self.by_distance):
+            return
+        new_size = max(num_floors + 1, 2 * len(self.by_distance))
+        for d in range(len(self.by_distance), new_size):
+            self.by_distance.append(travel_time(d * self.meters_per_floor, 0, self.a, self.v_max))
+        self._times = None
+
+    def between(self, start: int, stop: int) -> float:
+        distance = abs(stop - start)
+        if distance >= len(self.by_distance):
+            self.ensure_floors(distance)
+        return self.by_distance[distance]
+
+    @property
+    def times(self) -> np.ndarray:
+        if self._times is None:
+            floors = np.arange(len(self.by_distance))
+            self._times = np.asarray(self.by_distance)[np.abs(floors[:, None] - floors[None, :])]
+        return self._times
+
+    def __len__(self):
+        return len(self.by_distance)
+
+
 class ElevatorPhysicsCalculator:
     meters_per_floor = 3.9
 
@@ -17,7 +160,6 @@ class ElevatorPhysicsCalculator:
         return meters / meters_per_floor
 
     @staticmethod
-    @functools.lru_cache(2000)
     def time_to(start, stop, v_initial=0, a=1.2, v_max=8, meters_per_floor=meters_per_floor, ):
         """
         We calculate the amount of time it takes to move from one floor to another by assuming constant acceleration
@@ -45,8 +187,12 @@ class ElevatorPhysicsCalculator:
         :param a: the acceleration of the elevator, set to a 'sane' default of 1.2 m/s^2
         :return: the amount of time it will take to get to stop from start
         """
-        d_total = (stop - start) * meters_per_floor
-        t = ElevatorPhysicsCalculator(d_total, v_initial, a=a, v_max=v_max).delta_t
+        if v_initial == 0 and isinstance(start, int) and isinstance(stop, int):
+            # From a standstill on one floor to another - this is precomputed.
+            if a == 1.2 and v_max == 8 and meters_per_floor == ElevatorPhysicsCalculator.meters_per_floor:
+                return _default_travel_times.between(start, stop)
+            return TravelTimeTable.for_profile(a, v_max, meters_per_floor).between(start, stop)
+        t = travel_time((stop - start) * meters_per_floor, v_initial, a, v_max)
         # print("Takes {:.5} seconds from {} to {}".format(float(t), start, stop))
         return t
 
@@ -156,6 +302,9 @@ class ElevatorPhysicsCalculator:
         return "UP" if next_floor > current_floor else "DOWN"
 
 
+_default_travel_times = TravelTimeTable.for_profile()
+
+
 if __name__ == "___main__":
     ElevatorPhysicsCalculator.time_to(5, 0)
     ElevatorPhysicsCalculator.time_to(0, 5)
@@ -0,0 +1,49 @@
+import random
+from typing import List
+
+import numpy as np
+
+
+class RandomStream:
+    """
+    A seeded stream of randomness, with both a random.Random (for the one-at-a-time draws in generate_path and the
+    strategies) and a numpy Generator (for batched draws).
+
+    Streams are backed by numpy's SeedSequence, so any number of statistically independent child streams can be spawned
+    from a root seed. A child only depends on the root seed and its position in the spawn order, which is what makes
+    parallel replicates reproducible no matter which worker runs them or when.
+    """
+    def __init__(self, seed=None, seed_sequence: np.random.SeedSequence = None):
+        """
+        :param seed: the root seed (an int, or None to seed from the OS)
+        :param seed_sequence: alternatively, the SeedSequence to use (e.g. one spawned elsewhere)
+        """
+        self.seed_sequence = seed_sequence if seed_sequence is not None else np.random.SeedSequence(seed)
+        # Each flavour of generator gets a child of its own, so the two never share state. Children are derived by
+        # key rather than with SeedSequence.spawn, so that building a stream never modifies the sequence it came from.
+        self.python = random.Random(int.from_bytes(self._child(0).generate_state(4).tobytes(), "little"))
+        self.numpy = np.random.default_rng(self._child(1))
+        self._num_spawned = 0
+
+    def _child(self, key) -> np.random.SeedSequence:
+        parent = self.seed_sequence
+        return np.random.SeedSequence(parent.entropy, spawn_key=parent.spawn_key + (key,), pool_size=parent.pool_size)
+
+    @staticmethod
+    def from_global() -> 'RandomStream':
+        """
+        A stream seeded from the random module, for objects that weren't given one. This keeps random.seed working as
+        a way to make a whole run reproducible.
+        """
+        return RandomStream(random.getrandbits(128))
+
+    def spawn(self, n) -> List['RandomStream']:
+        """
+        :return: n new independent streams, derived from this one. Successive calls return different streams.
+        """
+        first = self._num_spawned + 2  # 0 and 1 belong to this stream's own generators
+        self._num_spawned += n
+        return [RandomStream(seed_sequence=self._child(k)) for k in range(first, first + n)]
+
+    def __repr__(self):
+        return "RandomStream(entropy={}, spawn_key={})".format(self.seed_sequence.entropy, self.seed_sequence.spawn_key)
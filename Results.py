@@ -0,0 +1,161 @@
+import argparse
+import struct
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from elevate.CompletedGoals import CompletedGoals
+from elevate.TravelGoal import TravelGoal
+
+
+class ResultsWriter:
+    """
+    Streams the results of a run - completed goals and elevator events - to a binary file as the simulation goes.
+
+    Records are buffered in typed numpy columns and written out a chunk at a time: a header (what kind of record and
+    how many), then each column as raw little-endian values. Nothing is formatted as text and nothing is held onto once
+    it's written, so writing is cheap, memory stays flat however long the run, and the file is smaller than the
+    equivalent CSV and loads straight back into numpy (read_results). export_csv (or running this module) turns one into
+    CSV.
+    """
+    magic = b"ELEVRES1"
+    header = struct.Struct("<4sI")
+    # The columns of each kind of record, in the order they're written
+    schemas = {
+        "goals": (b"GOAL", [("time", "<f8"), ("start_floor", "<i4"), ("end_floor", "<i4"), ("board_time", "<f8"),
+                            ("finish_time", "<f8")]),
+        "events": (b"EVNT", [("elevator", "<i4"), ("time", "<f8"), ("floor", "<i4"), ("load", "<i4"),
+                             ("kind", "<i1")]),
+    }
+
+    def __init__(self, path, chunk_size=16384):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._file = open(path, "wb")
+        self._file.write(ResultsWriter.magic)
+        self._columns = {name: [np.empty(chunk_size, dtype=dtype) for _, dtype in schema]
+                         for name, (_, schema) in ResultsWriter.schemas.items()}
+        self._sizes = {name: 0 for name in ResultsWriter.schemas}
+
+    def _add(self, name, values):
+        i = self._sizes[name]
+        for column, value in zip(self._columns[name], values):
+            column[i] = value
+        self._sizes[name] = i + 1
+        if i + 1 == self.chunk_size:
+            self._write_chunk(name)
+
+    def add_goal(self, goal: TravelGoal):
+        self._add("goals", (goal.time, goal.start_floor, goal.end_floor, goal.board_time, goal.finish_time))
+
+    def add_event(self, elevator_index, time, floor, load, kind):
+        """
+        :param kind: ElevatorHistory.START or ElevatorHistory.STOP
+        """
+        self._add("events", (elevator_index, time, floor, load, kind))
+
+    def _write_chunk(self, name):
+        n = self._sizes[name]
+        if n == 0:
+            return
+        self._file.write(ResultsWriter.header.pack(ResultsWriter.schemas[name][0], n))
+        for column in self._columns[name]:
+            self._file.write(column[:n].tobytes())
+        self._sizes[name] = 0
+
+    def flush(self):
+        for name in ResultsWriter.schemas:
+            self._write_chunk(name)
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def iter_chunks(path) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+    """
+    Reads a results file a chunk at a time, without loading the whole thing.
+    :return: (kind of record, {column name: values}) for each chunk, in the order they were written
+    """
+    tags = {tag: (name, schema) for name, (tag, schema) in ResultsWriter.schemas.items()}
+    with open(path, "rb") as f:
+        if f.read(len(ResultsWriter.magic)) != ResultsWriter.magic:
+            raise ValueError("{} is not a results file".format(path))
+        while True:
+            header = f.read(ResultsWriter.header.size)
+            if len(header) == 0:
+                return
+            if len(header) < ResultsWriter.header.size:
+                raise ValueError("{} ends in the middle of a chunk".format(path))
+            tag, n = ResultsWriter.header.unpack(header)
+            if tag not in tags:
+                raise ValueError("Unknown chunk {} in {}".format(tag, path))
+            name, schema = tags[tag]
+            columns = {}
+            for column, dtype in schema:
+                columns[column] = np.fromfile(f, dtype=dtype, count=n)
+                # fromfile reads what's there, so a cut-off file shows up as a short column
+                if len(columns[column]) < n:
+                    raise ValueError("{} ends in the middle of a chunk".format(path))
+            yield name, columns
+
+
+def read_results(path) -> Tuple[CompletedGoals, Dict[str, np.ndarray]]:
+    """
+    :return: the completed goals and the elevator event columns (elevator, time, floor, load, kind) of a results file
+    """
+    chunks = {name: [] for name in ResultsWriter.schemas}
+    for name, columns in iter_chunks(path):
+        chunks[name].append(columns)
+
+    def concatenate(name):
+        return {column: np.concatenate([c[column] for c in chunks[name]]) if chunks[name] else
+                np.empty(0, dtype=dtype) for column, dtype in ResultsWriter.schemas[name][1]}
+    goals = concatenate("goals")
+    completed = CompletedGoals.from_columns(goals["time"], goals["start_floor"], goals["end_floor"],
+                                            goals["board_time"], goals["finish_time"])
+    return completed, concatenate("events")
+
+
+def export_csv(path, goals_csv=None, events_csv=None):
+    """
+    Writes the goals and/or the elevator events of a results file out as CSV, a chunk at a time. The goals have the
+    columns summary.csv used to have (start floor, end floor, time, wait time, total time).
+    """
+    goals_file = open(goals_csv, "w") if goals_csv is not None else None
+    events_file = open(events_csv, "w") if events_csv is not None else None
+    try:
+        if goals_file is not None:
+            goals_file.write("start_floor,end_floor,time,wait_time,total_time\n")
+        if events_file is not None:
+            events_file.write("elevator,time,floor,load,kind\n")
+        for name, columns in iter_chunks(path):
+            if name == "goals" and goals_file is not None:
+                rows = zip(columns["start_floor"].tolist(), columns["end_floor"].tolist(), columns["time"].tolist(),
+                           (columns["board_time"] - columns["time"]).tolist(),
+                           (columns["finish_time"] - columns["time"]).tolist())
+                goals_file.writelines("{},{},{},{},{}\n".format(*row) for row in rows)
+            elif name == "events" and events_file is not None:
+                rows = zip(*(columns[column].tolist() for column, _ in ResultsWriter.schemas["events"][1]))
+                events_file.writelines("{},{},{},{},{}\n".format(*row) for row in rows)
+    finally:
+        for f in (goals_file, events_file):
+            if f is not None:
+                f.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exports a results file written by a simulation run to CSV.")
+    parser.add_argument("results", help="the results file")
+    parser.add_argument("--goals", default="summary.csv", help="where to write the completed goals")
+    parser.add_argument("--events", default=None, help="where to write the elevator events, if anywhere")
+    args = parser.parse_args()
+    export_csv(args.results, args.goals, args.events)
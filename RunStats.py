@@ -1,35 +1,85 @@
-from typing import List, Dict, Tuple
+from typing import Iterable, Dict, List, Tuple, Union
 
+import numpy as np
+
+from elevate.CompletedGoals import CompletedGoals
 from elevate.Elevator import Elevator
+from elevate.ElevatorHistory import ElevatorHistory
+from elevate.OnlineStats import OnlineGoalStats
+from elevate.PhaseTimers import PhaseTimers
 from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
 from elevate.TravelGoal import TravelGoal
 
 
 class RunStats:
-    def __init__(self, completed_goals: List[TravelGoal], elevator_history: Dict[Elevator, List[Tuple[float, int, int]]]):
+    def __init__(self, completed_goals: Union[CompletedGoals, Iterable[TravelGoal]],
+                 elevator_history: Union[ElevatorHistory, Dict[Elevator, List[Tuple[float, int, int]]]],
+                 num_replans=0, num_deadlines_hit=0,
+                 goal_stats: OnlineGoalStats = None, phase_timers: PhaseTimers = None):
+        """
+        :param completed_goals: the finished trips, ideally already in a CompletedGoals (any TravelGoals will do)
+        :param elevator_history: what the elevators did, ideally in an ElevatorHistory. Lists of (time, floor, load)
+         per elevator will do, but then there's no utilization.
+        :param goal_stats: streaming statistics of the finished trips. They're only used if completed_goals is empty
+         (i.e. the goals weren't kept), in which case the percentiles are P-squared estimates rather than exact.
+        :param phase_timers: how long each phase of the run took, if it was timed
+        """
+        self.num_replans = num_replans
+        self.num_deadlines_hit = num_deadlines_hit  # How many replans ran out of time
+        if not isinstance(completed_goals, CompletedGoals):
+            completed_goals = CompletedGoals.from_travel_goals(completed_goals)
+        self.num_completed = len(completed_goals)
         self.avg_wait = 0
         self.avg_total = 0
         self.max_wait = 0
         self.max_total = 0
-        for g in completed_goals:
-            wait_time, total_time = g.board_time - g.time, g.finish_time - g.time
-            self.max_wait = max(wait_time, self.max_wait)
-            self.max_total = max(total_time, self.max_total)
-            self.avg_wait += wait_time
-            self.avg_total += total_time
-        self.avg_wait /= len(completed_goals)
-        self.avg_total /= len(completed_goals)
-
-        self.total_dist = 0
-        for e in elevator_history:
-            for h1, h2 in zip(elevator_history[e], elevator_history[e][1:]):
-                self.total_dist += abs(h2[1] - h1[1])
-
-        self.total_dist += ElevatorPhysicsCalculator.floors_to_meters(self.total_dist)
+        self.sd_wait = self.sd_total = float("nan")
+        self.p50_wait = self.p90_wait = self.p99_wait = float("nan")
+        self.p50_total = self.p90_total = self.p99_total = float("nan")
+        if self.num_completed > 0:  # A short rollout may not finish anyone's trip
+            wait_times, total_times = completed_goals.wait_times, completed_goals.total_times
+            self.avg_wait = float(wait_times.mean())
+            self.avg_total = float(total_times.mean())
+            self.max_wait = max(float(wait_times.max()), 0)
+            self.max_total = max(float(total_times.max()), 0)
+            if self.num_completed > 1:
+                self.sd_wait = float(wait_times.std(ddof=1))
+                self.sd_total = float(total_times.std(ddof=1))
+            self.p50_wait, self.p90_wait, self.p99_wait = np.quantile(wait_times, OnlineGoalStats.quantiles).tolist()
+            self.p50_total, self.p90_total, self.p99_total = \
+                np.quantile(total_times, OnlineGoalStats.quantiles).tolist()
+        elif goal_stats is not None and len(goal_stats) > 0:
+            self.num_completed = len(goal_stats)
+            wait, total = goal_stats.wait, goal_stats.total
+            self.avg_wait, self.avg_total = wait.moments.mean, total.moments.mean
+            self.max_wait, self.max_total = max(wait.moments.max, 0), max(total.moments.max, 0)
+            self.sd_wait, self.sd_total = wait.moments.sd, total.moments.sd
+            self.p50_wait, self.p90_wait, self.p99_wait = (wait.quantile(p) for p in OnlineGoalStats.quantiles)
+            self.p50_total, self.p90_total, self.p99_total = (total.quantile(p) for p in OnlineGoalStats.quantiles)
+
+        if isinstance(elevator_history, ElevatorHistory):
+            floors_travelled = elevator_history.total_distance()
+            self.utilization = elevator_history.utilization()  # The fraction of the time elevators spent moving
+        else:
+            floors_travelled = sum(float(np.abs(np.diff([h[1] for h in events])).sum())
+                                   for events in elevator_history.values())
+            self.utilization = float("nan")
+        self.total_dist = ElevatorPhysicsCalculator.floors_to_meters(floors_travelled)  # In meters
+
+        self.replans_per_trip = self.num_replans / self.num_completed if self.num_completed > 0 else float("nan")
+        # {phase: {"total": seconds, "count": times run, "p99": seconds}}, if the phases were timed
+        self.phases = phase_timers.report() if phase_timers is not None else {}
 
     def __repr__(self):
-        return "Wait (avg: {} max: {}). Total: (avg: {} max: {}). Dist={}".format(
-            self.avg_wait, self.max_wait, self.avg_total, self.max_total, self.total_dist)
+        return "Wait (avg: {} p90: {:.4g} p99: {:.4g} max: {}). Total: (avg: {} p90: {:.4g} p99: {:.4g} max: {}). " \
+               "Dist={}{}".format(
+                   self.avg_wait, self.p90_wait, self.p99_wait, self.max_wait,
+                   self.avg_total, self.p90_total, self.p99_total, self.max_total, self.total_dist,
+                   ". Deadlines hit: {}/{}".format(self.num_deadlines_hit, self.num_replans)
+                   if self.num_deadlines_hit else "") + \
+            (". Phases: {}. Replans/trip: {:.3g}".format(", ".join(
+                "{} {:.4g}s/{} (p99 {:.3g}ms)".format(phase, p["total"], p["count"], 1000 * p["p99"])
+                for phase, p in self.phases.items()), self.replans_per_trip) if self.phases else "")
 
 
 if __name__ == '__main__':
@@ -1,33 +1,91 @@
+from bisect import bisect_left
 from heapq import heappush, heappop
-from typing import Dict, List
+from typing import Dict, List, Iterable, Set
+
+import numpy as np
 
 from elevate.Events import ElevatorEvent, ElevatorStop, ElevatorStart
-from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator, states_at_t
 from elevate.ButtonPush import ButtonPush
 from elevate.Elevator import Elevator
+from elevate.Tracing import tracer
 
 
 class ElevatorSchedule:
     def __init__(self,
                  elevator_to_floors: Dict[Elevator, List],
                  elevator_to_final_dir: Dict[Elevator, str],
-                 initalization_time):
+                 initalization_time,
+                 previous_schedule: 'ElevatorSchedule' = None):
+        """
+        :param elevator_to_floors: the floors each elevator will visit, in order
+        :param elevator_to_final_dir: the direction each elevator will be heading after its last stop (if any)
+        :param initalization_time: the time at which this schedule was constructed
+        :param previous_schedule: the schedule this one replaces, if any. Elevators whose plan is the same as what was
+         left of their plan in the previous schedule keep their stop times, and are left out of changed_elevators.
+        """
         # print("Constructing elevator schedule from {}".format(elevator_to_floors))
         self.elevator_to_floors = elevator_to_floors
-        self.elevator_to_time = self._find_times(initalization_time)
+        self.elevator_to_final_dir = elevator_to_final_dir
         self.initialization_time = initalization_time
+        self.changed_elevators = set(elevator_to_floors)  # The elevators whose events need to be regenerated
+        self.deadline_hit = False  # Whether the strategy ran out of time and settled for its best plan so far
+        self.elevator_to_time = {}
+        if previous_schedule is not None:
+            self.keep_unchanged_from(previous_schedule)
+        self.elevator_to_time.update(self._find_times(initalization_time, self.changed_elevators))
         # print("Found times: {}".format(self.elevator_to_time))
-        print("Planned times")
-        for e in elevator_to_floors:
-            print(e)
-            print("    {}".format(elevator_to_floors[e]))
-            print("    {}".format(self.elevator_to_time[e]))
+        if tracer.is_debug:
+            tracer.debug(initalization_time, "Planned times")
+            for e in elevator_to_floors:
+                tracer.debug(initalization_time, "{}", e)
+                tracer.debug(initalization_time, "    {}", elevator_to_floors[e])
+                tracer.debug(initalization_time, "    {}", self.elevator_to_time[e])
 
-        self.elevator_to_final_dir = elevator_to_final_dir
+    @staticmethod
+    def restore(elevator_to_floors: Dict[Elevator, List], elevator_to_final_dir: Dict[Elevator, str],
+                elevator_to_time: Dict[Elevator, List[float]], initalization_time) -> 'ElevatorSchedule':
+        """
+        Rebuilds a schedule whose stop times are already known (e.g. from a SimulatorSnapshot) without recomputing them.
+        Nothing in it is marked as changed - its events are assumed to be pending already.
+        """
+        schedule = ElevatorSchedule({}, {}, initalization_time)
+        schedule.elevator_to_floors = elevator_to_floors
+        schedule.elevator_to_final_dir = elevator_to_final_dir
+        schedule.elevator_to_time = elevator_to_time
+        return schedule
 
-    def _find_times(self, current_time) -> Dict[Elevator, List[float]]:
+    def _find_times(self, current_time, elevators: Iterable[Elevator]) -> Dict[Elevator, List[float]]:
         return {e: ElevatorSchedule.find_stop_times(e, self.elevator_to_floors[e], current_time)
-                for e in self.elevator_to_floors}
+                for e in elevators}
+
+    def remaining_stops(self, elevator: Elevator, current_time):
+        """
+        The part of an elevator's plan that hasn't happened yet.
+        :param elevator: the elevator
+        :param current_time: the time to look from
+        :return: a (floors, times) tuple of the stops this elevator has not yet reached by current_time
+        """
+        floors = self.elevator_to_floors.get(elevator, [])
+        times = self.elevator_to_time.get(elevator, [])
+        first_remaining = bisect_left(times, current_time)
+        return floors[first_remaining:], times[first_remaining:]
+
+    def keep_unchanged_from(self, previous_schedule: 'ElevatorSchedule') -> Set[Elevator]:
+        """
+        Compares this schedule to the one it replaces. Every elevator whose floors and final direction are exactly what
+        remained of its plan in the previous schedule takes its stop times from there (so the events already generated
+        for it stay valid) and is removed from changed_elevators.
+        :param previous_schedule: the schedule that this one replaces
+        :return: the elevators that changed
+        """
+        for e in list(self.changed_elevators):
+            remaining_floors, remaining_times = previous_schedule.remaining_stops(e, self.initialization_time)
+            if remaining_floors == self.elevator_to_floors[e] and \
+                    previous_schedule.elevator_to_final_dir.get(e) == self.elevator_to_final_dir.get(e):
+                self.elevator_to_time[e] = remaining_times
+                self.changed_elevators.discard(e)
+        return self.changed_elevators
 
     @staticmethod
     def find_stop_times(elevator: Elevator, floors_to_visit: List[int], current_time) -> List[float]:
@@ -123,9 +181,9 @@ class ElevatorSchedule:
             # process the newly added start event
             return [start_event, stop_event]
 
-    def _move_elevators_to_start_floor(self):
+    def _move_elevators_to_start_floor(self, elevators: Iterable[Elevator]):
         event_queue = []
-        for elevator in self.elevator_to_floors:
+        for elevator in elevators:
             if len(self.elevator_to_floors[elevator]) > 0:
                 starting_events = self._move_elevator_to_start_floor(
                     elevator,
@@ -137,12 +195,15 @@ class ElevatorSchedule:
                     heappush(event_queue, event)
         return event_queue
 
-    def event_gen_and_apply(self) -> List[ElevatorEvent]:
+    def event_gen_and_apply(self, elevators: Iterable[Elevator] = None) -> List[ElevatorEvent]:
         """
+        :param elevators: only generate the events of these elevators (e.g. changed_elevators). Defaults to all of them.
         :return: a priority queue (heap) of events that will occur in this building
         """
-        event_queue = self._move_elevators_to_start_floor()
-        for elevator in self.elevator_to_floors:
+        if elevators is None:
+            elevators = self.elevator_to_floors
+        event_queue = self._move_elevators_to_start_floor(elevators)
+        for elevator in elevators:
             for i in range(1, len(self.elevator_to_floors[elevator])):
                 #  Construct events to move from i-1 to 1
                 stop_event = ElevatorStop(
@@ -179,6 +240,11 @@ class ElevatorSchedule:
         return event_queue
 
     def update_elevator_state(self, current_time):
+        """
+        Moves every elevator to where it is at current_time. The kinematics of all the moving elevators are evaluated
+        in one vectorized call.
+        """
+        moving = []  # of (elevator, start_t, start_loc, start_v, stop_loc)
         for elevator in self.elevator_to_floors:
             if elevator.is_stopped:
                 elevator.velocity = 0
@@ -190,22 +256,28 @@ class ElevatorSchedule:
                 continue
 
             start_t, start_loc, start_v = start_event.elevator_state
-            _, stop_loc = stop_event.time, stop_event.floor
-
-            print("Start_t: {:.6}, start_loc: {:.4}, start_v: {:.4}, stop_loc: {:.4}"
-                  .format(float(start_t), float(start_loc), float(start_v), float(stop_loc)))
-
-            delta_t_so_far = current_time - start_t
-            total_delta_loc = stop_loc - start_loc
-            # need to multiply by 3.9 - number of meters per floor.
-            epc = ElevatorPhysicsCalculator(ElevatorPhysicsCalculator.floors_to_meters(total_delta_loc), start_v)
-            delta_location_meters, v = epc.state_at_t(delta_t_so_far)
-            delta_location = ElevatorPhysicsCalculator.meters_to_floors(delta_location_meters)
-            print("delta_t_so_far: {:.6}, delta_loc_total: {:.4}; delta_loc_so_far: {:.4}, V: {:.4}; expected_t_total"
-                  .format(float(delta_t_so_far), float(total_delta_loc),
-                          float(delta_location), float(v)),
-                          ElevatorPhysicsCalculator.time_to(start_loc, stop_loc)
-                  )
+            moving.append((elevator, start_t, start_loc, start_v, stop_event.floor))
+
+        if len(moving) == 0:
+            return
+
+        start_ts, start_locs, start_vs, stop_locs = (np.array(column, dtype=np.float64)
+                                                     for column in list(zip(*moving))[1:])
+        delta_ts_so_far = current_time - start_ts
+        # need to multiply by 3.9 - number of meters per floor.
+        delta_locations_meters, vs = states_at_t(
+            ElevatorPhysicsCalculator.floors_to_meters(stop_locs - start_locs), start_vs, delta_ts_so_far)
+        delta_locations = ElevatorPhysicsCalculator.meters_to_floors(delta_locations_meters)
+
+        for (elevator, start_t, start_loc, start_v, stop_loc), delta_location, v in \
+                zip(moving, delta_locations.tolist(), vs.tolist()):
+            if tracer.is_trace:
+                tracer.trace(current_time, "Start_t: {:.6}, start_loc: {:.4}, start_v: {:.4}, stop_loc: {:.4}",
+                             float(start_t), float(start_loc), float(start_v), float(stop_loc))
+                tracer.trace(current_time, "delta_t_so_far: {:.6}, delta_loc_total: {:.4}; delta_loc_so_far: {:.4}, "
+                                           "V: {:.4}; expected_t_total {}",
+                             float(current_time - start_t), float(stop_loc - start_loc), delta_location, v,
+                             ElevatorPhysicsCalculator.time_to(start_loc, stop_loc))
             elevator.velocity = v
             elevator.location = start_loc + delta_location
 
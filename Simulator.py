@@ -1,114 +1,254 @@
-from heapq import heappush, heappop
-
-from typing import List
+import time
+from typing import List, Iterable
 
+from elevate.CompletedGoals import CompletedGoals
+from elevate.OnlineStats import OnlineGoalStats
+from elevate.PhaseTimers import Phase, PhaseTimers
+from elevate.RandomStreams import RandomStream
+from elevate.Results import ResultsWriter
 from elevate.RunStats import RunStats
+from elevate.Snapshot import SimulatorSnapshot
 from elevate.ButtonPush import ButtonPush
 from elevate.Elevator import Elevator
+from elevate.ElevatorHistory import ElevatorHistory
 from elevate.Events import ElevatorStart, ElevatorStop
+from elevate.EventQueue import ElevatorEventQueue
 from elevate.strategies.RandomElevatorStrategy import RandomElevatorStrategy
 from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
 from elevate.TravelBehaviors import OfficeBuildingTravelBehavior, TravelBehavior
 from elevate.TravelGoal import TravelGoal
+from elevate.TripSources import TripSource, DailyTripSource, ReplayTripSource, record_trips
+from elevate.Tracing import tracer, TraceLevel, StreamSink
 
 
 class ElevatorSimulator:
-    def __init__(self, travel_behavior: TravelBehavior, strategy: ElevatorStrategy, num_elevators=3):
+    def __init__(self, travel_behavior: TravelBehavior, strategy: ElevatorStrategy, num_elevators=3, seed=None,
+                 plan_deadline=None, keep_goals=True, max_history_events=None, history_decimation=1,
+                 time_phases=False):
+        """
+        :param travel_behavior: generates the trips people take
+        :param strategy: decides which elevator goes where
+        :param num_elevators: the number of elevators in the building
+        :param seed: a root seed (or RandomStream) for the run. If given, the travel behavior and the strategy are
+         re-seeded with their own child streams of it, which makes the run reproducible on its own. Otherwise they keep
+         whatever streams they were built with. Re-seeding is done in place, on the objects passed in: simulators
+         that share a behavior or strategy share its stream too, so whichever was built last decides it for all of
+         them. Give each simulator its own (e.g. a fresh strategy per run, as MonteCarlo does) unless they run one
+         after the other.
+        :param plan_deadline: the (wall clock) seconds the strategy has for each replan, or None for no limit. Strategies
+         that can plan anytime return their best plan so far when it runs out; the number of times that happened ends
+         up in the RunStats.
+        :param keep_goals: whether to keep every completed goal. If not, only streaming statistics of them are kept, so
+         memory doesn't grow with the length of the run (and RunStats' percentiles are estimates).
+        :param max_history_events: the most events of each elevator to keep in elevator_history (the latest ones), or
+         None to keep them all. Distance and utilization are counted either way.
+        :param history_decimation: only keep every so many events of each elevator in elevator_history
+        :param time_phases: whether to time trip generation, planning, event generation, elevator state updates and
+         event processing (see PhaseTimers). The timings end up in the RunStats. Off, timing costs next to nothing.
+        """
         self.strategy = strategy
+        self.plan_deadline = plan_deadline
+        self.keep_goals = keep_goals
+        self.max_history_events = max_history_events
+        self.history_decimation = history_decimation
         self.travel_behavior = travel_behavior
         self.num_elevators = num_elevators
+        self.rng = None
+        if seed is not None:
+            self.rng = seed if isinstance(seed, RandomStream) else RandomStream(seed)
+            behavior_rng, strategy_rng = self.rng.spawn(2)
+            self.travel_behavior.seed(behavior_rng)
+            self.strategy.seed(strategy_rng)
 
         # Init Mutable state:
         # IF IT'S NOT ONE OF THESE THINGS, IT SHOULD NOT BE MUTABLE!
         self.elevators = [Elevator(passenger_goals=set()) for _ in range(self.num_elevators)]
         self.current_time = 0
-        self.pending_elevator_events = []  # heap of pending events
+        self.pending_elevator_events = ElevatorEventQueue()
         self.pending_button_presses = {}  # ButtonPress to TravelGoal
         self.current_schedule = None  # an ElevatorSchedule object generated from the strategy
-        self.completed_goals = []
-        self.elevator_history = {e: [] for e in self.elevators}
+        self.completed_goals = CompletedGoals()
+        self.goal_stats = OnlineGoalStats()
+        self.elevator_history = ElevatorHistory(self.elevators, max_history_events, history_decimation)
+        self.num_replans = 0
+        self.num_deadlines_hit = 0
+        self.results_writer = None  # type: ResultsWriter  # Only while a run is logging its results
+        self.phase_timers = PhaseTimers() if time_phases else None
+
+    def default_num_people(self):
+        return self.travel_behavior.num_floors * 40
 
     def construct_travel_goals(self, num_people) -> List[TravelGoal]:
         if num_people is None:
-            num_people = self.travel_behavior.num_floors * 40
-        # Where going to create a heap out of the travel goals
-        # The time based comparison is already specified there.
-        all_trips = []
-        for i in range(num_people):
-            trips = self.travel_behavior.generate_path()
-            for trip in trips:
-                heappush(all_trips, trip)
-        return all_trips
+            num_people = self.default_num_people()
+        start = time.perf_counter() if self.phase_timers is not None else None
+        # The trip table is already sorted by time, so the list of goals is a valid heap.
+        goals = self.travel_behavior.generate_trip_table(num_people).to_travel_goals()
+        if self.phase_timers is not None:
+            self.phase_timers.record(Phase.TRIP_GENERATION, start)
+        return goals
+
+    def construct_trip_source(self, num_people, num_days=1) -> TripSource:
+        if num_people is None:
+            num_people = self.default_num_people()
+        return DailyTripSource(self.travel_behavior, num_people, num_days)
+
+    def record_trip_source(self, path, num_people=None, num_days=1) -> ReplayTripSource:
+        """
+        Generates num_days of trips once and records them to path, so that any number of runs can replay exactly the
+        same trips (pass the result to run as its trip_source) without generating them again.
+        """
+        return record_trips(self.construct_trip_source(num_people, num_days), path)
+
+    def snapshot(self) -> SimulatorSnapshot:
+        """
+        :return: a compact, independent copy of where the simulation is now, which any number of forks can start from
+        """
+        return SimulatorSnapshot.capture(self.elevators, self.pending_button_presses, self.current_time,
+                                         self.pending_elevator_events, self.current_schedule,
+                                         self.travel_behavior.num_floors)
+
+    @staticmethod
+    def from_snapshot(snapshot: SimulatorSnapshot, travel_behavior: TravelBehavior, strategy: ElevatorStrategy,
+                      seed=None) -> 'ElevatorSimulator':
+        """
+        Builds a simulator that picks up where the snapshot left off. Its history and completed goals start out empty,
+        so the stats of a run only cover what happens after the snapshot.
+        :param travel_behavior: generates the trips of the rest of the run (they should come after snapshot.current_time)
+        :param strategy: the strategy the fork plans with
+        :param seed: as for the constructor
+        """
+        simulator = ElevatorSimulator(travel_behavior, strategy, len(snapshot.elevators), seed)
+        elevators, presses, events, schedule = snapshot.restore()
+        simulator.elevators = elevators
+        simulator.elevator_history = ElevatorHistory(elevators, simulator.max_history_events,
+                                                     simulator.history_decimation)
+        simulator.current_time = snapshot.current_time
+        simulator.pending_button_presses = presses
+        simulator.pending_elevator_events = ElevatorEventQueue(events)
+        simulator.current_schedule = schedule
+        return simulator
+
+    def fork(self, strategy: ElevatorStrategy = None, travel_behavior: TravelBehavior = None,
+             seed=None) -> 'ElevatorSimulator':
+        """
+        A copy of this simulation that can be run on without affecting this one. To start many forks from the same
+        point, take one snapshot and use from_snapshot instead.
+        """
+        return ElevatorSimulator.from_snapshot(self.snapshot(),
+                                               travel_behavior if travel_behavior is not None else self.travel_behavior,
+                                               strategy if strategy is not None else self.strategy, seed)
 
     def update_elevator_schedule(self, current_time):
-        print("[T={}] Begin:  Rescheduling.".format(current_time))
+        tracer.debug(current_time, "Begin:  Rescheduling.")
+        timers = self.phase_timers
+        start = time.perf_counter() if timers is not None else None
         if self.current_schedule is not None:
             self.current_schedule.update_elevator_state(current_time)
-        self.current_schedule = self.strategy.get_plan(self.elevators, self.pending_button_presses.keys(), current_time)
-        self.pending_elevator_events = self.current_schedule.event_gen_and_apply()
-        print("[T={}] Results of Rescheduling:".format(current_time))
-        temp_events = []
-        while len(self.pending_elevator_events) > 0:
-            event = heappop(self.pending_elevator_events)
-            print("    {}".format(event))
-            heappush(temp_events, event)
-        self.pending_elevator_events = temp_events
-        print("[T={}] Finish: Rescheduling.".format(current_time))
-
-    def run(self, num_people=None, logResults=False) -> RunStats:
-        # Generate a set of schedules for today
-        trip_schedule = self.construct_travel_goals(num_people)
-        # for trip in trip_schedule:
-        #     print(trip.time)
-        print("Running {} total goals".format(len(trip_schedule)))
-
-        self.update_elevator_schedule(0)
-
-        while len(trip_schedule) > 0:
-            print("T={}".format(self.current_time))
-            next_travel_goal = heappop(trip_schedule)
-            # Process everything that is going to happen with the elevators until then:
-            self.simulate(next_travel_goal.time)
-            # Now get the next travel goal and add it to button presses
-            self.current_time = next_travel_goal.time
-            caused_button_press = self.add_travel_goal(next_travel_goal)
-            if caused_button_press:  # Then we need to recalculate the schedule
-                self.update_elevator_schedule(self.current_time)
-
-        if self.has_pending():
-            self.simulate(None)  # Simulate all remaining elevator events
+            if timers is not None:
+                start = timers.record(Phase.STATE_UPDATE, start)
+        deadline = time.perf_counter() + self.plan_deadline if self.plan_deadline is not None else None
+        self.current_schedule = self.strategy.get_plan_update(
+            self.elevators, self.pending_button_presses.keys(), current_time, self.current_schedule, deadline)
+        if timers is not None:
+            timers.record(Phase.PLANNING, start)
+        self.num_replans += 1
+        if self.current_schedule.deadline_hit:
+            self.num_deadlines_hit += 1
+            tracer.debug(current_time, "Planning deadline hit ({} of {} replans)", self.num_deadlines_hit,
+                         self.num_replans)
+        # In building order, so that events (and their ties) are generated in the same order every run
+        changed_elevators = [e for e in self.elevators if e in self.current_schedule.changed_elevators]
+        tracer.debug(current_time, "Replanning {} of {} elevators", len(changed_elevators), len(self.elevators))
+        start = time.perf_counter() if timers is not None else None
+        events = self.current_schedule.event_gen_and_apply(changed_elevators)
+        if timers is not None:
+            timers.record(Phase.EVENT_GENERATION, start)
+        # Untouched elevators keep the events we already generated for them.
+        self.pending_elevator_events.reschedule(changed_elevators, events)
+        if tracer.is_trace:
+            tracer.trace(current_time, "Results of Rescheduling:")
+            for event in self.pending_elevator_events:
+                tracer.trace(current_time, "    {}", event)
+        tracer.debug(current_time, "Finish: Rescheduling.")
+
+    def run(self, num_people=None, logResults=False, trip_source: Iterable[TravelGoal] = None,
+            results_path="results.elv") -> RunStats:
+        """
+        Runs the simulation until every trip is complete. The strategy is closed when the run ends, however it ends
+        (see ElevatorStrategy.close).
+        :param num_people: the number of people to generate a day of trips for (if no trip_source is given)
+        :param logResults: whether to stream every completed goal and elevator event to results_path as the run goes
+         (see Results.ResultsWriter). `python -m elevate.Results results.elv` turns the file into summary.csv.
+        :param trip_source: the trips to simulate, in time order. Any iterable of TravelGoals will do (a TripSource, a
+         sorted list, a ReplayTripSource of recorded trips, ...). By default, one day of trips is generated lazily from
+         the travel behavior.
+        :param results_path: where to write the results if logResults is set
+        :return: the statistics of the run
+        """
+        if trip_source is None:
+            trip_source = self.construct_trip_source(num_people)
+        tracer.info(self.current_time, "Running goals from {}", trip_source)
+        if self.phase_timers is not None:
+            trip_source = self.phase_timers.timed(Phase.TRIP_GENERATION, trip_source)
         if logResults:
-            print("Generating summary after completing {} total goals".format(len(self.completed_goals)))
-            with open("summary.csv", 'w') as summary_file:
-                for g in self.completed_goals:
-                    summary_file.write("{},{},{},{},{}\n".format(
-                        g.start_floor, g.end_floor, g.time, g.board_time - g.time, g.finish_time - g.time
-                    ))
+            self.results_writer = ResultsWriter(results_path)
+
+        try:
+            self.update_elevator_schedule(self.current_time)
+
+            for next_travel_goal in trip_source:
+                # Process everything that is going to happen with the elevators until then:
+                self.simulate(next_travel_goal.time)
+                # Now get the next travel goal and add it to button presses
+                self.current_time = next_travel_goal.time
+                caused_button_press = self.add_travel_goal(next_travel_goal)
+                if caused_button_press:  # Then we need to recalculate the schedule
+                    self.update_elevator_schedule(self.current_time)
+
+            if self.has_pending():
+                self.simulate(None)  # Simulate all remaining elevator events
+        finally:
+            self.strategy.close()
+            if self.results_writer is not None:
+                self.results_writer.close()
+                tracer.info(self.current_time, "Wrote the results of {} completed goals to {}", len(self.goal_stats),
+                            results_path)
+                self.results_writer = None
 
-        return RunStats(self.completed_goals, self.elevator_history)
+        return RunStats(self.completed_goals, self.elevator_history, self.num_replans, self.num_deadlines_hit,
+                        self.goal_stats, self.phase_timers)
 
     def has_pending(self):
         return len(self.pending_button_presses) + len(self.pending_elevator_events) > 0
 
     def simulate(self, end_time=None):
-        print("Beginning elevator event processing...")
+        timers = self.phase_timers
+        start = time.perf_counter() if timers is not None else None
+        recorded_at_start = timers.recorded if timers is not None else None
         count = 0
         while len(self.pending_elevator_events) > 0 and (
-                end_time is None or self.pending_elevator_events[0].time < end_time):
+                end_time is None or self.pending_elevator_events.peek().time < end_time):
             count += 1
-            next_event = heappop(self.pending_elevator_events)
-            print("[T={}] Begin:  {}".format(self.current_time, next_event))
+            next_event = self.pending_elevator_events.pop()
+            tracer.debug(self.current_time, "Begin:  {}", next_event)
             # Record the event for history
-            self.elevator_history[next_event.elevator].append(
-                (self.current_time, next_event.floor, len(next_event.elevator.passenger_goals)))
-            if isinstance(next_event, ElevatorStart):
+            is_start = isinstance(next_event, ElevatorStart)
+            load = len(next_event.elevator.passenger_goals)
+            kind = ElevatorHistory.START if is_start else ElevatorHistory.STOP
+            self.elevator_history.record(next_event.elevator, next_event.time, next_event.floor, load, kind)
+            if self.results_writer is not None:
+                self.results_writer.add_event(next_event.elevator.index, next_event.time, next_event.floor, load, kind)
+            if is_start:
                 self.process_elevator_start(next_event)
             elif isinstance(next_event, ElevatorStop):
                 self.process_elevator_stop(next_event)
             else:
-                print("Unrecognized elevator event type!")
-            print("[T={}] Finish: {}".format(self.current_time, next_event))
-        print("Processed {} elevator events".format(count))
+                tracer.warn(self.current_time, "Unrecognized elevator event type {}!", type(next_event))
+            tracer.debug(self.current_time, "Finish: {}", next_event)
+        tracer.debug(self.current_time, "Processed {} elevator events", count)
+        if timers is not None and count > 0:
+            timers.record(Phase.SIMULATE, start, recorded_at_start)  # Less any replans the events caused
 
     def process_elevator_stop(self, this_stop: ElevatorStop):
         # First, update state stuff from the stop
@@ -118,9 +258,14 @@ class ElevatorSimulator:
 
         # Next, update elevator state
         completed_goals = elevator.stop_and_drop_off()
-        for goal in completed_goals:
+        # Sets are ordered by object ids; sort so that runs are reproducible
+        for goal in sorted(completed_goals, key=lambda g: (g.time, g.start_floor)):
             goal.exit_elevator(self.current_time)
-            self.completed_goals.append(goal)
+            self.goal_stats.add(goal)
+            if self.results_writer is not None:
+                self.results_writer.add_goal(goal)
+            if self.keep_goals:
+                self.completed_goals.append(goal)
 
     def process_elevator_start(self, this_start: ElevatorStart):
         self.current_time = this_start.time
@@ -147,12 +292,13 @@ class ElevatorSimulator:
             self.pending_button_presses[button_push] = []
             new_press = True
         self.pending_button_presses[button_push].append(next_travel_goal)
-        print("Added travel goal {} - caused New Press? {}. {} pending button presses".format(
-            next_travel_goal, new_press, len(self.pending_button_presses)))
+        tracer.debug(self.current_time, "Added travel goal {} - caused New Press? {}. {} pending button presses",
+                     next_travel_goal, new_press, len(self.pending_button_presses))
         return new_press
 
 
 if __name__ == "__main__":
+    tracer.configure(TraceLevel.DEBUG, StreamSink())
     ElevatorSimulator(
         OfficeBuildingTravelBehavior(40),
         RandomElevatorStrategy()
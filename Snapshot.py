@@ -0,0 +1,188 @@
+import math
+from typing import Dict, Iterable, List, Tuple
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.Events import ElevatorEvent, ElevatorStart, ElevatorStop
+from elevate.Schedule import ElevatorSchedule
+from elevate.TravelGoal import TravelGoal
+
+
+class SimulatorSnapshot:
+    """
+    A frozen, compact copy of the mutable state of a simulation: the elevators (with their passengers and the trip
+    they're on), the pending button presses and the pending elevator events.
+
+    Everything is stored as plain tuples of numbers and strings, so a snapshot never shares objects with the simulation
+    it was taken from, is cheap to take, and can be restored any number of times. Restoring builds fresh objects, so
+    every fork is free to mutate its own copy of the world (which is what the lookahead rollouts of the SA strategies
+    do, many times per replan).
+    """
+    def __init__(self, current_time, elevators: Tuple, presses: Tuple, events: Tuple, schedule: Tuple = None,
+                 num_floors=None):
+        """
+        Use capture rather than building these directly.
+        :param current_time: the time the snapshot was taken
+        :param elevators: a (index, location, velocity, is_stopped, passengers, last start) tuple per elevator
+        :param presses: a (floor, direction, time, goals) tuple per pending button press
+        :param events: a (kind, elevator index, time, floor, ...) tuple per pending event, in the order they'll happen
+        :param schedule: (floors, times, final directions), each keyed by elevator index, or None if there isn't one
+        :param num_floors: the top floor of the building
+        """
+        self.current_time = current_time
+        self.elevators = elevators
+        self.presses = presses
+        self.events = events
+        self.schedule = schedule
+        self.num_floors = num_floors
+
+    @staticmethod
+    def _goal_state(goal: TravelGoal) -> Tuple:
+        return goal.time, goal.start_floor, goal.end_floor, goal.board_time, goal.finish_time
+
+    @staticmethod
+    def _restore_goal(state: Tuple) -> TravelGoal:
+        time, start_floor, end_floor, board_time, finish_time = state
+        goal = TravelGoal(time, start_floor, end_floor)
+        goal.board_time = board_time
+        goal.finish_time = finish_time
+        return goal
+
+    @staticmethod
+    def _press_goals(press: ButtonPush, num_floors) -> List[TravelGoal]:
+        # A strategy only sees the presses, not who is waiting behind them. Stand in one person going a floor in the
+        # direction they asked for.
+        end_floor = press.floor + 1 if press.direction == "UP" else press.floor - 1
+        return [TravelGoal(press.time if press.time is not None else 0, press.floor,
+                           min(max(end_floor, 0), num_floors))]
+
+    @staticmethod
+    def building_height(elevators: Iterable[Elevator], presses) -> int:
+        """
+        The lowest the top floor of a building can be, given its elevators and pending presses: the highest floor any
+        elevator is at or taking someone to, or that a press is on (one above it, for an UP press). It's never less
+        than 2, the fewest floors above the lobby that interfloor traffic can go between.
+        """
+        floors = [2]
+        for e in elevators:
+            floors.append(math.ceil(e.location))
+            floors.extend(g.end_floor for g in e.passenger_goals)
+        for p in presses:
+            floors.append(p.floor + 1 if p.direction == "UP" else p.floor)
+            if isinstance(presses, dict):
+                floors.extend(g.end_floor for g in presses[p])
+        return max(floors)
+
+    @staticmethod
+    def capture(elevators: Iterable[Elevator], presses, current_time, events: Iterable[ElevatorEvent] = (),
+                schedule: ElevatorSchedule = None, num_floors=None) -> 'SimulatorSnapshot':
+        """
+        :param elevators: the elevators of the building
+        :param presses: the pending button presses. Either a dict of ButtonPush to the TravelGoals waiting on it (as the
+         simulator keeps them), or just the presses, in which case a stand in goal is made for each.
+        :param current_time: the time of the snapshot
+        :param events: the pending elevator events, in order
+        :param schedule: the schedule the elevators are currently following, if any
+        :param num_floors: the top floor of the building. None works it out with building_height, which can come up
+         short of the real top floor if nothing is happening up there.
+        :return: the snapshot
+        """
+        elevators = list(elevators)
+        if num_floors is None:
+            num_floors = SimulatorSnapshot.building_height(elevators, presses)
+        elevator_states = []
+        for e in elevators:
+            last_start = None
+            if e.last_start_event is not None:
+                start = e.last_start_event
+                stop = start.stop_event
+                last_start = (start.time, start.floor, start.elevator_state,
+                              (stop.time, stop.floor) if stop is not None else None)
+            passengers = tuple(sorted(SimulatorSnapshot._goal_state(g) for g in e.passenger_goals))
+            elevator_states.append((e.index, e.location, e.velocity, e.is_stopped, passengers, last_start))
+
+        goals_by_press = presses if isinstance(presses, dict) else \
+            {p: SimulatorSnapshot._press_goals(p, num_floors) for p in presses}
+        press_states = tuple(
+            (p.floor, p.direction, p.time, tuple(SimulatorSnapshot._goal_state(g) for g in goals))
+            for p, goals in goals_by_press.items())
+
+        event_states = []
+        for event in events:
+            if isinstance(event, ElevatorStart):
+                stop = event.stop_event
+                press = event.button_press_handled
+                event_states.append(("START", event.elevator.index, event.time, event.floor, event.elevator_state,
+                                     (stop.time, stop.floor) if stop is not None else None,
+                                     (press.floor, press.direction, press.time) if press is not None else None))
+            else:
+                event_states.append(("STOP", event.elevator.index, event.time, event.floor))
+
+        schedule_state = None
+        if schedule is not None:
+            schedule_state = (
+                {e.index: tuple(floors) for e, floors in schedule.elevator_to_floors.items()},
+                {e.index: tuple(times) for e, times in schedule.elevator_to_time.items()},
+                {e.index: direction for e, direction in schedule.elevator_to_final_dir.items()})
+
+        return SimulatorSnapshot(current_time, tuple(elevator_states), press_states, tuple(event_states), schedule_state,
+                                 num_floors)
+
+    def restore(self) -> Tuple[List[Elevator], Dict[ButtonPush, List[TravelGoal]], List[ElevatorEvent],
+                               ElevatorSchedule]:
+        """
+        Builds a fresh copy of the captured world. Elevators keep the index they had when the snapshot was taken.
+        :return: a tuple of (elevators, pending button presses, pending events, schedule - or None)
+        """
+        elevators = []
+        for index, location, velocity, is_stopped, passengers, last_start in self.elevators:
+            e = Elevator(location, is_stopped, set(SimulatorSnapshot._restore_goal(g) for g in passengers))
+            e.index = index
+            e.velocity = velocity
+            if last_start is not None:
+                time, floor, state, stop = last_start
+                e.last_start_event = ElevatorStart(e, time, floor, ElevatorStop(e, *stop) if stop is not None else None)
+                e.last_start_event.elevator_state = state
+            elevators.append(e)
+        by_index = {e.index: e for e in elevators}
+
+        presses = {ButtonPush(floor, direction, time): [SimulatorSnapshot._restore_goal(g) for g in goals]
+                   for floor, direction, time, goals in self.presses}
+
+        # Stops first, so the starts of trips that are pending can share their stop object, as the schedule's do.
+        stops = {}
+        for state in self.events:
+            if state[0] == "STOP":
+                _, index, time, floor = state
+                stops[state] = ElevatorStop(by_index[index], time, floor)
+        events = []
+        for state in self.events:
+            if state[0] == "START":
+                _, index, time, floor, elevator_state, stop, press = state
+                e = by_index[index]
+                stop_event = None
+                if stop is not None:
+                    stop_event = stops.get(("STOP", index) + stop, None) or ElevatorStop(e, *stop)
+                start = ElevatorStart(e, time, floor, stop_event, ButtonPush(*press) if press is not None else None)
+                start.elevator_state = elevator_state
+                events.append(start)
+            else:
+                events.append(stops[state])
+        for e in elevators:
+            stop = e.last_start_event.stop_event if e.last_start_event is not None else None
+            if stop is not None:
+                e.last_start_event.stop_event = stops.get(("STOP", e.index, stop.time, stop.floor), stop)
+
+        schedule = None
+        if self.schedule is not None:
+            floors, times, final_dirs = self.schedule
+            schedule = ElevatorSchedule.restore(
+                {by_index[i]: list(floors[i]) for i in floors},
+                {by_index[i]: final_dirs[i] for i in final_dirs},
+                {by_index[i]: list(times[i]) for i in times},
+                self.current_time)
+        return elevators, presses, events, schedule
+
+    def __repr__(self):
+        return "SimulatorSnapshot(T={:.6}, {} elevators, {} presses, {} events)".format(
+            float(self.current_time), len(self.elevators), len(self.presses), len(self.events))
@@ -0,0 +1,155 @@
+import struct
+import sys
+from collections import deque
+from typing import Iterator, List, Tuple
+
+
+class TraceLevel:
+    """
+    Trace levels, from the most to the least chatty. A tracer emits every record whose level is at least its own.
+    """
+    TRACE = 5
+    DEBUG = 10
+    INFO = 20
+    WARN = 30
+    OFF = 100
+
+    names = {TRACE: "TRACE", DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN"}
+
+
+class TraceSink:
+    """
+    A sink receives fully formatted trace records. Sinks are only ever handed records for enabled levels, so they
+    never need to check levels themselves.
+    """
+    def write(self, time, level, message):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullSink(TraceSink):
+    """
+    Discards everything. A tracer with a null sink disables every level, so nothing is ever formatted.
+    """
+    pass
+
+
+class StreamSink(TraceSink):
+    """
+    Writes human readable lines to a stream (stdout by default) - this is what the simulator used to print.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def write(self, time, level, message):
+        self.stream.write("[T={:.6}] {:5} {}\n".format(float(time), TraceLevel.names.get(level, level), message))
+
+
+class RingBufferSink(TraceSink):
+    """
+    Keeps the last `capacity` records in memory. Useful for dumping recent history when something goes wrong.
+    """
+    def __init__(self, capacity=10000):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, time, level, message):
+        self.records.append((time, level, message))
+
+    def messages(self) -> List[str]:
+        return [m for _, _, m in self.records]
+
+
+class BinaryFileSink(TraceSink):
+    """
+    Appends records to a file in a compact binary format: a fixed header (time as a double, level as a byte and the
+    message length) followed by the utf-8 encoded message. Use read_binary_trace to get the records back.
+    """
+    header = struct.Struct("<dBI")
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+
+    def write(self, time, level, message):
+        data = message.encode("utf-8")
+        self.file.write(BinaryFileSink.header.pack(time, level, len(data)))
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+def read_binary_trace(path) -> Iterator[Tuple[float, int, str]]:
+    """
+    Reads back the records written by a BinaryFileSink.
+    :param path: the file the sink wrote to
+    :return: an iterator of (time, level, message) tuples in the order they were written
+    """
+    header = BinaryFileSink.header
+    with open(path, 'rb') as trace_file:
+        while True:
+            raw = trace_file.read(header.size)
+            if len(raw) < header.size:
+                return
+            time, level, length = header.unpack(raw)
+            yield time, level, trace_file.read(length).decode("utf-8")
+
+
+class Tracer:
+    """
+    A level-gated tracer. Messages are format strings with their arguments passed separately, so a disabled level
+    never formats anything. Call sites that need to do real work to build their arguments (e.g. loop over every
+    elevator) should check the is_* flags first:
+
+        if tracer.is_debug:
+            for e in plan:
+                tracer.debug(current_time, "{} {}", e, plan[e])
+    """
+    def __init__(self, level=TraceLevel.OFF, sink: TraceSink = None):
+        self.sink = None
+        self.level = TraceLevel.OFF
+        self.is_trace = self.is_debug = self.is_info = self.is_warn = False
+        self.configure(level, sink)
+
+    def configure(self, level, sink: TraceSink = None):
+        """
+        Changes the level and (optionally) the sink of this tracer. The previous sink is closed if it's replaced.
+        """
+        if sink is not None and sink is not self.sink:
+            if self.sink is not None:
+                self.sink.close()
+            self.sink = sink
+        elif self.sink is None:
+            self.sink = NullSink()
+        self.level = level if not isinstance(self.sink, NullSink) else TraceLevel.OFF
+        self.is_trace = self.level <= TraceLevel.TRACE
+        self.is_debug = self.level <= TraceLevel.DEBUG
+        self.is_info = self.level <= TraceLevel.INFO
+        self.is_warn = self.level <= TraceLevel.WARN
+
+    def emit(self, level, time, fmt, *args):
+        if level >= self.level:
+            self.sink.write(time, level, fmt.format(*args) if args else fmt)
+
+    def trace(self, time, fmt, *args):
+        if self.is_trace:
+            self.sink.write(time, TraceLevel.TRACE, fmt.format(*args) if args else fmt)
+
+    def debug(self, time, fmt, *args):
+        if self.is_debug:
+            self.sink.write(time, TraceLevel.DEBUG, fmt.format(*args) if args else fmt)
+
+    def info(self, time, fmt, *args):
+        if self.is_info:
+            self.sink.write(time, TraceLevel.INFO, fmt.format(*args) if args else fmt)
+
+    def warn(self, time, fmt, *args):
+        if self.is_warn:
+            self.sink.write(time, TraceLevel.WARN, fmt.format(*args) if args else fmt)
+
+
+# The tracer shared by the simulator, schedules and strategies. It is off by default; debug runs should call
+# tracer.configure(TraceLevel.DEBUG, StreamSink()) (or any other sink) before running.
+tracer = Tracer()
@@ -1,18 +1,30 @@
-import random
 from abc import ABC, abstractmethod
-from random import uniform, choice
 from typing import Dict
 
+import numpy as np
+
+from elevate.RandomStreams import RandomStream
 from elevate.TravelGoal import TravelGoal
+from elevate.TripTable import TripTable
 
 
 class TravelBehavior(ABC):
 
-    def __init__(self, num_floors):
+    def __init__(self, num_floors, rng: RandomStream = None):
         self.num_floors = num_floors
+        self.rng = rng if rng is not None else RandomStream.from_global()
+
+    def seed(self, rng: RandomStream):
+        """
+        Makes this behavior draw from the given stream from now on.
+        """
+        self.rng = rng
 
     def random_nonzero_floor(self):
-        return random.randint(1, self.num_floors)
+        return self.rng.python.randint(1, self.num_floors)
+
+    def random_nonzero_floors(self, rng: np.random.Generator, n) -> np.ndarray:
+        return rng.integers(1, self.num_floors, size=n, endpoint=True)
 
     """
     A travel behavior is a class that is good at generating behaviors of people in different situations, e.g. at an
@@ -24,6 +36,18 @@ class TravelBehavior(ABC):
     def generate_path(self):
         pass
 
+    def generate_trip_table(self, num_people, rng: np.random.Generator = None) -> TripTable:
+        """
+        Generates the trips of num_people people at once, as a time sorted table.
+
+        Subclasses should override this with a vectorized version; by default it just calls generate_path for everyone.
+        :param num_people: the number of people to generate trips for
+        :param rng: the numpy generator to draw from. Defaults to this behavior's stream.
+        :return: a TripTable of all trips, sorted by time
+        """
+        goals = [goal for _ in range(num_people) for goal in self.generate_path()]
+        return TripTable([g.time for g in goals], [g.start_floor for g in goals], [g.end_floor for g in goals])
+
 
 class OfficeBuildingTravelBehavior(TravelBehavior):
     """
@@ -41,8 +65,8 @@ class OfficeBuildingTravelBehavior(TravelBehavior):
                  lunch_start_t_mean=(t_12pm + 15 * d_min), lunch_start_t_sd=(25 * d_min),
                  lunch_duration_t_mean=(50 * d_min), lunch_duration_t_sd=(15 * d_min), quittin_t_mean=t_5pm,
                  quittin_t_sd=d_hr, p_trip=.5, trip_t_mean=(30 * d_min), trip_t_sd=(15 * d_min),
-                 trip_t_min=(10 * d_min), p_trip_to_0=.6):
-        super().__init__(num_floors)
+                 trip_t_min=(10 * d_min), p_trip_to_0=.6, rng: RandomStream = None):
+        super().__init__(num_floors, rng)
         self.start_t_mean = start_t_mean
         self.start_t_sd = start_t_sd
         self.p_lunch = p_lunch
@@ -61,24 +85,24 @@ class OfficeBuildingTravelBehavior(TravelBehavior):
     def start_time(self):
         t = 0
         while t <= 0:
-            t = random.gauss(self.start_t_mean, self.start_t_sd)
+            t = self.rng.python.gauss(self.start_t_mean, self.start_t_sd)
         return t
 
     def lunch(self, start_time):
-        lunch_start = random.gauss(self.lunch_start_t_mean, self.lunch_start_t_sd)
-        lunch_duration = random.gauss(self.lunch_duration_t_mean, self.lunch_duration_t_sd)
+        lunch_start = self.rng.python.gauss(self.lunch_start_t_mean, self.lunch_start_t_sd)
+        lunch_duration = self.rng.python.gauss(self.lunch_duration_t_mean, self.lunch_duration_t_sd)
         return max(lunch_start, start_time + 150*60), max(lunch_duration, 0)
 
     def quittin_t(self):
-        t = random.gauss(self.quittin_t_mean, self.quittin_t_sd)
+        t = self.rng.python.gauss(self.quittin_t_mean, self.quittin_t_sd)
         return max(t, 0)
 
     def trip_duration(self):
-        t = random.gauss(self.trip_t_mean, self.trip_t_sd)
+        t = self.rng.python.gauss(self.trip_t_mean, self.trip_t_sd)
         return t if t > self.trip_t_min else self.trip_t_min
 
     def random_start_time(self):
-        return random.gauss(self.start_t_mean, self.start_t_sd)
+        return self.rng.python.gauss(self.start_t_mean, self.start_t_sd)
 
     def generate_path(self):
         goals = []
@@ -87,7 +111,7 @@ class OfficeBuildingTravelBehavior(TravelBehavior):
         start_t = self.start_time()
         goals.append(TravelGoal(self.start_time(), 0, office_floor))
         # At lunch, I go down
-        if random.random() < self.p_lunch:
+        if self.rng.python.random() < self.p_lunch:
             lunch_start, lunch_duration = self.lunch(start_t)
             goals.append(TravelGoal(lunch_start, office_floor, 0))
             goals.append(TravelGoal(lunch_start + lunch_duration, 0, office_floor))
@@ -95,24 +119,24 @@ class OfficeBuildingTravelBehavior(TravelBehavior):
         goals.append(TravelGoal(self.quittin_t(), office_floor, 0))
 
         # In addition, I may go from my office to some other floor at some point in the morning
-        if random.random() < self.p_trip:
+        if self.rng.python.random() < self.p_trip:
             trip_duration = self.trip_duration()
             if goals[0].time + self.trip_t_min \
                     < goals[1].time - self.trip_t_min - trip_duration:
-                trip_start = random.uniform(goals[0].time + 15*60, goals[1].time - trip_duration )
-                floor = 0 if random.random() < self.p_trip_to_0 else self.random_nonzero_floor()
+                trip_start = self.rng.python.uniform(goals[0].time + 15*60, goals[1].time - trip_duration )
+                floor = 0 if self.rng.python.random() < self.p_trip_to_0 else self.random_nonzero_floor()
                 while floor == office_floor:
                     floor = self.random_nonzero_floor()
                 goals.insert(1, TravelGoal(trip_start, office_floor, floor))
                 goals.insert(2, TravelGoal(trip_start+trip_duration, floor, office_floor))
 
         # Or in the afternoon:
-        if random.random() < self.p_trip:
+        if self.rng.python.random() < self.p_trip:
             trip_duration = self.trip_duration()
             if goals[-2].time + self.trip_t_min \
                     < goals[-1].time - self.trip_t_min - trip_duration:
-                trip_start = random.uniform(goals[-2].time + 15*60, goals[-1].time - trip_duration)
-                floor = 0 if random.random() < self.p_trip_to_0 else self.random_nonzero_floor()
+                trip_start = self.rng.python.uniform(goals[-2].time + 15*60, goals[-1].time - trip_duration)
+                floor = 0 if self.rng.python.random() < self.p_trip_to_0 else self.random_nonzero_floor()
                 while floor == office_floor:
                     floor = self.random_nonzero_floor()
                 goals.insert(-1, TravelGoal(trip_start, office_floor, floor))
@@ -120,78 +144,198 @@ class OfficeBuildingTravelBehavior(TravelBehavior):
 
         return goals
 
+    def _positive_normal(self, rng: np.random.Generator, mean, sd, n) -> np.ndarray:
+        # Redraw until everything is positive, like start_time does one person at a time
+        t = rng.normal(mean, sd, n)
+        not_positive = np.flatnonzero(t <= 0)
+        while len(not_positive) > 0:
+            t[not_positive] = rng.normal(mean, sd, len(not_positive))
+            not_positive = not_positive[t[not_positive] <= 0]
+        return t
+
+    def _trip_floors(self, rng: np.random.Generator, office_floors: np.ndarray) -> np.ndarray:
+        n = len(office_floors)
+        floors = np.where(rng.random(n) < self.p_trip_to_0, 0, self.random_nonzero_floors(rng, n))
+        same = np.flatnonzero(floors == office_floors)
+        while len(same) > 0:
+            floors[same] = self.random_nonzero_floors(rng, len(same))
+            same = same[floors[same] == office_floors[same]]
+        return floors
+
+    def _side_trips(self, rng: np.random.Generator, office_floors, after_t, before_t):
+        """
+        Vectorized version of the side trips in generate_path: each person may take a trip to another floor sometime
+        between after_t and before_t.
+        :return: (mask of who takes a trip, when they leave, when they come back, the floor they go to)
+        """
+        n = len(office_floors)
+        takes_trip = rng.random(n) < self.p_trip
+        duration = np.maximum(rng.normal(self.trip_t_mean, self.trip_t_sd, n), self.trip_t_min)
+        takes_trip &= after_t + self.trip_t_min < before_t - self.trip_t_min - duration
+        # Only the trips that fit are used, but unlike Generator.uniform this doesn't mind low > high for the rest
+        earliest, latest = after_t + 15*60, before_t - duration
+        trip_start = earliest + (latest - earliest) * rng.random(n)
+        return takes_trip, trip_start, trip_start + duration, self._trip_floors(rng, office_floors)
+
+    def generate_trip_table(self, num_people, rng: np.random.Generator = None) -> TripTable:
+        """
+        Draws the same day as generate_path does, but for everyone at once. (The one difference is that the arrival
+        time used to place lunch is the time people actually arrive at.)
+        """
+        rng = rng if rng is not None else self.rng.numpy
+        n = num_people
+        zeros = np.zeros(n, dtype=TripTable.floor_dtype)
+
+        # In the morning, everyone goes to their office floor
+        office_floor = self.random_nonzero_floors(rng, n)
+        arrive_t = self._positive_normal(rng, self.start_t_mean, self.start_t_sd, n)
+        # Most go down for lunch
+        has_lunch = rng.random(n) < self.p_lunch
+        lunch_start = np.maximum(rng.normal(self.lunch_start_t_mean, self.lunch_start_t_sd, n), arrive_t + 150*60)
+        lunch_end = lunch_start + np.maximum(rng.normal(self.lunch_duration_t_mean, self.lunch_duration_t_sd, n), 0)
+        # And at the end of the day everyone leaves
+        quit_t = np.maximum(rng.normal(self.quittin_t_mean, self.quittin_t_sd, n), 0)
+
+        # Side trips in the morning (before lunch, or before leaving if there is no lunch)...
+        morning, morning_out, morning_back, morning_floor = self._side_trips(
+            rng, office_floor, arrive_t, np.where(has_lunch, lunch_start, quit_t))
+        # ... or in the afternoon (after whatever the last thing before leaving was).
+        afternoon, afternoon_out, afternoon_back, afternoon_floor = self._side_trips(
+            rng, office_floor, np.where(has_lunch, lunch_end, np.where(morning, morning_back, arrive_t)), quit_t)
+
+        return TripTable(
+            np.concatenate([arrive_t, lunch_start[has_lunch], lunch_end[has_lunch], quit_t,
+                            morning_out[morning], morning_back[morning],
+                            afternoon_out[afternoon], afternoon_back[afternoon]]),
+            np.concatenate([zeros, office_floor[has_lunch], zeros[has_lunch], office_floor,
+                            office_floor[morning], morning_floor[morning],
+                            office_floor[afternoon], afternoon_floor[afternoon]]),
+            np.concatenate([office_floor, zeros[has_lunch], office_floor[has_lunch], zeros,
+                            morning_floor[morning], office_floor[morning],
+                            afternoon_floor[afternoon], office_floor[afternoon]]),
+        )
+
 
 class TravelBehaviorType(TravelBehavior):
-    def __init__(self, num_floors, start_t, duration):
-        super().__init__(num_floors)
+    def __init__(self, num_floors, start_t, duration, rng: RandomStream = None):
+        super().__init__(num_floors, rng)
         self.start_t = start_t
         self.duration = duration
 
     def get_t(self):
-        return uniform(self.start_t, self.start_t + self.duration)
+        return self.rng.python.uniform(self.start_t, self.start_t + self.duration)
 
     @abstractmethod
     def generate_path(self):
         pass
 
+    def generate_trip_table(self, num_people, rng: np.random.Generator = None) -> TripTable:
+        rng = rng if rng is not None else self.rng.numpy
+        start_floors, end_floors = self.generate_floors(rng, num_people)
+        return TripTable(rng.uniform(self.start_t, self.start_t + self.duration, num_people), start_floors, end_floors)
+
+    @abstractmethod
+    def generate_floors(self, rng: np.random.Generator, n):
+        """
+        Vectorized counterpart to generate_path for the floors only.
+        :return: a (start floors, end floors) tuple of arrays of n trips
+        """
+        pass
+
 
 class UpPeakTravelBehavior(TravelBehaviorType):
 
-    def __init__(self, num_floors, start_t, duration):
-        super().__init__(num_floors, start_t, duration)
+    def __init__(self, num_floors, start_t, duration, rng: RandomStream = None):
+        super().__init__(num_floors, start_t, duration, rng)
 
     def generate_path(self):
         # Start at a uniform random time between start_t and duration
         # Go to a random floor from 0
         return [TravelGoal(self.get_t(), 0, self.random_nonzero_floor())]
 
+    def generate_floors(self, rng: np.random.Generator, n):
+        return np.zeros(n, dtype=TripTable.floor_dtype), self.random_nonzero_floors(rng, n)
+
 
 class DownPeakTravelBehavior(TravelBehaviorType):
 
-    def __init__(self, num_floors, start_t, duration):
-        super().__init__(num_floors, start_t, duration)
+    def __init__(self, num_floors, start_t, duration, rng: RandomStream = None):
+        super().__init__(num_floors, start_t, duration, rng)
 
     def generate_path(self):
         return [TravelGoal(self.get_t(), self.random_nonzero_floor(), 0)]
 
+    def generate_floors(self, rng: np.random.Generator, n):
+        return self.random_nonzero_floors(rng, n), np.zeros(n, dtype=TripTable.floor_dtype)
+
 
 class UpDownPeakTravelBehavior(TravelBehaviorType):
 
-    def __init__(self, num_floors, start_t, duration):
-        super().__init__(num_floors, start_t, duration)
+    def __init__(self, num_floors, start_t, duration, rng: RandomStream = None):
+        super().__init__(num_floors, start_t, duration, rng)
 
     def generate_path(self):
-        if random.random() <= .5:
+        if self.rng.python.random() <= .5:
             return [TravelGoal(self.get_t(), self.random_nonzero_floor(), 0)]
         else:
             return [TravelGoal(self.get_t(), 0, self.random_nonzero_floor())]
 
+    def generate_floors(self, rng: np.random.Generator, n):
+        going_down = rng.random(n) <= .5
+        floors = self.random_nonzero_floors(rng, n)
+        return np.where(going_down, floors, 0), np.where(going_down, 0, floors)
+
 
 class InterfloorTravelBehavior(TravelBehaviorType):
 
-    def __init__(self, num_floors, start_t, duration):
-        super().__init__(num_floors, start_t, duration)
+    def __init__(self, num_floors, start_t, duration, rng: RandomStream = None):
+        # Trips go between two different floors above the lobby, so there have to be at least two of those
+        if num_floors < 2:
+            raise ValueError("Interfloor traffic needs at least 2 floors above the lobby, not {}".format(num_floors))
+        super().__init__(num_floors, start_t, duration, rng)
 
     def generate_path(self):
         start = self.random_nonzero_floor()
         end = self.random_nonzero_floor()
-        while end != start:
+        while end == start:
             end = self.random_nonzero_floor()
         return [TravelGoal(self.get_t(), start, end)]
 
+    def generate_floors(self, rng: np.random.Generator, n):
+        starts = self.random_nonzero_floors(rng, n)
+        ends = self.random_nonzero_floors(rng, n)
+        same = np.flatnonzero(starts == ends)
+        while len(same) > 0:
+            ends[same] = self.random_nonzero_floors(rng, len(same))
+            same = same[starts[same] == ends[same]]
+        return starts, ends
+
 
 class CompositeTravelBehavior(TravelBehavior):
 
-    def __init__(self, num_floors, behaviors: Dict[TravelBehaviorType, float]):
-        super().__init__(num_floors)
+    def __init__(self, num_floors, behaviors: Dict[TravelBehaviorType, float], rng: RandomStream = None):
+        super().__init__(num_floors, rng)
         assert .99999 < sum(behaviors.values()) < 1.00001  # make sure that its a proper distribution
         self.behaviors = behaviors
 
+    def seed(self, rng: RandomStream):
+        super().seed(rng)
+        for b, child in zip(self.behaviors, rng.spawn(len(self.behaviors))):
+            b.seed(child)
+
     def generate_path(self):
-        r = random.random()
+        r = self.rng.python.random()
         # This chooses each item with correct probability
         for b, p in self.behaviors.items():
             if r < p:
                 return b.generate_path()
             else:
                 r -= p
+
+    def generate_trip_table(self, num_people, rng: np.random.Generator = None) -> TripTable:
+        rng = rng if rng is not None else self.rng.numpy
+        behaviors = list(self.behaviors.keys())
+        probabilities = np.array([self.behaviors[b] for b in behaviors])
+        # Everyone picks a behavior; then each behavior generates trips for all the people that picked it.
+        counts = rng.multinomial(num_people, probabilities / probabilities.sum())
+        return TripTable.concatenate(b.generate_trip_table(int(c), rng) for b, c in zip(behaviors, counts) if c > 0)
@@ -0,0 +1,191 @@
+import struct
+from abc import ABC, abstractmethod
+from heapq import merge
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from elevate.TravelBehaviors import TravelBehavior
+from elevate.TravelGoal import TravelGoal
+from elevate.TripTable import TripTable
+
+
+class TripSource(ABC):
+    """
+    A trip source streams TravelGoals to the simulator in time order.
+
+    The simulator only holds on to the goals that have been handed out and are still waiting or riding, so a source
+    that generates its trips lazily keeps memory bounded no matter how long the simulated period is.
+    """
+    @abstractmethod
+    def __iter__(self) -> Iterator[TravelGoal]:
+        pass
+
+
+class TripTableSource(TripSource):
+    """
+    Streams the trips of a TripTable, creating TravelGoals a chunk at a time as they're needed.
+    """
+    chunk_size = 4096
+
+    def __init__(self, table: TripTable, time_offset=0, chunk_size=None):
+        self.table = table
+        self.time_offset = time_offset
+        self.chunk_size = chunk_size if chunk_size is not None else TripTableSource.chunk_size
+
+    def __iter__(self) -> Iterator[TravelGoal]:
+        table = self.table
+        for i in range(0, len(table), self.chunk_size):
+            chunk = slice(i, i + self.chunk_size)
+            times = (table.times[chunk] + self.time_offset).tolist()
+            for t, s, e in zip(times, table.start_floors[chunk].tolist(), table.end_floors[chunk].tolist()):
+                yield TravelGoal(t, s, e)
+
+    def __len__(self):
+        return len(self.table)
+
+
+class DailyTripSource(TripSource):
+    """
+    Generates the trips of num_people people one day at a time, so multi-day runs don't grow with the number of days.
+
+    Memory is bounded by one whole day's trip table (16 bytes a trip), not by a window around the current time: a
+    person's trips over a day depend on each other (lunch comes after they arrive, they leave after lunch), so a day is
+    drawn all at once. Only the TravelGoals are created as they're needed.
+
+    Every trip of a multi-day run has to fall within its day (0 to day_length seconds into it), or the days' trips
+    would interleave out of order; a day that doesn't raises a ValueError.
+    """
+    day_length = 24 * 60 * 60
+
+    def __init__(self, travel_behavior: TravelBehavior, num_people, num_days=1, rng: np.random.Generator = None):
+        self.travel_behavior = travel_behavior
+        self.num_people = num_people
+        self.num_days = num_days
+        self.rng = rng
+
+    def tables(self) -> Iterator[Tuple[TripTable, float]]:
+        """
+        :return: each day's trip table along with the time offset of that day
+        """
+        for day in range(self.num_days):
+            table = self.travel_behavior.generate_trip_table(self.num_people, self.rng)
+            if self.num_days > 1 and len(table) > 0 and \
+                    (table.times[0] < 0 or table.times[-1] >= DailyTripSource.day_length):
+                raise ValueError("Trips of a multi-day run have to fall within their day (0 to {}s), but day {}'s go "
+                                 "from {} to {}".format(DailyTripSource.day_length, day, table.times[0],
+                                                        table.times[-1]))
+            yield table, day * DailyTripSource.day_length
+
+    def __iter__(self) -> Iterator[TravelGoal]:
+        for table, offset in self.tables():
+            yield from TripTableSource(table, offset)
+
+    def __repr__(self):
+        return "DailyTripSource({} people x {} day(s))".format(self.num_people, self.num_days)
+
+
+class MergedTripSource(TripSource):
+    """
+    Lazily merges several trip sources (e.g. office workers and visitors) into one time ordered stream.
+    """
+    def __init__(self, *sources: TripSource):
+        self.sources = sources
+
+    def __iter__(self) -> Iterator[TravelGoal]:
+        return merge(*self.sources)
+
+
+class ReplayTripSource(TripSource):
+    """
+    Replays trips recorded to a file by record_trips.
+
+    The file is memory-mapped rather than read: nothing is parsed or re-sampled, the OS pages the trips in as the
+    simulation gets to them, and any number of runs (or worker processes) replaying the same file share one copy of it.
+    That makes it cheap to run many strategies against exactly the same day.
+    """
+    magic = b"ELEVTRP1"
+    header = struct.Struct("<8sQ")  # The magic, then the number of trips
+    record_dtype = np.dtype([("time", "<f8"), ("start_floor", "<i4"), ("end_floor", "<i4")])
+
+    def __init__(self, path, time_offset=0):
+        self.path = path
+        self.time_offset = time_offset
+
+    @property
+    def table(self) -> TripTable:
+        """
+        :return: the recorded trips, as a TripTable whose columns are read-only views of the memory-mapped file
+        """
+        with open(self.path, "rb") as f:
+            magic, n = ReplayTripSource.header.unpack(f.read(ReplayTripSource.header.size))
+        if magic != ReplayTripSource.magic:
+            raise ValueError("{} is not a trip recording".format(self.path))
+        if n == 0:  # Zero length files can't be mapped
+            return TripTable([], [], [], is_sorted=True)
+        records = np.memmap(self.path, dtype=ReplayTripSource.record_dtype, mode="r",
+                            offset=ReplayTripSource.header.size, shape=(n,))
+        return TripTable(records["time"], records["start_floor"], records["end_floor"], is_sorted=True)
+
+    def __iter__(self) -> Iterator[TravelGoal]:
+        return iter(TripTableSource(self.table, self.time_offset))
+
+    def __len__(self):
+        with open(self.path, "rb") as f:
+            return ReplayTripSource.header.unpack(f.read(ReplayTripSource.header.size))[1]
+
+    def __repr__(self):
+        return "ReplayTripSource({})".format(self.path)
+
+
+def _trip_chunks(trips, chunk_size) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    :return: the (times, start floors, end floors) of the trips, a chunk at a time
+    """
+    if isinstance(trips, TripTable):
+        for i in range(0, len(trips), chunk_size):
+            chunk = slice(i, i + chunk_size)
+            yield trips.times[chunk], trips.start_floors[chunk], trips.end_floors[chunk]
+    elif isinstance(trips, DailyTripSource):
+        for table, offset in trips.tables():
+            for times, start_floors, end_floors in _trip_chunks(table, chunk_size):
+                yield times + offset, start_floors, end_floors
+    else:
+        chunk = []
+        for goal in trips:
+            chunk.append((goal.time, goal.start_floor, goal.end_floor))
+            if len(chunk) == chunk_size:
+                yield tuple(np.array(c) for c in zip(*chunk))
+                chunk = []
+        if chunk:
+            yield tuple(np.array(c) for c in zip(*chunk))
+
+
+def record_trips(trips: Union[TripTable, Iterable[TravelGoal]], path, chunk_size=65536) -> ReplayTripSource:
+    """
+    Records trips to a compact binary file (16 bytes a trip) that ReplayTripSource can replay.
+
+    Trips are written a chunk at a time, so recording a long multi-day source doesn't need it all in memory. Trip tables
+    and DailyTripSources are written straight from their columns, without creating any TravelGoals.
+    :param trips: a TripTable, or any time ordered iterable of TravelGoals (e.g. a TripSource)
+    :param path: where to write the recording
+    :return: a source that replays the recording
+    """
+    n, last_time = 0, float("-inf")
+    with open(path, "wb") as f:
+        f.write(ReplayTripSource.header.pack(ReplayTripSource.magic, 0))
+        for times, start_floors, end_floors in _trip_chunks(trips, chunk_size):
+            if len(times) == 0:
+                continue
+            if times[0] < last_time or np.any(np.diff(times) < 0):
+                raise ValueError("Trips have to be recorded in time order")
+            records = np.empty(len(times), dtype=ReplayTripSource.record_dtype)
+            records["time"] = times
+            records["start_floor"] = start_floors
+            records["end_floor"] = end_floors
+            f.write(records.tobytes())
+            n += len(times)
+            last_time = times[-1]
+        f.seek(0)
+        f.write(ReplayTripSource.header.pack(ReplayTripSource.magic, n))
+    return ReplayTripSource(path)
@@ -0,0 +1,52 @@
+from typing import List, Iterable
+
+import numpy as np
+
+from elevate.TravelGoal import TravelGoal
+
+
+class TripTable:
+    """
+    A set of trips stored column-wise (time, start floor, end floor) and sorted by time.
+
+    This is what the batched TravelBehavior.generate_trip_table produces. It's much cheaper to build and to hold than
+    a heap of TravelGoal objects; goals are only created when they're asked for.
+    """
+    time_dtype = np.float64
+    floor_dtype = np.int32
+
+    def __init__(self, times, start_floors, end_floors, is_sorted=False):
+        self.times = np.asarray(times, dtype=TripTable.time_dtype)
+        self.start_floors = np.asarray(start_floors, dtype=TripTable.floor_dtype)
+        self.end_floors = np.asarray(end_floors, dtype=TripTable.floor_dtype)
+        assert len(self.times) == len(self.start_floors) == len(self.end_floors)
+        if not is_sorted:
+            order = np.argsort(self.times, kind="stable")
+            self.times = self.times[order]
+            self.start_floors = self.start_floors[order]
+            self.end_floors = self.end_floors[order]
+
+    @staticmethod
+    def concatenate(tables: Iterable['TripTable']) -> 'TripTable':
+        tables = list(tables)
+        return TripTable(
+            np.concatenate([t.times for t in tables]) if tables else [],
+            np.concatenate([t.start_floors for t in tables]) if tables else [],
+            np.concatenate([t.end_floors for t in tables]) if tables else [],
+        )
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, i) -> TravelGoal:
+        return TravelGoal(float(self.times[i]), int(self.start_floors[i]), int(self.end_floors[i]))
+
+    def to_travel_goals(self) -> List[TravelGoal]:
+        """
+        :return: a list of TravelGoals in time order (which is also a valid heap)
+        """
+        return [TravelGoal(t, s, e) for t, s, e in
+                zip(self.times.tolist(), self.start_floors.tolist(), self.end_floors.tolist())]
+
+    def __repr__(self):
+        return "TripTable({} trips)".format(len(self))
@@ -0,0 +1,291 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from functools import lru_cache
+from itertools import product
+from statistics import median
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.RandomStreams import RandomStream
+from elevate.Schedule import ElevatorSchedule
+from elevate.Simulator import ElevatorSimulator
+from elevate.Snapshot import SimulatorSnapshot
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.MOSAElevatorStrategy import MOSAElevatorStrategy
+from elevate.strategies.PriorBeliefElevatorStrategy import PriorBeliefElevatorStrategy
+from elevate.strategies.RandomElevatorStrategy import RandomElevatorStrategy
+from elevate.strategies.SOSAElevatorStrategy import SOSAElevatorStrategy
+
+
+class Benchmark:
+    """
+    One thing to time, at one size.
+
+    setup builds whatever the timed code works on and returns a function that runs it. It's called again before every
+    repeat, outside of the timing, so code that changes the state it's given (event_gen_and_apply, a whole run) always
+    starts from the same place. Code that doesn't change its state and is over in microseconds can be run number times
+    per repeat instead, to get above the noise; times are per run either way.
+    """
+    def __init__(self, name, params: Dict[str, object], setup: Callable[[], Callable[[], object]], repeats=5,
+                 number=1):
+        self.name = name
+        self.params = params
+        self.setup = setup
+        self.repeats = repeats
+        self.number = number
+
+    @property
+    def key(self):
+        return "{}[{}]".format(self.name, ",".join("{}={}".format(k, v) for k, v in self.params.items()))
+
+    def run(self) -> 'BenchmarkResult':
+        times = []
+        for _ in range(self.repeats):
+            timed = self.setup()
+            start = time.perf_counter()
+            for _ in range(self.number):
+                timed()
+            times.append((time.perf_counter() - start) / self.number)
+        return BenchmarkResult(self.key, self.params, times)
+
+    def __repr__(self):
+        return self.key
+
+
+class BenchmarkResult:
+    def __init__(self, key, params: Dict[str, object], times: List[float]):
+        self.key = key
+        self.params = params
+        self.times = times
+
+    @property
+    def best(self) -> float:
+        """
+        The fastest repeat, which is what comparisons use: noise (other processes, the GC, ...) only ever adds time.
+        """
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return median(self.times)
+
+    def to_dict(self) -> Dict:
+        return {"params": self.params, "times": self.times, "best": self.best, "median": self.median}
+
+    @staticmethod
+    def from_dict(key, d: Dict) -> 'BenchmarkResult':
+        return BenchmarkResult(key, d["params"], d["times"])
+
+    def __repr__(self):
+        return "{}: best {:.4g}s, median {:.4g}s of {}".format(self.key, self.best, self.median, len(self.times))
+
+
+class Comparison:
+    """
+    How a benchmark did against the baseline.
+    """
+    def __init__(self, key, baseline: float, current: float, tolerance):
+        self.key = key
+        self.baseline = baseline
+        self.current = current
+        self.ratio = current / baseline if baseline > 0 else float("inf")
+        self.is_regression = self.ratio > 1 + tolerance
+
+    def __repr__(self):
+        return "{}{}: {:.4g}s -> {:.4g}s ({:+.1%})".format("REGRESSION " if self.is_regression else "", self.key,
+                                                          self.baseline, self.current, self.ratio - 1)
+
+
+# Building sizes, as (floors, elevators)
+quick_buildings = [(10, 2), (40, 4)]
+full_buildings = [(10, 2), (50, 8), (200, 32)]
+quick_people = [100, 1000]
+full_people = [100, 1000, 10000, 100000]
+
+
+@lru_cache(maxsize=None)
+def _busy_snapshot(num_floors, num_elevators, seed=0) -> SimulatorSnapshot:
+    """
+    :return: a building in the middle of its morning rush (a default day of trips simulated up to 8am), with elevators
+     moving and carrying people and presses pending - something more like what a strategy really plans for than an
+     empty building
+    """
+    behavior = OfficeBuildingTravelBehavior(num_floors)
+    simulator = ElevatorSimulator(behavior, BoringElevatorStrategy(), num_elevators, seed=RandomStream(seed))
+    simulator.update_elevator_schedule(simulator.current_time)
+    for goal in simulator.construct_trip_source(None):
+        if goal.time > OfficeBuildingTravelBehavior.t_8am:
+            break
+        simulator.simulate(goal.time)
+        simulator.current_time = goal.time
+        if simulator.add_travel_goal(goal):
+            simulator.update_elevator_schedule(simulator.current_time)
+    simulator.simulate(OfficeBuildingTravelBehavior.t_8am)
+    simulator.current_time = OfficeBuildingTravelBehavior.t_8am
+    simulator.current_schedule.update_elevator_state(simulator.current_time)
+    return simulator.snapshot()
+
+
+# The strategies whose get_plan is timed: how to build one for a building (its elevators and the schedule they're on),
+# the most floors it's timed on (None for any) and how many times it plans per repeat. SOSA and MOSA roll out simulated
+# futures for every candidate, so they stay on buildings of up to 40 floors. MOSA would otherwise plan for exactly its
+# time budget however fast it got, so it's timed over a fixed number of annealing steps instead.
+strategy_factories = {
+    "Boring": (lambda elevators, schedule: BoringElevatorStrategy(RandomStream(0)), None, 20),
+    "Random": (lambda elevators, schedule: RandomElevatorStrategy(RandomStream(0)), None, 20),
+    "PriorBelief": (lambda elevators, schedule: PriorBeliefElevatorStrategy(
+        {e: list(schedule.elevator_to_floors.get(e, [])) for e in elevators}, RandomStream(0)), None, 20),
+    "SOSA": (lambda elevators, schedule: SOSAElevatorStrategy(RandomStream(0), num_simulations=2), 40, 1),
+    "MOSA": (lambda elevators, schedule: MOSAElevatorStrategy(RandomStream(0), time_budget=None,
+                                                              num_simulations=2, max_steps=8), 40, 1),
+}  # type: Dict[str, Tuple[Callable[[List, ElevatorSchedule], ElevatorStrategy], Optional[int], int]]
+
+
+def plan_benchmarks(buildings: Iterable[Tuple[int, int]], repeats=5) -> List[Benchmark]:
+    benchmarks = []
+    for num_floors, num_elevators in buildings:
+        def restored(num_floors=num_floors, num_elevators=num_elevators):
+            snapshot = _busy_snapshot(num_floors, num_elevators)
+            return snapshot.current_time, snapshot.restore()
+        params = {"floors": num_floors, "elevators": num_elevators}
+
+        for name, (factory, max_floors, number) in strategy_factories.items():
+            if max_floors is not None and num_floors > max_floors:
+                continue
+
+            def get_plan(factory=factory, restored=restored):
+                current_time, (elevators, presses, _, schedule) = restored()
+                strategy = factory(elevators, schedule)
+                return lambda: strategy.get_plan(elevators, list(presses), current_time)
+            benchmarks.append(Benchmark("get_plan." + name, params, get_plan, repeats, number))
+
+        def event_gen_and_apply(restored=restored):
+            current_time, (elevators, presses, _, _) = restored()
+            schedule = BoringElevatorStrategy(RandomStream(0)).get_plan(elevators, list(presses), current_time)
+            return schedule.event_gen_and_apply
+        benchmarks.append(Benchmark("event_gen_and_apply", params, event_gen_and_apply, repeats))
+
+        def find_stop_times(restored=restored):
+            current_time, (elevators, presses, _, _) = restored()
+            schedule = BoringElevatorStrategy(RandomStream(0)).get_plan(elevators, list(presses), current_time)
+            floors = schedule.elevator_to_floors
+
+            def timed():
+                for e in elevators:
+                    ElevatorSchedule.find_stop_times(e, floors[e], current_time)
+            return timed
+        benchmarks.append(Benchmark("find_stop_times", params, find_stop_times, repeats, 100))
+    return benchmarks
+
+
+def time_to_benchmarks(floor_counts: Iterable[int], repeats=5, num_trips=10000) -> List[Benchmark]:
+    benchmarks = []
+    for num_floors in floor_counts:
+        def time_to(num_floors=num_floors):
+            rng = np.random.default_rng(0)
+            starts = rng.integers(0, num_floors + 1, num_trips).tolist()
+            stops = rng.integers(0, num_floors + 1, num_trips).tolist()
+            velocities = rng.uniform(-8, 8, num_trips).tolist()
+
+            def timed():
+                for start, stop in zip(starts, stops):
+                    ElevatorPhysicsCalculator.time_to(start, stop)
+                for start, stop, v in zip(starts, stops, velocities):
+                    # Only stops ahead of a moving elevator are asked about
+                    if (stop > start) == (v > 0) and stop != start:
+                        ElevatorPhysicsCalculator.time_to(start, stop, v)
+            return timed
+        benchmarks.append(Benchmark("time_to.x{}".format(num_trips), {"floors": num_floors}, time_to, repeats))
+    return benchmarks
+
+
+def run_benchmarks(buildings: Iterable[Tuple[int, int]], people_counts: Iterable[int], repeats=3) -> List[Benchmark]:
+    benchmarks = []
+    for (num_floors, num_elevators), num_people in product(buildings, people_counts):
+        def run(num_floors=num_floors, num_elevators=num_elevators, num_people=num_people):
+            simulator = ElevatorSimulator(OfficeBuildingTravelBehavior(num_floors), BoringElevatorStrategy(),
+                                          num_elevators, seed=RandomStream(0))
+            return lambda: simulator.run(num_people)
+        # Big runs take long enough on their own that repeating them isn't worth it
+        benchmarks.append(Benchmark("Simulator.run.Boring", {"floors": num_floors, "elevators": num_elevators,
+                                                             "people": num_people},
+                                    run, repeats if num_people <= 10000 else 1))
+    return benchmarks
+
+
+def suite(name) -> List[Benchmark]:
+    """
+    :param name: "quick" (small buildings and runs, in well under a minute) or "full" (10-200 floors, 2-32 elevators
+     and 100-100k people)
+    """
+    if name == "quick":
+        return plan_benchmarks(quick_buildings, 3) + time_to_benchmarks([40], 3) + \
+            run_benchmarks(quick_buildings, quick_people, 1)
+    if name == "full":
+        return plan_benchmarks(full_buildings) + time_to_benchmarks(f for f, _ in full_buildings) + \
+            run_benchmarks(full_buildings, full_people)
+    raise ValueError("Unknown suite: {}".format(name))
+
+
+def environment() -> Dict[str, str]:
+    return {"python": sys.version.split()[0], "numpy": np.__version__, "platform": platform.platform(),
+            "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run_suite(benchmarks: Iterable[Benchmark], log: Callable[[str], None] = None) -> List[BenchmarkResult]:
+    results = []
+    for benchmark in benchmarks:
+        results.append(benchmark.run())
+        if log is not None:
+            log(repr(results[-1]))
+    return results
+
+
+def save_results(results: Iterable[BenchmarkResult], path):
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": {r.key: r.to_dict() for r in results}}, f, indent=1)
+
+
+def load_results(path) -> Dict[str, BenchmarkResult]:
+    with open(path) as f:
+        return {key: BenchmarkResult.from_dict(key, d) for key, d in json.load(f)["results"].items()}
+
+
+def compare(results: Iterable[BenchmarkResult], baseline: Dict[str, BenchmarkResult], tolerance=.25) \
+        -> List[Comparison]:
+    """
+    :param tolerance: how much slower than the baseline (as a fraction) a benchmark may get before it's a regression
+    :return: a comparison for each result that's also in the baseline
+    """
+    return [Comparison(r.key, baseline[r.key].best, r.best, tolerance) for r in results if r.key in baseline]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times the strategies and the simulator core, and compares the times "
+                                                 "against a baseline.")
+    parser.add_argument("--suite", default="quick", choices=["quick", "full"])
+    parser.add_argument("--filter", default=None, help="only run the benchmarks whose key contains this")
+    parser.add_argument("--out", default="benchmarks.json", help="where to record the results")
+    parser.add_argument("--baseline", default=None, help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=.25,
+                        help="how much slower than the baseline counts as a regression (.25 is 25%%)")
+    args = parser.parse_args()
+
+    selected = [b for b in suite(args.suite) if args.filter is None or args.filter in b.key]
+    results = run_suite(selected, print)
+    save_results(results, args.out)
+    print("Wrote {} results to {}".format(len(results), args.out))
+    if args.baseline is not None:
+        comparisons = compare(results, load_results(args.baseline), args.tolerance)
+        for c in comparisons:
+            print(c)
+        regressions = [c for c in comparisons if c.is_regression]
+        print("{} of {} benchmarks regressed".format(len(regressions), len(comparisons)))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+from elevate.benchmarks.Benchmarks import BenchmarkResult, compare, load_results, plan_benchmarks, run_benchmarks, \
+    run_suite, save_results
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_record_and_compare(self):
+        benchmarks = plan_benchmarks([(10, 2)], repeats=2) + run_benchmarks([(10, 2)], [20], repeats=1)
+        self.assertIn("get_plan.Boring[floors=10,elevators=2]", [b.key for b in benchmarks])
+        results = run_suite(benchmarks)
+        self.assertTrue(all(len(r.times) == b.repeats and r.best > 0 for r, b in zip(results, benchmarks)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_results(results, path)
+            baseline = load_results(path)
+        self.assertEqual(baseline[results[0].key].times, results[0].times)
+        self.assertFalse(any(c.is_regression for c in compare(results, baseline)))
+
+        slower = [BenchmarkResult(r.key, r.params, [t * 2 for t in r.times]) for r in results]
+        comparisons = compare(slower + [BenchmarkResult("not in the baseline", {}, [1.])], baseline, tolerance=.5)
+        self.assertEqual(len(comparisons), len(results))
+        self.assertTrue(all(c.is_regression for c in comparisons))
+
+
+if __name__ == '__main__':
+    unittest.main()
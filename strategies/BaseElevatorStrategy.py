@@ -1,16 +1,76 @@
+import time
 from abc import ABC, abstractmethod
 from typing import List, Dict
 
 from elevate.Elevator import Elevator
+from elevate.RandomStreams import RandomStream
 from elevate.Schedule import ElevatorSchedule
 
 
 class ElevatorStrategy(ABC):
 
+    def __init__(self, rng: RandomStream = None):
+        """
+        :param rng: the stream any randomness in the strategy is drawn from. Defaults to one seeded from the random
+         module.
+        """
+        self.rng = rng if rng is not None else RandomStream.from_global()
+
+    def seed(self, rng: RandomStream):
+        """
+        Makes this strategy draw from the given stream from now on.
+        """
+        self.rng = rng
+
+    def close(self):
+        """
+        Releases whatever the strategy holds on to across replans (SOSA's worker pool, ...). The simulator calls it when
+        a run ends. A closed strategy can still plan; it just starts over whatever it released.
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     @abstractmethod
     def get_plan(self, elevators, presses, current_time) -> ElevatorSchedule:
         pass
 
+    def get_plan_by(self, elevators, presses, current_time, deadline) -> ElevatorSchedule:
+        """
+        Anytime planning: like get_plan, but the plan is due by deadline. Strategies that search (SOSA, MOSA) keep a
+        valid best-so-far schedule and return it when time runs out, with deadline_hit set on it.
+
+        By default this just plans as usual, and only marks the schedule if planning took longer than it should have.
+        :param deadline: a time.perf_counter() value, or None for no deadline
+        """
+        schedule = self.get_plan(elevators, presses, current_time)
+        schedule.deadline_hit = ElevatorStrategy.out_of_time(deadline)
+        return schedule
+
+    @staticmethod
+    def out_of_time(deadline) -> bool:
+        return deadline is not None and time.perf_counter() >= deadline
+
+    def get_plan_update(self, elevators, presses, current_time, previous_schedule: ElevatorSchedule,
+                        deadline=None) -> ElevatorSchedule:
+        """
+        Like get_plan, but the schedule returned only lists the elevators whose plans changed since previous_schedule in
+        its changed_elevators - the simulator keeps the pending events of every other elevator.
+
+        By default this plans from scratch and then compares against the previous schedule. Strategies that can tell
+        what changed on their own should override it (and build their schedule with previous_schedule).
+        :param previous_schedule: the schedule currently being followed, or None if there isn't one yet.
+        :param deadline: as for get_plan_by
+        """
+        schedule = self.get_plan_by(elevators, presses, current_time, deadline)
+        if previous_schedule is not None:
+            schedule.keep_unchanged_from(previous_schedule)
+        return schedule
+
     def is_floor_in_dir(self, start_floor, end_floor, direction) -> bool:
         if direction == "UP":
             return start_floor < end_floor
@@ -33,9 +93,9 @@ class ElevatorStrategy(ABC):
                 else:
                     direction = None
             else:
-                for goal in e.passenger_goals:
-                    direction = goal.direction()
-                    break  # We only need the first one
+                if len(e.passenger_goals) > 0:
+                    # We only need one - take the earliest so that the answer doesn't depend on set ordering
+                    direction = min(e.passenger_goals, key=lambda g: g.time).direction()
             elevator_directions[e] = direction
         return elevator_directions
 
@@ -1,77 +1,90 @@
-from random import shuffle
-from typing import List, Dict, Tuple
+from typing import List, Dict
 
 from elevate.ButtonPush import ButtonPush
 from elevate.Elevator import Elevator
-from elevate.Events import ElevatorStop
 from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
 from elevate.Schedule import ElevatorSchedule
+from elevate.Tracing import tracer
 from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
+from elevate.strategies.Run import Run
 
 
 class BoringElevatorStrategy(ElevatorStrategy):
+    # With persist_runs, how much later (in seconds) than when it was given out a press may now be picked up before it's
+    # given out again
+    max_slip = 1e-6
+
+    def __init__(self, rng=None, persist_runs=False):
+        """
+        :param rng: as for ElevatorStrategy
+        :param persist_runs: whether to keep the runs between replans (see get_plan_update) rather than rebuild them
+         from scratch every time. Replans are cheaper, but the plans are not the same: a press stays where it was put
+         until later presses push it back (see get_plan_update), where planning from scratch reinserts every pending
+         press each time. With seed 3, the average wait came out 75.2s from scratch against 33.8s with persisted runs
+         for 3000 people in 100 floors with 16 elevators (at half the planning time), 27.2s against 26.1s for 300 in
+         40 floors with 4, but 18.3s against 19.5s for 200 in 10 floors with 2. It's off by default so that Boring's
+         results stay those of the plain strategy.
+        """
+        super().__init__(rng)
+        self.persist_runs = persist_runs
+        # What the last plan was built from, if persist_runs is set
+        self._last_schedule = None  # type: ElevatorSchedule
+        self._e_to_runs = {}  # type: Dict[Elevator, List[Run]]
+        self._elevator_stops = {}  # type: Dict[Elevator, List[int]]
+        self._press_to_elevator = {}  # type: Dict[ButtonPush, Elevator]
+        self._press_times = {}  # type: Dict[ButtonPush, float]  # When each was going to be picked up when given out
+        self._passengers = {}  # type: Dict[Elevator, frozenset]
 
     def schedule_from_runs(self,
                            already_planned_stops: Dict[Elevator, List[int]],
-                           e_to_runs: Dict[Elevator, List[Tuple[str, List[int], List[float]]]],
-                           current_time: float):
+                           e_to_runs: Dict[Elevator, List[Run]],
+                           current_time: float,
+                           previous_schedule: ElevatorSchedule = None):
         plan = {e: [] for e in e_to_runs.keys()}
         final_dirs = {}
         for e in e_to_runs.keys():
             for run in e_to_runs[e]:
-                for stop in run[1]:
+                for stop in run.stops:
                     if len(plan[e]) == 0 or plan[e][-1] != stop:
                         # Check to eliminate duplicates here
                         plan[e].append(stop)
             # We add a final direction that we're going if we think that we'll be picking someone up on a floor.
-            if len(e_to_runs[e]) > 0 and e_to_runs[e][-1][1][-1] not in already_planned_stops[e]:
-                final_dirs[e] = e_to_runs[e][-1][0]
+            if len(e_to_runs[e]) > 0 and e_to_runs[e][-1].last() not in already_planned_stops[e]:
+                final_dirs[e] = e_to_runs[e][-1].direction
 
             # All elevators that are not doing anything and are not located on floor 0 are instructed to return there
             # and wait fur further instruction.
             if len(e_to_runs[e]) == 0 and not e.is_stopped:
                 plan[e] = [0]
 
-        print("Final set of runs:")
-        for e in plan:
-            print("Elevator:" + str(e))
-            for run in e_to_runs[e]:
-                print("    {}".format(run))
-        print("Generated Plan")
-        for e in plan:
-            print(e, plan[e], final_dirs[e] if e in final_dirs else "")
-        return ElevatorSchedule(plan, final_dirs, current_time)
+        if tracer.is_debug:
+            tracer.debug(current_time, "Final set of runs:")
+            for e in plan:
+                tracer.debug(current_time, "Elevator:{}", e)
+                for run in e_to_runs[e]:
+                    tracer.debug(current_time, "    {}", run)
+            tracer.debug(current_time, "Generated Plan")
+            for e in plan:
+                tracer.debug(current_time, "{} {} {}", e, plan[e], final_dirs[e] if e in final_dirs else "")
+        return ElevatorSchedule(plan, final_dirs, current_time, previous_schedule)
 
-    def update_run_times(self, runs: List[Tuple[str, List[int], List[float]]]):
+    def update_run_times(self, runs: List[Run]):
         # We assume that the start time on the first run is accurate and work our way from there.
-        if len(runs) == 0 or len(runs[0][1]) == 0:
-            return
-
-        prev_time = runs[0][2][0]
-        prev_floor = runs[0][1][0]
-        for run in runs:
-            for i in range(len(run[1])):
-                # Find time from prev floor to this floor
-                new_floor = run[1][i]
-                delta_t = ElevatorPhysicsCalculator.time_to(prev_floor, new_floor)
-                new_t = prev_time + delta_t
-                run[2][i] = new_t
-                prev_time = new_t + ElevatorStop.duration
-                prev_floor = new_floor
-
-        print("Updated run times to: {}".format(runs) )
+        Run.update_times(runs)
+        if tracer.is_trace and len(runs) > 0:
+            tracer.trace(runs[-1].times[-1], "Updated run times to: {}", runs)
 
     def insert_button_push(self,
                            button_push: ButtonPush,
-                           e_to_runs: Dict[Elevator, List[Tuple[str, List[int], List[float]]]],
+                           e_to_runs: Dict[Elevator, List[Run]],
                            current_time: float):
         """
         This inserts a button push into a series of runs, either by adding it to a an existing run,
         or by adding a new run if necessary.
         :param current_time: The time at which we are updating the schedule
         :param button_push: the button push to add
-        :param e_to_runs: a map from
-        :return: None. This updates the runs in place.
+        :param e_to_runs: a map from the elevators that may take the push to their runs
+        :return: the elevator it was given to. This updates the runs in place.
         """
         best_time_so_far = 100000000000  # a very large number
         best_run_so_far = None
@@ -79,13 +92,13 @@ class BoringElevatorStrategy(ElevatorStrategy):
         insert_elevator = None
 
         elevators = list(e_to_runs.keys())
-        shuffle(elevators)  # Shuffle to distribute load more evenly.
+        self.rng.python.shuffle(elevators)  # Shuffle to distribute load more evenly.
         for e in elevators:
             # Can we append to the very beginning?
             if len(e_to_runs[e]) > 0 and \
-                    e_to_runs[e][0][0] == button_push.direction and \
-                    self.is_floor_in_dir(e.location, button_push.floor, e_to_runs[e][0][0]) and \
-                    self.is_floor_in_dir(button_push.floor, e_to_runs[e][0][1][0], e_to_runs[e][0][0]):
+                    e_to_runs[e][0].direction == button_push.direction and \
+                    self.is_floor_in_dir(e.location, button_push.floor, e_to_runs[e][0].direction) and \
+                    self.is_floor_in_dir(button_push.floor, e_to_runs[e][0].first(), e_to_runs[e][0].direction):
                 time = ElevatorPhysicsCalculator.time_to(e.location, button_push.floor, e.velocity)
                 time += current_time
                 if time < best_time_so_far:
@@ -99,33 +112,30 @@ class BoringElevatorStrategy(ElevatorStrategy):
             # Only if there is nothing on this elevator yet -or- the last run goes in a different direction.
             # if it goes in the same direction, it'll be handled lower by appending to the last run.
             # This should ensure that every thing always gets at least one.
-            prev_time = run_at_end[2][-1] if run_at_end is not None else current_time
-            prev_floor = run_at_end[1][-1] if run_at_end is not None else e.location
+            prev_time = run_at_end.times[-1] if run_at_end is not None else current_time
+            prev_floor = run_at_end.last() if run_at_end is not None else e.location
             time = prev_time + ElevatorPhysicsCalculator.time_to(prev_floor, button_push.floor)
-            new_run = (button_push.direction, [button_push.floor], [time])
             if time < best_time_so_far:
                 best_time_so_far = time
-                best_run_so_far = new_run
+                best_run_so_far = None  # A new run - only built once we know it's the one
                 insert_at_index = -1
                 insert_elevator = e
 
             # Lets see if we can add it to any of the existing runs:
             first_run = True
             for run in e_to_runs[e]:
-                (d, stops, times) = run
+                d, stops, times = run.direction, run.stops, run.times
                 # First, we look for way to insert it between stops.
                 if d is not None and d == button_push.direction and len(stops) > 1:
                     # Look for a way to squeeze it in.
-                    for i, start_floor, end_floor, start_time in \
-                            zip(range(0, len(stops) - 1), stops, stops[1:], times):
-                        if self.is_floor_in_dir(start_floor, button_push.floor, d) \
-                                and self.is_floor_in_dir(button_push.floor, end_floor, d):
-                            time = start_time + ElevatorPhysicsCalculator.time_to(start_floor, button_push.floor)
-                            if time < best_time_so_far:
-                                best_time_so_far = time
-                                best_run_so_far = run
-                                insert_at_index = i + 1
-                                insert_elevator = e
+                    for i in run.squeeze_in_indexes(button_push.floor):
+                        start_floor, start_time = stops[i], times[i]
+                        time = start_time + ElevatorPhysicsCalculator.time_to(start_floor, button_push.floor)
+                        if time < best_time_so_far:
+                            best_time_so_far = time
+                            best_run_so_far = run
+                            insert_at_index = i + 1
+                            insert_elevator = e
 
                 # Is there a way to add it to the beginning or end of a run?
                 if d is not None and d == button_push.direction and len(stops) > 0:
@@ -150,35 +160,139 @@ class BoringElevatorStrategy(ElevatorStrategy):
                 first_run = False
 
         if insert_at_index == -1:  # Add a run.
-            print("Adding run {}".format(best_run_so_far))
+            best_run_so_far = Run(button_push.direction, [button_push.floor], [best_time_so_far])
+            tracer.debug(current_time, "Adding run {}", best_run_so_far)
             e_to_runs[insert_elevator].append(best_run_so_far)
             # And update the timing on those runs.
         else:
             # Then we are adding to an existing run.
-            print("Adding {} to run {} at index {} (t = {})".format(
-                button_push, best_run_so_far, insert_at_index, best_time_so_far))
-            best_run_so_far[1].insert(insert_at_index, button_push.floor)
-            best_run_so_far[2].insert(insert_at_index, best_time_so_far)
+            tracer.debug(current_time, "Adding {} to run {} at index {} (t = {})",
+                         button_push, best_run_so_far, insert_at_index, best_time_so_far)
+            best_run_so_far.insert_stop(button_push.floor, insert_at_index, best_time_so_far)
 
         # Last step is to update times on the elevator that was modified.
         self.update_run_times(e_to_runs[insert_elevator])
+        return insert_elevator
 
-    def get_plan(self, elevators: List[Elevator], presses: List[ButtonPush], current_time) -> ElevatorSchedule:
-        # First, get their current directions
+    def _candidate_runs(self, button_push: ButtonPush,
+                        e_to_runs: Dict[Elevator, List[Run]]) \
+            -> Dict[Elevator, List[Run]]:
+        """
+        :return: the part of e_to_runs that button_push may be inserted into (all of it, here)
+        """
+        return e_to_runs
+
+    def _initial_runs(self, elevators: List[Elevator], current_time):
+        """
+        :return: the stops each elevator already has to make for its passengers, and the runs those stops make up
+        """
         elevator_directions = self._get_current_directions(elevators)
         elevator_stops = self._get_already_planned_stops(elevators)
-        # This gives us timing information for each of the elevators
-        schedule = ElevatorSchedule(elevator_stops, {}, current_time)
-        elevator_to_stop_times = schedule.elevator_to_time  # This is calculated at creation of a schedule
-        # We combine elevator stops, directions, and times to produce a variety of runs.
-        # These are stored as a map from elevators to an in-order list of runs.
         e_to_runs = {
-            e: [(elevator_directions[e], elevator_stops[e], elevator_to_stop_times[e])]
+            e: [Run(elevator_directions[e], elevator_stops[e],
+                    ElevatorSchedule.find_stop_times(e, elevator_stops[e], current_time))]
             if elevator_directions[e] is not None else [] for e in elevators
         }
+        return elevator_stops, e_to_runs
 
+    @staticmethod
+    def pickup_time(button_push: ButtonPush, runs: List[Run]):
+        """
+        :return: when the runs get to button_push's floor going its way, or None if they don't
+        """
+        for run in runs:
+            if run.direction == button_push.direction:
+                for stop, time in zip(run.stops, run.times):
+                    if stop == button_push.floor:
+                        return time
+        return None
+
+    def _remember(self, elevator_stops, e_to_runs, press_to_elevator, schedule: ElevatorSchedule, press_times=None):
+        """
+        :param press_times: when each press was going to be picked up when it was given out. Defaults to when the runs
+         get to it now.
+        """
+        if self.persist_runs:
+            self._last_schedule = schedule
+            self._elevator_stops = elevator_stops
+            self._e_to_runs = e_to_runs
+            self._press_to_elevator = press_to_elevator
+            self._press_times = press_times if press_times is not None else \
+                {press: self.pickup_time(press, e_to_runs[e]) for press, e in press_to_elevator.items()}
+            self._passengers = {e: frozenset(e.passenger_goals or ()) for e in e_to_runs}
+
+    def get_plan(self, elevators: List[Elevator], presses: List[ButtonPush], current_time) -> ElevatorSchedule:
+        # We combine elevator stops, directions, and times to produce a variety of runs.
+        # These are stored as a map from elevators to an in-order list of runs.
+        elevator_stops, e_to_runs = self._initial_runs(elevators, current_time)
+
+        press_to_elevator = {}
         for button_push in sorted(presses, key=lambda p: p.time):
-            self.insert_button_push(button_push, e_to_runs, current_time)
+            press_to_elevator[button_push] = self.insert_button_push(button_push, e_to_runs, current_time)
 
         # The final step is recombining all of the runs into a schedule.
-        return self.schedule_from_runs(elevator_stops, e_to_runs, current_time)
+        schedule = self.schedule_from_runs(elevator_stops, e_to_runs, current_time)
+        self._remember(elevator_stops, e_to_runs, press_to_elevator, schedule)
+        return schedule
+
+    def get_plan_update(self, elevators: List[Elevator], presses: List[ButtonPush], current_time,
+                        previous_schedule: ElevatorSchedule, deadline=None) -> ElevatorSchedule:
+        """
+        With persist_runs, the runs behind the previous plan are patched rather than rebuilt. An elevator is dirty if it
+        has reached a stop, its passengers changed, or a press it was given has been served (by it or anyone else) since
+        then. Only the dirty elevators' runs are rebuilt - from their passengers, plus the pending presses they were
+        given - and only the new presses are inserted across all elevators. Everything else is left as it was, so the
+        cost of a replan grows with how much changed rather than with the number of pending presses.
+
+        A press stays with the elevator it was given to only as long as that elevator will get to it no later than it
+        would have when it was given out (give or take max_slip). Presses that later ones have pushed back are taken off
+        their elevator, which is rebuilt, and inserted across all elevators again along with the new ones.
+
+        If previous_schedule isn't the plan this strategy made last, this falls back on planning from scratch.
+        """
+        if not self.persist_runs or previous_schedule is None or previous_schedule is not self._last_schedule \
+                or set(elevators) != set(self._e_to_runs):
+            return super().get_plan_update(elevators, presses, current_time, previous_schedule, deadline)
+
+        pending = set(presses)
+        dirty = {e for press, e in self._press_to_elevator.items() if press not in pending}
+        slipped = set()
+        for press, e in self._press_to_elevator.items():
+            if press in pending:
+                pickup_time = self.pickup_time(press, self._e_to_runs[e])
+                if pickup_time is None or pickup_time > self._press_times[press] + self.max_slip:
+                    slipped.add(press)
+                    dirty.add(e)
+        for e in elevators:
+            remaining_floors, _ = previous_schedule.remaining_stops(e, current_time)
+            if len(remaining_floors) != len(previous_schedule.elevator_to_floors.get(e, [])) or \
+                    frozenset(e.passenger_goals or ()) != self._passengers[e]:
+                dirty.add(e)
+
+        e_to_runs = self._e_to_runs
+        elevator_stops = self._elevator_stops
+        dirty_stops, dirty_runs = self._initial_runs([e for e in elevators if e in dirty], current_time)
+        elevator_stops.update(dirty_stops)
+        e_to_runs.update(dirty_runs)
+
+        press_to_elevator = {press: e for press, e in self._press_to_elevator.items()
+                             if press in pending and press not in slipped}
+        press_times = {press: self._press_times[press] for press in press_to_elevator}
+        # The presses a dirty elevator was given stay with it
+        for button_push in sorted((press for press, e in press_to_elevator.items() if e in dirty),
+                                  key=lambda p: p.time):
+            e = press_to_elevator[button_push]
+            self.insert_button_push(button_push, {e: e_to_runs[e]}, current_time)
+        # And new (and slipped) ones go wherever they fit best
+        for button_push in sorted((press for press in pending if press not in press_to_elevator),
+                                  key=lambda p: p.time):
+            e = self.insert_button_push(button_push, self._candidate_runs(button_push, e_to_runs), current_time)
+            press_to_elevator[button_push] = e
+            press_times[button_push] = self.pickup_time(button_push, e_to_runs[e])
+        tracer.debug(current_time, "Rebuilt the runs of {} of {} elevators ({} presses slipped)", len(dirty),
+                     len(elevators), len(slipped))
+
+        schedule = self.schedule_from_runs(elevator_stops, e_to_runs, current_time, previous_schedule)
+        schedule.deadline_hit = ElevatorStrategy.out_of_time(deadline)
+        self._remember(elevator_stops, e_to_runs, press_to_elevator, schedule, press_times)
+        return schedule
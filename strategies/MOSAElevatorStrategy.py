@@ -1,6 +1,115 @@
+import math
+import time
+from typing import List, Sequence
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.RandomStreams import RandomStream
+from elevate.Schedule import ElevatorSchedule
+from elevate.Snapshot import SimulatorSnapshot
+from elevate.Tracing import tracer
 from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.ParetoArchive import ParetoArchive
+from elevate.strategies.SOSAElevatorStrategy import SOSAElevatorStrategy
+
+
+class MOSAElevatorStrategy(SOSAElevatorStrategy):
+    """
+    Multi-objective simulated annealing. Plans are perturbed and rolled out the same way as in SOSA, but scored on
+    average wait, max wait and distance travelled (what RunStats measures) rather than average wait alone.
+
+    Every plan that is rolled out is offered to a bounded Pareto archive. A perturbation that the current plan doesn't
+    dominate is always taken; one it does dominate is taken with a probability that falls with how much worse it is
+    (in objectives normalized by the archive's range) and with the temperature. At the end, the archive member with the
+    smallest weighted sum of normalized objectives is the plan.
+
+    Planning stops after time_budget seconds, so a replan takes a bounded amount of time no matter how many presses are
+    pending, or after max_steps steps of the cooling schedule, so it does a fixed amount of work. The search starts
+    from the Boring strategy's plan.
+    """
+    objective_names = ["avg_wait", "max_wait", "total_dist"]
+
+    def __init__(self, rng: RandomStream = None, time_budget=1.0, archive_size=20, weights: Sequence[float] = None,
+                 max_workers=1, num_simulations=10, num_floors=None, max_steps=None):
+        """
+        :param rng: as for ElevatorStrategy
+        :param time_budget: the number of (wall clock) seconds a replan may take. If it's spent before the plan the
+         search starts from has been rolled out, that plan is returned as is. A step can overrun it by one batch of
+         rollouts. None for no limit, in which case max_steps must be given.
+        :param archive_size: the most non-dominated plans to keep
+        :param weights: how much each of avg wait, max wait and distance matter when picking from the archive
+        :param max_workers: as for SOSAElevatorStrategy
+        :param num_simulations: as for SOSAElevatorStrategy
+        :param num_floors: as for SOSAElevatorStrategy
+        :param max_steps: the most steps of the cooling schedule a replan may take, or None for no limit. Each step
+         rolls out more candidates than the last, so this fixes the work done whatever the machine's speed.
+        """
+        if time_budget is None and max_steps is None:
+            raise ValueError("MOSA needs a time budget or a number of steps to stop after")
+        super().__init__(rng, max_workers, num_simulations, prescreen_fraction=None, num_floors=num_floors)
+        self.time_budget = time_budget
+        self.archive_size = archive_size
+        self.weights = weights
+        self.max_steps = max_steps
+
+    def p_accept_dominated(self, archive: ParetoArchive, old_objectives, new_objectives, t) -> float:
+        # The average amount (in normalized objectives) by which the new plan is worse
+        loss = sum(archive.normalized(new_objectives) - archive.normalized(old_objectives)) / len(old_objectives)
+        return math.e ** (-max(loss, 0) / t)
+
+    def get_plan(self, elevators: List[Elevator], presses: List[ButtonPush], current_time) -> ElevatorSchedule:
+        return self.get_plan_by(elevators, presses, current_time, None)
+
+    def get_plan_by(self, elevators: List[Elevator], presses: List[ButtonPush], current_time, deadline) \
+            -> ElevatorSchedule:
+        """
+        Anneals until the time budget is spent or max_steps steps are taken, or until deadline if that comes first (in
+        which case the schedule is marked deadline_hit). Like SOSA, the search starts from, and falls back on, the Boring strategy's plan.
+        """
+        budget_end = math.inf if self.time_budget is None else time.perf_counter() + self.time_budget
+        stop_at = budget_end if deadline is None else min(budget_end, deadline)
+        rng = self.rng.python
+        seed_schedule = BoringElevatorStrategy(self.rng).get_plan(elevators, presses, current_time)
+        seed_plan = old_plan = self.from_schedule(seed_schedule, elevators, presses)
+        if not any(direction is not None for e in old_plan for _, direction in old_plan[e]):
+            return seed_schedule  # Nothing to move around
+        if time.perf_counter() >= stop_at:
+            # Out of time before the plan we start from could even be rolled out
+            seed_schedule.deadline_hit = ElevatorStrategy.out_of_time(deadline)
+            return seed_schedule
+
+        snapshot = SimulatorSnapshot.capture(elevators, presses, current_time, num_floors=self.num_floors)
+        old_objectives = self.evaluate_objectives(snapshot, [old_plan], rng)[0]
+        archive = ParetoArchive(len(MOSAElevatorStrategy.objective_names), self.archive_size)
+        archive.add(old_objectives, old_plan)
+
+        # The cooling schedule, in units of normalized objectives
+        t = 1
+        alpha = .9
+        num_trial_perturbations = 2
+        beta = 1.2
 
+        num_steps = 0
+        while time.perf_counter() < stop_at and (self.max_steps is None or num_steps < self.max_steps):
+            # Candidates are rolled out a pool's worth at a time, so that a long step can't overrun the budget by much.
+            for _ in range(0, num_trial_perturbations, self.max_workers):
+                if time.perf_counter() >= stop_at:
+                    break
+                new_plans = [SOSAElevatorStrategy.perturb(old_plan, rng) for _ in range(self.max_workers)]
+                for new_plan, new_objectives in zip(new_plans, self.evaluate_objectives(snapshot, new_plans, rng)):
+                    archive.add(new_objectives, new_plan)
+                    if not ParetoArchive.dominates(old_objectives, new_objectives) or \
+                            rng.random() < self.p_accept_dominated(archive, old_objectives, new_objectives, t):
+                        old_plan = new_plan
+                        old_objectives = new_objectives
+            t *= alpha
+            num_trial_perturbations = int(num_trial_perturbations * beta + .99999999)  # Round up
+            num_steps += 1
 
-class MOSAElevatorStrategy(ElevatorStrategy):
-    def get_plan(self, elevators, presses, current_time):
-        pass
\ No newline at end of file
+        tracer.debug(current_time, "MOSA: {} steps, {} plans in the archive", num_steps, len(archive))
+        best_plan = archive.best(self.weights)
+        schedule = seed_schedule if best_plan is seed_plan else \
+            SOSAElevatorStrategy.to_schedule(best_plan, current_time)
+        schedule.deadline_hit = deadline is not None and deadline < budget_end and ElevatorStrategy.out_of_time(deadline)
+        return schedule
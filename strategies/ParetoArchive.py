@@ -0,0 +1,88 @@
+from typing import Any, List, Sequence
+
+import numpy as np
+
+
+class ParetoArchive:
+    """
+    A bounded set of mutually non-dominated solutions, for multi-objective search. Every objective is minimized.
+
+    The objectives of the members are kept in one numpy array, so checking a candidate against the whole archive is a
+    couple of vectorized comparisons rather than a Python loop. When the archive grows past its capacity, the member in
+    the most crowded part of the front (the smallest crowding distance) is dropped, which keeps the front spread out.
+    """
+    def __init__(self, num_objectives, capacity=20):
+        self.capacity = capacity
+        self.objectives = np.empty((0, num_objectives), dtype=np.float64)
+        self.items = []  # type: List[Any]
+
+    @staticmethod
+    def dominates(a: Sequence[float], b: Sequence[float]) -> bool:
+        """
+        :return: whether a is at least as good as b in every objective and strictly better in one
+        """
+        return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+    def is_dominated(self, objectives: Sequence[float]) -> bool:
+        """
+        :return: whether any member of the archive dominates (or equals) these objectives
+        """
+        x = np.asarray(objectives, dtype=np.float64)
+        return bool(np.any(np.all(self.objectives <= x, axis=1)))
+
+    def add(self, objectives: Sequence[float], item) -> bool:
+        """
+        Adds a solution, unless something in the archive already dominates it. Members it dominates are removed.
+        :return: whether it was added
+        """
+        x = np.asarray(objectives, dtype=np.float64)
+        if self.is_dominated(x):
+            return False
+        keep = ~(np.all(x <= self.objectives, axis=1) & np.any(x < self.objectives, axis=1))
+        self.objectives = np.vstack([self.objectives[keep], x])
+        self.items = [item for item, k in zip(self.items, keep) if k] + [item]
+        while len(self.items) > self.capacity:
+            self._remove(int(np.argmin(self.crowding_distances())))
+        return True
+
+    def _remove(self, i):
+        self.objectives = np.delete(self.objectives, i, axis=0)
+        del self.items[i]
+
+    def crowding_distances(self) -> np.ndarray:
+        """
+        :return: for each member, the sum over objectives of the normalized gap between its neighbours on either side.
+         The members at the ends of the front in any objective get an infinite distance, so they're never pruned.
+        """
+        n, m = self.objectives.shape
+        distances = np.zeros(n)
+        if n <= 2:
+            return np.full(n, np.inf)
+        for j in range(m):
+            order = np.argsort(self.objectives[:, j], kind="stable")
+            values = self.objectives[order, j]
+            spread = values[-1] - values[0]
+            distances[order[0]] = distances[order[-1]] = np.inf
+            if spread > 0:
+                distances[order[1:-1]] += (values[2:] - values[:-2]) / spread
+        return distances
+
+    def normalized(self, objectives: Sequence[float]) -> np.ndarray:
+        """
+        :return: objectives scaled by the range the archive covers in each (so they can be compared with each other)
+        """
+        low = self.objectives.min(axis=0)
+        spread = self.objectives.max(axis=0) - low
+        return (np.asarray(objectives, dtype=np.float64) - low) / np.where(spread > 0, spread, 1)
+
+    def best(self, weights: Sequence[float] = None):
+        """
+        :param weights: how much each (normalized) objective matters. Defaults to all the same.
+        :return: the member with the smallest weighted sum of normalized objectives
+        """
+        assert len(self.items) > 0
+        weights = np.ones(self.objectives.shape[1]) if weights is None else np.asarray(weights, dtype=np.float64)
+        return self.items[int(np.argmin(self.normalized(self.objectives) @ weights))]
+
+    def __len__(self):
+        return len(self.items)
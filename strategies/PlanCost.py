@@ -0,0 +1,198 @@
+from bisect import insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.Events import ElevatorStop
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.Schedule import ElevatorSchedule
+
+# A stop of a plan: its floor, and the direction of the press it picks up there (None if it's only letting people off)
+Stop = Tuple[int, Optional[str]]
+
+
+class SurrogatePlanCost:
+    """
+    A cheap, analytic estimate of the average wait a plan gives the people behind the pending button presses.
+
+    Instead of simulating, it works out when each elevator reaches each of its stops (ElevatorSchedule.find_stop_times)
+    and matches the reassignable stops to the presses they can pick up, earliest stop to earliest press: those on the
+    same floor, for the direction the elevator leaves the stop in. The wait of a press is then the arrival time of its
+    stop minus the time of the press. It ignores the traffic that will
+    show up later, which is exactly what the full rollouts are for - this is only good for ranking candidates.
+    """
+    def __init__(self, elevators: Iterable[Elevator], presses: Iterable[ButtonPush], current_time,
+                 missed_press_penalty=600):
+        """
+        :param elevators: the elevators the plans are for
+        :param presses: the pending button presses
+        :param current_time: the time the plans start at
+        :param missed_press_penalty: the wait charged for a press that no stop of the plan serves
+        """
+        self.elevators = list(elevators)
+        self.current_time = current_time
+        self.missed_press_penalty = missed_press_penalty
+        # The presses are matched by call: the (floor, direction) they were made on
+        self.press_times_by_call = {}  # type: Dict[Tuple[int, str], List[float]]
+        for press in presses:
+            press_time = press.time if press.time is not None else current_time
+            self.press_times_by_call.setdefault((press.floor, press.direction), []).append(press_time)
+        for times in self.press_times_by_call.values():
+            times.sort()
+        self.num_presses = sum(len(times) for times in self.press_times_by_call.values())
+
+    def stop_times(self, elevator: Elevator, stops: List[Stop]) -> List[float]:
+        """
+        :return: when the elevator gets to each of the (floor, direction) stops
+        """
+        return ElevatorSchedule.find_stop_times(elevator, [floor for floor, _ in stops], self.current_time)
+
+    def call(self, stops: List[Stop], i) -> Tuple[int, str]:
+        """
+        :return: the (floor, direction) of the press that stop i can pick up: the direction it heads to the next stop
+         in. From the last stop that's the direction of the press the stop is for, which is the final direction SOSA
+         gives the elevator.
+        """
+        floor = stops[i][0]
+        if i + 1 < len(stops) and stops[i + 1][0] != floor:
+            return floor, "UP" if stops[i + 1][0] > floor else "DOWN"
+        return stops[i]
+
+    def calls(self, stops: List[Stop], times: List[float], start=0) \
+            -> Iterable[Tuple[Tuple[int, str], float]]:
+        """
+        :return: the call and arrival time of each reassignable stop from index start onward
+        """
+        for i in range(start, len(stops)):
+            if stops[i][1] is not None:
+                yield self.call(stops, i), times[i]
+
+    def arrivals_by_call(self, plan: Dict[Elevator, List[Stop]],
+                         e_to_times: Dict[Elevator, List[float]]) -> Dict[Tuple[int, str], List[float]]:
+        arrivals = {}
+        for e in plan:
+            for call, time in self.calls(plan[e], e_to_times[e]):
+                arrivals.setdefault(call, []).append(time)
+        return arrivals
+
+    def call_wait(self, call, sorted_arrivals: List[float]) -> float:
+        """
+        :return: the total wait of the presses of a call, given when the plan's stops that can pick them up get there
+        """
+        total = 0
+        for i, press_time in enumerate(self.press_times_by_call[call]):
+            if i < len(sorted_arrivals):
+                total += max(sorted_arrivals[i] - press_time, 0)
+            else:
+                total += self.missed_press_penalty
+        return total
+
+    def total_wait(self, arrivals: Dict[Tuple[int, str], List[float]]) -> float:
+        return sum(self.call_wait(call, sorted(arrivals.get(call, ()))) for call in self.press_times_by_call)
+
+    def __call__(self, plan: Dict[Elevator, List[Stop]]) -> float:
+        """
+        :param plan: elevators to their (floor, direction) stops, as SOSA builds them
+        :return: the estimated average wait of the pending presses
+        """
+        if self.num_presses == 0:
+            return 0
+        e_to_times = {e: self.stop_times(e, plan[e]) for e in plan}
+        return self.total_wait(self.arrivals_by_call(plan, e_to_times)) / self.num_presses
+
+
+class PlanCostProposal:
+    """
+    The surrogate cost of a candidate plan, along with everything an IncrementalPlanCost needs to make it the current
+    plan: the new stop times of the elevators it changed and the new arrivals and waits of the calls those touched.
+    """
+    def __init__(self, plan, e_to_times, call_to_arrivals, call_to_wait, total_wait, cost):
+        self.plan = plan
+        self.e_to_times = e_to_times
+        self.call_to_arrivals = call_to_arrivals
+        self.call_to_wait = call_to_wait
+        self.total_wait = total_wait
+        self.cost = cost
+
+
+class IncrementalPlanCost(SurrogatePlanCost):
+    """
+    The surrogate cost, kept up to date as a plan is perturbed one stop at a time.
+
+    It caches the stop times of every elevator of the current plan, and the arrivals and wait of every call with a
+    press. Scoring a candidate only recomputes the elevators it changed, from the first changed stop onward (the stop
+    times before that are the same, though the stop just before it can now head the other way), and the waits of the
+    calls whose arrivals moved. Everything else is reused.
+    """
+    def reset(self, plan: Dict[Elevator, List[Stop]]) -> float:
+        """
+        Makes plan the current plan, scoring it from scratch.
+        :return: its cost
+        """
+        self.plan = plan
+        self.e_to_times = {e: self.stop_times(e, plan[e]) for e in plan}
+        arrivals = self.arrivals_by_call(plan, self.e_to_times)
+        self.call_to_arrivals = {call: sorted(arrivals.get(call, ())) for call in self.press_times_by_call}
+        self.call_to_wait = {call: self.call_wait(call, self.call_to_arrivals[call])
+                             for call in self.press_times_by_call}
+        self.total = sum(self.call_to_wait.values())
+        return self.cost()
+
+    def cost(self) -> float:
+        return self.total / self.num_presses if self.num_presses > 0 else 0
+
+    def stop_times_from(self, elevator: Elevator, stops: List[Stop], first_changed) -> List[float]:
+        """
+        find_stop_times for a plan that only differs from the current one from index first_changed onward. The times
+        before that are reused and the walk picks up from the stop before it, exactly as find_stop_times would.
+        """
+        if first_changed == 0:
+            return self.stop_times(elevator, stops)
+        times = self.e_to_times[elevator][:first_changed]
+        current_time_acc = times[-1] + ElevatorStop.duration
+        current_floor = stops[first_changed - 1][0]
+        for next_floor, _ in stops[first_changed:]:
+            delta_t = ElevatorPhysicsCalculator.time_to(next_floor, current_floor)
+            times.append(current_time_acc + delta_t)
+            current_time_acc = current_time_acc + delta_t + ElevatorStop.duration
+            current_floor = next_floor
+        return times
+
+    def propose(self, plan: Dict[Elevator, List[Stop]], changes: Dict[Elevator, int]) -> PlanCostProposal:
+        """
+        Scores a candidate without making it the current plan.
+        :param plan: the candidate
+        :param changes: the elevators whose stops differ from the current plan, mapped to the first index that differs
+        :return: the proposal, whose cost is that of the candidate
+        """
+        e_to_times = {}
+        call_to_arrivals = {}
+        for e, first_changed in changes.items():
+            old_stops, old_times = self.plan[e], self.e_to_times[e]
+            e_to_times[e] = new_times = self.stop_times_from(e, plan[e], first_changed)
+            start = max(first_changed - 1, 0)  # The stop before the change may now be left the other way
+            for call, time in self.calls(old_stops, old_times, start):
+                if call in self.press_times_by_call:
+                    if call not in call_to_arrivals:
+                        call_to_arrivals[call] = list(self.call_to_arrivals[call])
+                    call_to_arrivals[call].remove(time)
+            for call, time in self.calls(plan[e], new_times, start):
+                if call in self.press_times_by_call:
+                    if call not in call_to_arrivals:
+                        call_to_arrivals[call] = list(self.call_to_arrivals[call])
+                    insort(call_to_arrivals[call], time)
+
+        call_to_wait = {call: self.call_wait(call, arrivals) for call, arrivals in call_to_arrivals.items()}
+        total = self.total + sum(call_to_wait[call] - self.call_to_wait[call] for call in call_to_wait)
+        return PlanCostProposal(plan, e_to_times, call_to_arrivals, call_to_wait, total,
+                                total / self.num_presses if self.num_presses > 0 else 0)
+
+    def accept(self, proposal: PlanCostProposal):
+        """
+        Makes the proposal's plan the current plan. The proposal must have been made against the current plan.
+        """
+        self.plan = proposal.plan
+        self.e_to_times.update(proposal.e_to_times)
+        self.call_to_arrivals.update(proposal.call_to_arrivals)
+        self.call_to_wait.update(proposal.call_to_wait)
+        self.total = proposal.total_wait
@@ -3,8 +3,10 @@ from typing import Dict, List, Tuple
 from elevate.ButtonPush import ButtonPush
 from elevate.Elevator import Elevator
 from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.RandomStreams import RandomStream
 from elevate.Schedule import ElevatorSchedule
 from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.Run import Run
 
 
 class PriorBeliefElevatorStrategy(BoringElevatorStrategy):
@@ -14,12 +16,38 @@ class PriorBeliefElevatorStrategy(BoringElevatorStrategy):
 
     This is used when simulating how well a strategy proposed by SA will work under unexpected conditions.
     """
-    def __init__(self, prior_elevators_to_stops: Dict[Elevator, List[int]]):
+    def __init__(self, prior_elevators_to_stops: Dict[Elevator, List[int]], rng: RandomStream = None):
+        super().__init__(rng)
         self.prior_elevators_to_stops = prior_elevators_to_stops
 
+    def _candidate_runs(self, button_push: ButtonPush,
+                        e_to_runs: Dict[Elevator, List[Run]]) \
+            -> Dict[Elevator, List[Run]]:
+        """
+        :return: the runs of the elevators believed to serve button_push's floor, or all of them if there are none
+        """
+        believers = {e: runs for e, runs in e_to_runs.items()
+                     if button_push.floor in self.prior_elevators_to_stops.get(e, ())}
+        return believers if len(believers) > 0 else e_to_runs
 
     def get_plan(self, elevators: List[Elevator], presses: List[ButtonPush], current_time) -> ElevatorSchedule:
-        # First, we construct the runs established from our prior belief.
-
-        return super().get_plan(elevators, presses, current_time)
-
+        elevator_stops, e_to_runs = self._initial_runs(elevators, current_time)
+
+        # First, we construct the runs established from our prior belief: presses on a floor that an elevator is
+        # believed to serve are given to that elevator (and only that elevator).
+        press_to_elevator = {}
+        remaining = []
+        for button_push in sorted(presses, key=lambda p: p.time):
+            candidates = self._candidate_runs(button_push, e_to_runs)
+            if candidates is not e_to_runs:
+                press_to_elevator[button_push] = self.insert_button_push(button_push, candidates, current_time)
+            else:
+                remaining.append(button_push)
+
+        # Everything else is handled as usual.
+        for button_push in remaining:
+            press_to_elevator[button_push] = self.insert_button_push(button_push, e_to_runs, current_time)
+
+        schedule = self.schedule_from_runs(elevator_stops, e_to_runs, current_time)
+        self._remember(elevator_stops, e_to_runs, press_to_elevator, schedule)
+        return schedule
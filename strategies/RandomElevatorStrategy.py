@@ -1,14 +1,15 @@
-from random import choice
 from typing import List
 
 from elevate.ButtonPush import ButtonPush
 from elevate.Elevator import Elevator
 from elevate.Schedule import ElevatorSchedule
+from elevate.Tracing import tracer
 from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
 
 
 class RandomElevatorStrategy(ElevatorStrategy):
     def assign_stops_randomly(self, elevators_to_stops, presses):
+        choice = self.rng.python.choice
         directions = {}
         for press in presses:
             e = choice(list(elevators_to_stops.keys()))
@@ -37,7 +38,8 @@ class RandomElevatorStrategy(ElevatorStrategy):
                         remove.append(i)
                 for r in reversed(remove):
                     del plan[e][r]
-        print("Generated Plan")
-        for e in plan:
-            print(e, plan[e], final_dirs[e] if e in final_dirs else "")
+        if tracer.is_debug:
+            tracer.debug(current_time, "Generated Plan")
+            for e in plan:
+                tracer.debug(current_time, "{} {} {}", e, plan[e], final_dirs[e] if e in final_dirs else "")
         return ElevatorSchedule(plan, final_dirs, current_time)
\ No newline at end of file
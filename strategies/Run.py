@@ -1,41 +1,150 @@
-from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List
+
+import numpy as np
+
+from elevate.Events import ElevatorStop
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator, TravelTimeTable
 
 
 class Run(object):
-    def __init__(self, direction: str, first_stop: int):
+    """
+    The stops an elevator makes while travelling in one direction, and the time it gets to each of them.
+
+    Stops and times are kept in typed arrays (C ints and doubles) rather than lists. Appending is amortized O(1),
+    inserting shifts the tail with a single memmove, single elements come back as plain Python numbers, and the arrays
+    can be viewed by numpy without copying - which is how update_times recomputes every time of an elevator's runs in
+    one vectorized pass.
+    """
+    __slots__ = ["direction", "stops", "times", "_monotone"]
+    # Below this many stops, update_times looks the legs up one at a time - it's quicker than setting up the arrays.
+    vectorize_from = 32
+
+    def __init__(self, direction: str, stops: Iterable[int] = (), times: Iterable[float] = None):
+        """
+        :param direction: the direction of the run ("UP" or "DOWN")
+        :param stops: the floors to stop on, in order
+        :param times: the time at which each stop is reached. Defaults to all 0 (see update_times).
+        """
         self.direction = direction
-        self.stops = [first_stop]
-        self.times = [0]
+        self.stops = array("i", stops)
+        self.times = array("d", times) if times is not None else array("d", bytes(8 * len(self.stops)))
+        assert len(self.stops) == len(self.times)
+        self._monotone = None  # Whether stops are strictly in order in direction. Worked out when first needed.
 
-    def __sizeof__(self) -> int:
+    def __len__(self) -> int:
         return len(self.stops)
 
     def __getitem__(self, item):
         return self.stops[item]
 
-    def add_stop(self, stop):
-        assert self.direction == ElevatorPhysicsCalculator.direction(self.stops[-1], stop)
+    def __repr__(self):
+        return "Run({}, {}, {})".format(self.direction, self.stops.tolist(), self.times.tolist())
+
+    def first(self):
+        assert len(self.stops) > 0
+        return self.stops[0]
+
+    def last(self):
+        assert len(self.stops) > 0
+        return self.stops[-1]
+
+    def _in_order(self, start_floor, end_floor) -> bool:
+        return start_floor < end_floor if self.direction == "UP" else end_floor < start_floor
+
+    def add_stop(self, stop, time=0.):
+        if len(self.stops) > 0:
+            assert self.direction == ElevatorPhysicsCalculator.direction(self.stops[-1], stop)
+            if self._monotone:
+                self._monotone = self._in_order(self.stops[-1], stop)
         self.stops.append(stop)
-        self.times.append(0)
+        self.times.append(time)
 
-    def insert_stop(self, stop, i):
+    def insert_stop(self, stop, i, time=0.):
         assert 0 <= i <= len(self.stops)
         if i > 0:
             assert self.direction == ElevatorPhysicsCalculator.direction(self.stops[i-1], stop)
         if i < len(self.stops):
             assert self.direction == ElevatorPhysicsCalculator.direction(stop, self.stops[i])
-        self.stops.insert(stop, i)
-        self.times.append(0)
+        if self._monotone:
+            self._monotone = (i == 0 or self._in_order(self.stops[i - 1], stop)) and \
+                             (i == len(self.stops) or self._in_order(stop, self.stops[i]))
+        self.stops.insert(i, stop)
+        self.times.insert(i, time)
 
-    def last(self):
-        assert len(self.stops) > 0
-        return self[-1]
+    @property
+    def is_monotone(self) -> bool:
+        """
+        Whether the stops are strictly in order in the run's direction. Runs built by adding stops in the right place
+        always are; the run of stops an elevator's passengers already want may not be.
+        """
+        if self._monotone is None:
+            self._monotone = all(self._in_order(a, b) for a, b in zip(self.stops, self.stops[1:]))
+        return self._monotone
 
-    def first(self):
-        assert len(self.stops) > 0
-        return self[0]
+    def squeeze_in_indexes(self, floor) -> List[int]:
+        """
+        :return: every i such that floor lies strictly between stops[i] and stops[i+1], going in the run's direction.
+         For a monotone run (the usual case) there is at most one, and it's found by bisection.
+        """
+        stops = self.stops
+        if not self.is_monotone:
+            return [i for i, start_floor, end_floor in zip(range(len(stops) - 1), stops, stops[1:])
+                    if self._in_order(start_floor, floor) and self._in_order(floor, end_floor)]
+        if self.direction == "UP":
+            j = bisect_left(stops, floor)
+        else:  # Descending - bisect by hand
+            lo, hi = 0, len(stops)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if stops[mid] > floor:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            j = lo
+        # stops[j - 1] is strictly before floor; stops[j] must be strictly after it
+        if 0 < j < len(stops) and stops[j] != floor:
+            return [j - 1]
+        return []
+
+    @staticmethod
+    def update_times(runs: List['Run'], travel_times: TravelTimeTable = None):
+        """
+        Recomputes the times of a sequence of runs (one elevator's), assuming the time of the very first stop is right.
+        Every leg starts from a standstill, after stopping for ElevatorStop.duration.
+
+        For vectorize_from stops or more, the legs are looked up in the travel time table all at once, and the times are
+        accumulated with one cumsum over (first time, stop, leg, stop, leg, ...) - the same additions, in the same
+        order, as going stop by stop, so both ways give exactly the same times.
+        """
+        if len(runs) == 0 or len(runs[0]) == 0:
+            return
+        travel_times = travel_times if travel_times is not None else TravelTimeTable.for_profile()
+        if sum(len(run) for run in runs) < Run.vectorize_from:
+            prev_time, prev_floor = runs[0].times[0], runs[0].stops[0]
+            for run in runs:
+                stops, times = run.stops, run.times
+                for i in range(len(stops)):
+                    new_t = prev_time + travel_times.between(prev_floor, stops[i])
+                    times[i] = new_t
+                    prev_time = new_t + ElevatorStop.duration
+                    prev_floor = stops[i]
+            return
 
-    def normalize_times(self):
+        floors = array("i")
+        for run in runs:
+            floors.extend(run.stops)
+        floors = np.frombuffer(floors, dtype=np.intc)
+        travel_times.ensure_floors(int(floors.max()))
 
-        pass
+        steps = np.empty(2 * len(floors) - 1, dtype=np.float64)
+        steps[0] = runs[0].times[0]
+        steps[1::2] = ElevatorStop.duration
+        steps[2::2] = travel_times.times[floors[:-1], floors[1:]]
+        times = np.cumsum(steps)[::2]
 
+        offset = 0
+        for run in runs:
+            np.frombuffer(run.times, dtype=np.float64)[:] = times[offset:offset + len(run)]
+            offset += len(run)
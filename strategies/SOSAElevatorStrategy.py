@@ -1,37 +1,140 @@
-import copy
 import math
-from copy import copy
-from random import choice, random
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
 from typing import Dict, List, Tuple
 
 from elevate.ButtonPush import ButtonPush
 from elevate.Elevator import Elevator
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.RandomStreams import RandomStream
 from elevate.Schedule import ElevatorSchedule
+from elevate.Tracing import tracer
 from elevate.Simulator import ElevatorSimulator
+from elevate.Snapshot import SimulatorSnapshot
 from elevate.TravelBehaviors import TravelBehavior, UpPeakTravelBehavior, UpDownPeakTravelBehavior, \
     DownPeakTravelBehavior, InterfloorTravelBehavior, CompositeTravelBehavior
 from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
 from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.PlanCost import IncrementalPlanCost, Stop
 from elevate.strategies.PriorBeliefElevatorStrategy import PriorBeliefElevatorStrategy
 
 
+def _evaluate_plans(snapshot: SimulatorSnapshot, plans: List[Dict[int, List[Stop]]], seeds: List[int],
+                    num_simulations) -> List[Tuple[float, float, float]]:
+    """
+    Scores a batch of candidate plans against one snapshot.
+    """
+    return [SOSAElevatorStrategy.rollout_objectives(snapshot, plan, seed, num_simulations)
+            for plan, seed in zip(plans, seeds)]
+
+
+# In a worker process: where the snapshot of each replan is published, and the one this worker last fetched from there
+_published_snapshots = None
+_worker_snapshot = (None, None)  # type: Tuple[int, SimulatorSnapshot]
+
+
+def _init_worker(published_snapshots):
+    global _published_snapshots
+    _published_snapshots = published_snapshots
+
+
+def _evaluate_published(token, plans: List[Dict[int, List[Stop]]], seeds: List[int],
+                        num_simulations) -> List[Tuple[float, float, float]]:
+    """
+    What the worker processes run: _evaluate_plans against the snapshot published under token. Each worker fetches a
+    snapshot once and keeps it for the rest of the replan, so tasks themselves only carry plans and seeds.
+    """
+    global _worker_snapshot
+    if _worker_snapshot[0] != token:
+        _worker_snapshot = (token, _published_snapshots[token])
+    return _evaluate_plans(_worker_snapshot[1], plans, seeds, num_simulations)
+
+
 class SOSAElevatorStrategy(ElevatorStrategy):
+    def __init__(self, rng: RandomStream = None, max_workers=1, num_simulations=10, prescreen_fraction=.25,
+                 num_floors=None):
+        """
+        :param rng: as for ElevatorStrategy
+        :param max_workers: the number of processes to evaluate the candidate plans of each temperature step on. 1 (the
+         default) evaluates them in this process; None uses every core. The pool is started the first time it's needed
+         and kept until close() is called (the simulator does at the end of a run), so its workers stay warm across
+         replans. Each replan's snapshot is published to the workers once, rather than sent along with every batch of
+         plans.
+        :param num_simulations: the number of rollouts each plan is scored with
+        :param prescreen_fraction: the share of each step's candidates (the best by SurrogatePlanCost) that go on to be
+         scored with rollouts. The rest are rejected outright. None scores every candidate with rollouts.
+        :param num_floors: the top floor of the building, which the traffic of the rollouts spans. None works it out
+         from the elevators and presses at each replan (see SimulatorSnapshot.building_height).
+        """
+        super().__init__(rng)
+        self.prescreen_fraction = prescreen_fraction
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count() or 1
+        self.num_simulations = num_simulations
+        self.num_floors = num_floors
+        self._pool = None
+        self._manager = None
+        self._finalizer = None  # Shuts the pool down if the strategy is dropped without being closed
+        self._published = None  # The snapshots the workers can fetch, by token
+        self._published_snapshot = None  # The snapshot most recently published, and its token
+        self._token = 0
+
+    def close(self):
+        """
+        Shuts down the worker pool, if there is one.
+        """
+        if self._pool is not None:
+            self._finalizer()
+            self._pool, self._manager, self._published, self._published_snapshot = None, None, None, None
+            self._finalizer = None
+
+    @staticmethod
+    def _shut_down(pool: ProcessPoolExecutor, manager):
+        pool.shutdown()
+        manager.shutdown()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # Pools don't travel between processes
+        state.update(_pool=None, _manager=None, _published=None, _published_snapshot=None, _finalizer=None)
+        return state
+
+    def publish(self, snapshot: SimulatorSnapshot) -> int:
+        """
+        Makes snapshot available to the workers, unless it already is (it's the snapshot of the replan under way).
+        :return: the token the workers fetch it by
+        """
+        if self._published_snapshot is None or self._published_snapshot[1] is not snapshot:
+            self._token += 1
+            self._published.clear()  # Only the current replan's snapshot is ever needed
+            self._published[self._token] = snapshot
+            self._published_snapshot = (self._token, snapshot)
+        return self._published_snapshot[0]
+
     @staticmethod
-    def assign_stops_randomly(elevators_to_stops, presses, directions):
+    def assign_stops_randomly(elevators_to_stops, presses, directions, rng: Random):
+        choice = rng.choice
         for press in presses:
             e = choice(list(elevators_to_stops.keys()))
             num_stops = len(elevators_to_stops[e])
             i = choice(range(num_stops)) if num_stops > 0 else 0
             if i == num_stops:
                 directions[e] = press.direction
-            elevators_to_stops[e].insert(i, (press.floor, True))  # true indicates its eligible for reassignment.
+            elevators_to_stops[e].insert(i, (press.floor, press.direction))  # A direction marks it as reassignable
 
     @staticmethod
-    def insert_randomly(plan:  Dict[Elevator, List[Tuple[int, bool]]], floor: int):
+    def insert_randomly(plan:  Dict[Elevator, List[Stop]], stop: Stop, rng: Random) -> Tuple[Elevator, int]:
+        """
+        :return: the elevator and index the stop was inserted at
+        """
+        choice = rng.choice
         e = choice(list(plan.keys()))
         num_stops = len(plan[e])
         i = choice(range(num_stops)) if num_stops > 0 else 0
-        plan[e].insert(i, (floor, True))  # true indicates its eligible for reassignment.
+        plan[e].insert(i, stop)
+        return e, i
 
     @staticmethod
     def clean_plan(plan: Dict[Elevator, List[int]]):
@@ -50,70 +153,167 @@ class SOSAElevatorStrategy(ElevatorStrategy):
                     del plan[e][r]
 
     @staticmethod
-    def random_element(plan:  Dict[Elevator, List[Tuple[int, bool]]]) -> Tuple[int, bool]:
+    def random_position(plan:  Dict[Elevator, List[Stop]], rng: Random) -> Tuple[Elevator, int]:
+        choice = rng.choice
         e = choice(list(plan.keys()))
         num_stops = len(plan[e])
         while num_stops == 0:
             e = choice(list(plan.keys()))
             num_stops = len(plan[e])
-        return choice(plan[e])
+        return e, choice(range(num_stops))
 
     @staticmethod
-    def perturb(plan:  Dict[Elevator, List[Tuple[int, bool]]]):
+    def random_element(plan:  Dict[Elevator, List[Stop]], rng: Random) -> Stop:
+        e, i = SOSAElevatorStrategy.random_position(plan, rng)
+        return plan[e][i]
+
+    @staticmethod
+    def perturb(plan:  Dict[Elevator, List[Stop]], rng: Random):
         """
-        Input is a plan where floors are marked with whether or not they are eligible to be perturbed.
+        Input is a plan where floors are marked with the direction of the press they pick up, if they are eligible to be
+        perturbed.
         Output is a new plan after perturbing 1 single element
         :param plan:
         :return:
         """
+        return SOSAElevatorStrategy.perturb_with_changes(plan, rng)[0]
+
+    @staticmethod
+    def perturb_with_changes(plan:  Dict[Elevator, List[Stop]], rng: Random) \
+            -> Tuple[Dict[Elevator, List[Stop]], Dict[Elevator, int]]:
+        """
+        Like perturb, but also says what changed.
+        :return: the new plan, and the elevators it changed mapped to the first index of their stops that changed
+        """
         # Perturbation is 'dumb' in the sense that we just replace things randomly.
         # Select elements at random until we find one eligible for perturbation
-        new_plan = copy(plan)
-        e = SOSAElevatorStrategy.random_element(new_plan)
-        while not e[1]:  # Need to be able to handle the other side as well - change order
-            e = SOSAElevatorStrategy.random_element(new_plan)
-        # Stick e somewhere else at random:
-        SOSAElevatorStrategy.insert_randomly(new_plan, e[0])
-        return new_plan
+        new_plan = {e: list(stops) for e, stops in plan.items()}  # Candidates must not share stop lists
+        e_from, i_from = SOSAElevatorStrategy.random_position(new_plan, rng)
+        while new_plan[e_from][i_from][1] is None:  # Need to be able to handle the other side as well - change order
+            e_from, i_from = SOSAElevatorStrategy.random_position(new_plan, rng)
+        # Take it out, and stick it somewhere else at random:
+        stop = new_plan[e_from].pop(i_from)
+        e_to, i_to = SOSAElevatorStrategy.insert_randomly(new_plan, stop, rng)
+        changes = {e_from: i_from}
+        changes[e_to] = min(changes.get(e_to, i_to), i_to)
+        return new_plan, changes
 
     @staticmethod
-    def get_traffic_profile(current_time, duration=600) -> TravelBehavior:
+    def get_traffic_profile(current_time, num_floors, duration=600) -> TravelBehavior:
         up_peak = 65 * 60  # just past 8 am
         up_down_peak = 6 * 60 * 60  # 1 pm
         down_peak = 10 * 60 * 60  # 5 pm
         peaks = [up_peak, up_down_peak, down_peak]
-        ps = [abs(current_time - p) for p in peaks]
-        map(lambda i: 1/i, ps)
+        # The closer we are to a peak, the more likely its traffic is.
+        ps = [1 / max(abs(current_time - p), 1) for p in peaks]
         norm_factor = .9 / sum(ps)
-        map(lambda i: norm_factor * i, ps)  # normalize to .9 - the rest is interfloor
+        ps = [norm_factor * p for p in ps]  # normalize to .9 - the rest is interfloor
         ps.append(.1)
         types = [
-            UpPeakTravelBehavior(40, current_time, duration),
-            UpDownPeakTravelBehavior(40, current_time, duration),
-            DownPeakTravelBehavior(40, current_time, duration),
-            InterfloorTravelBehavior(40, current_time, duration)]
-        return CompositeTravelBehavior(40, dict(zip(types, ps)))
+            UpPeakTravelBehavior(num_floors, current_time, duration),
+            UpDownPeakTravelBehavior(num_floors, current_time, duration),
+            DownPeakTravelBehavior(num_floors, current_time, duration),
+            InterfloorTravelBehavior(num_floors, current_time, duration)]
+        return CompositeTravelBehavior(num_floors, dict(zip(types, ps)))
+
+    @staticmethod
+    def get_cost_of_plan(snapshot: SimulatorSnapshot, plan, rng: Random, num_simulations=10):
+        """
+        Estimates how well a plan will hold up by forking the current state of the building a number of times, adding
+        some likely traffic for the next few minutes, and simulating each fork with the plan as a prior belief.
+        :param snapshot: the current state of the building
+        :param plan: elevators to their (floor, direction) stops
+        :return: the average wait over the simulations
+        """
+        return SOSAElevatorStrategy.rollout_cost(snapshot, SOSAElevatorStrategy.by_index(plan), rng.getrandbits(64),
+                                                 num_simulations)
+
+    @staticmethod
+    def by_index(plan: Dict[Elevator, List[Stop]]) -> Dict[int, List[Stop]]:
+        """
+        :return: the plan keyed by elevator index, which is how forks (and other processes) know the elevators
+        """
+        return {e.index: plan[e] for e in plan}
 
     @staticmethod
-    def get_cost_of_plan(elevators, presses, current_time, plan, num_simulations=10):
-        # Here, we simulate repeatedly
-        travel_behavior = SOSAElevatorStrategy.get_traffic_profile(current_time)
+    def rollout_cost(snapshot: SimulatorSnapshot, plan: Dict[int, List[Stop]], seed, num_simulations=10):
+        """
+        get_cost_of_plan for a plan keyed by elevator index, with all of its randomness drawn from seed.
+        """
+        return SOSAElevatorStrategy.rollout_objectives(snapshot, plan, seed, num_simulations)[0]  # Single objective baby!
+
+    @staticmethod
+    def rollout_objectives(snapshot: SimulatorSnapshot, plan: Dict[int, List[Stop]], seed,
+                           num_simulations=10) -> Tuple[float, float, float]:
+        """
+        Rolls a plan (keyed by elevator index) out num_simulations times, with all of its randomness drawn from seed.
+        :return: the average over the rollouts of the (avg wait, max wait, total distance) of each
+        """
+        rng = Random(seed)
+        travel_behavior = SOSAElevatorStrategy.get_traffic_profile(snapshot.current_time, snapshot.num_floors)
+        avg_wait, max_wait, total_dist = 0, 0, 0
         for _ in range(num_simulations):
             # Based on current_time, generate some basic traffic for the next few minutes
-            # Just need to make this actually return some stuff...
-            num_people = int(random.gaussian(15, 5))
-            simulator = ElevatorSimulator(travel_behavior, PriorBeliefElevatorStrategy(plan))
-            # Set up the simulator to look like the 'real' one we're in now.
-            simulator.elevators = copy.deepcopy(elevators)
-            new_presses = copy.deepcopy(presses)
-            # TODO this won't work. We have to actually simulate stops for the pending presses... hmm
-
-            simulator.pending_button_presses = new_presses
-            # And run it.
-            #
-            cost = simulator.run(num_people)
-            return cost.avg_wait  # Single objective baby!
-        return 0
+            num_people = max(0, int(rng.gauss(15, 5)))
+            simulator = ElevatorSimulator.from_snapshot(snapshot, travel_behavior, PriorBeliefElevatorStrategy({}),
+                                                        seed=rng.getrandbits(64))
+            simulator.strategy.prior_elevators_to_stops = {
+                e: [floor for floor, direction in plan[e.index] if direction is not None]
+                for e in simulator.elevators if e.index in plan}
+            stats = simulator.run(num_people)
+            avg_wait += stats.avg_wait
+            max_wait += stats.max_wait
+            total_dist += stats.total_dist
+        if num_simulations == 0:
+            return 0, 0, 0
+        return avg_wait / num_simulations, max_wait / num_simulations, total_dist / num_simulations
+
+    def prescreen(self, surrogate_costs: List[float]) -> List[int]:
+        """
+        :param surrogate_costs: the surrogate cost of each candidate of a step
+        :return: the indexes of the candidates worth a full rollout - the best prescreen_fraction of them by the
+         surrogate cost, in their original order
+        """
+        if self.prescreen_fraction is None or len(surrogate_costs) <= 1:
+            return list(range(len(surrogate_costs)))
+        num_kept = max(1, math.ceil(len(surrogate_costs) * self.prescreen_fraction))
+        return sorted(sorted(range(len(surrogate_costs)), key=lambda i: surrogate_costs[i])[:num_kept])
+
+    def evaluate_candidates(self, snapshot: SimulatorSnapshot, plans: List[Dict[Elevator, List[Stop]]],
+                            rng: Random) -> List[float]:
+        """
+        Scores every candidate plan of a temperature step by its average wait. See evaluate_objectives.
+        """
+        return [objectives[0] for objectives in self.evaluate_objectives(snapshot, plans, rng)]
+
+    def evaluate_objectives(self, snapshot: SimulatorSnapshot, plans: List[Dict[Elevator, List[Stop]]],
+                            rng: Random) -> List[Tuple[float, float, float]]:
+        """
+        Rolls out every candidate plan of a step, on the worker pool if there is more than one worker. Seeds are drawn
+        here, in order, so the results don't depend on the number of workers.
+        :return: the (avg wait, max wait, total distance) of each plan
+        """
+        seeds = [rng.getrandbits(64) for _ in plans]
+        indexed_plans = [SOSAElevatorStrategy.by_index(plan) for plan in plans]
+        if self.max_workers <= 1 or len(plans) <= 1:
+            return _evaluate_plans(snapshot, indexed_plans, seeds, self.num_simulations)
+
+        if self._pool is None:
+            self._manager = multiprocessing.Manager()
+            self._published = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                             initargs=(self._published,))
+            self._finalizer = weakref.finalize(self, SOSAElevatorStrategy._shut_down, self._pool, self._manager)
+        token = self.publish(snapshot)
+        num_batches = min(self.max_workers, len(plans))
+        batches = [range(b, len(plans), num_batches) for b in range(num_batches)]
+        futures = [self._pool.submit(_evaluate_published, token, [indexed_plans[i] for i in batch],
+                                     [seeds[i] for i in batch], self.num_simulations) for batch in batches]
+        results = [None] * len(plans)
+        for batch, future in zip(batches, futures):
+            for i, objectives in zip(batch, future.result()):
+                results[i] = objectives
+        return results
 
     @staticmethod
     def p_accept(old_cost, new_cost, t):
@@ -126,13 +326,25 @@ class SOSAElevatorStrategy(ElevatorStrategy):
             return math.e ** (loss / t)
 
     def get_plan(self, elevators: List[Elevator], presses: List[ButtonPush], current_time) -> ElevatorSchedule:
-        # Each elevator has a set of stops they have to hit, corresponding with the set of people on board.
-        e_to_must_stops = self._get_already_planned_stops(elevators)
-        e_to_stops = {e: [(s, False) for s in e_to_must_stops[e]] for e in e_to_must_stops}
-        final_dirs = {}
-        SOSAElevatorStrategy.assign_stops_randomly(e_to_stops, presses, final_dirs)
-        old_plan = e_to_stops
-        old_cost = SOSAElevatorStrategy.get_cost_of_plan(old_plan)
+        return self.get_plan_by(elevators, presses, current_time, None)
+
+    def get_plan_by(self, elevators: List[Elevator], presses: List[ButtonPush], current_time, deadline) \
+            -> ElevatorSchedule:
+        """
+        Anneals starting from the Boring strategy's plan, which is also what we fall back on if we run out of time
+        before even that has been rolled out. Otherwise the best plan rolled out so far is returned.
+        """
+        rng = self.rng.python
+        seed_schedule = BoringElevatorStrategy(self.rng).get_plan(elevators, presses, current_time)
+        if ElevatorStrategy.out_of_time(deadline):
+            seed_schedule.deadline_hit = True
+            return seed_schedule
+        seed_plan = old_plan = self.from_schedule(seed_schedule, elevators, presses)
+        snapshot = SimulatorSnapshot.capture(elevators, presses, current_time, num_floors=self.num_floors)
+        old_cost = self.evaluate_candidates(snapshot, [old_plan], rng)[0]
+        best_plan, best_cost = old_plan, old_cost
+        surrogate = IncrementalPlanCost(elevators, presses, current_time)
+        surrogate.reset(old_plan)
 
         # The cooling schedule: Basically how likely are we to accept a worse plan?
         t = 1000
@@ -144,21 +356,102 @@ class SOSAElevatorStrategy(ElevatorStrategy):
 
         # Exit criteria
         max_nam_iterations = len(presses) * len(elevators)
+        if not any(direction is not None for e in old_plan for _, direction in old_plan[e]):
+            max_nam_iterations = 0  # Nothing to move around
         i = 0
+        deadline_hit = False
 
-        while i < max_nam_iterations:
-            for _ in range(num_trial_perturbations):
-                new_plan = SOSAElevatorStrategy.perturb(old_plan)
-                new_cost = SOSAElevatorStrategy.get_cost_of_plan(new_plan)
-                if random() < SOSAElevatorStrategy.p_accept(old_cost, new_cost, t):
-                    old_plan = new_plan
-                    old_cost = new_cost
+        while i < max_nam_iterations and not deadline_hit:
+            # Every trial of a step perturbs the plan we start the step with, so they can all be scored at once. The
+            # acceptance rule is then applied to them in order.
+            candidates = [SOSAElevatorStrategy.perturb_with_changes(old_plan, rng)
+                          for _ in range(num_trial_perturbations)]
+            # Each candidate moved a single stop, so its surrogate cost only needs the two elevators it touched.
+            proposals = [surrogate.propose(plan, changes) for plan, changes in candidates] \
+                if self.prescreen_fraction is not None else None
+            kept = self.prescreen([p.cost for p in proposals]) if proposals is not None else range(len(candidates))
+            # With a deadline, roll out a pool's worth at a time so we can stop in between.
+            chunk_size = len(kept) if deadline is None else self.max_workers
+            accepted = None
+            for c in range(0, len(kept), chunk_size):
+                if ElevatorStrategy.out_of_time(deadline):
+                    deadline_hit = True
+                    break
+                chunk = kept[c:c + chunk_size]
+                for k, new_cost in zip(chunk, self.evaluate_candidates(snapshot, [candidates[k][0] for k in chunk],
+                                                                       rng)):
+                    if new_cost < best_cost:
+                        best_plan, best_cost = candidates[k][0], new_cost
+                    if rng.random() < SOSAElevatorStrategy.p_accept(old_cost, new_cost, t):
+                        accepted = k
+                        old_cost = new_cost
+            if accepted is not None:
+                old_plan = candidates[accepted][0]
+                if proposals is not None:
+                    surrogate.accept(proposals[accepted])
             t *= alpha
             num_trial_perturbations = int(num_trial_perturbations * beta + .99999999)  # Round up
             i += 1
 
-        SOSAElevatorStrategy.clean_plan(old_plan)
-        print("Generated Plan")
-        for e in old_plan:
-            print(e, old_plan[e], final_dirs[e] if e in final_dirs else "")
-        return ElevatorSchedule(old_plan, final_dirs, current_time)
\ No newline at end of file
+        if deadline_hit:
+            tracer.debug(current_time, "SOSA: out of time after {} of {} steps", i, max_nam_iterations)
+        # Nothing beat the seed: its schedule says everything about it, where the plan only has the stops
+        schedule = seed_schedule if best_plan is seed_plan else \
+            SOSAElevatorStrategy.to_schedule(best_plan, current_time)
+        schedule.deadline_hit = deadline_hit
+        return schedule
+
+    def from_schedule(self, schedule: ElevatorSchedule, elevators: List[Elevator], presses: List[ButtonPush]) \
+            -> Dict[Elevator, List[Stop]]:
+        """
+        Turns a schedule into a plan of (floor, direction) stops. A stop is reassignable if it's on a floor with a
+        pending press and nobody on board is getting off there, in which case it's marked with the direction of the
+        press it picks up: the way the elevator leaves the stop (its final direction, from the last one) if there's a
+        press that way, otherwise the first press on the floor. Stops that aren't reassignable are marked None.
+        """
+        e_to_must_stops = self._get_already_planned_stops(elevators)
+        calls = set((p.floor, p.direction) for p in presses)
+        first_directions = {}  # The direction of the first press on each floor
+        for p in sorted(presses, key=lambda p: p.time if p.time is not None else 0, reverse=True):
+            first_directions[p.floor] = p.direction
+
+        def direction(e, floors, i):
+            floor = floors[i]
+            if floor not in first_directions or floor in e_to_must_stops[e]:
+                return None
+            heading = schedule.elevator_to_final_dir.get(e) if i == len(floors) - 1 \
+                else ElevatorPhysicsCalculator.direction(floor, floors[i + 1])
+            return heading if (floor, heading) in calls else first_directions[floor]
+
+        plan = {}
+        for e in elevators:
+            floors = schedule.elevator_to_floors.get(e, [])
+            plan[e] = [(floor, direction(e, floors, i)) for i, floor in enumerate(floors)]
+        return plan
+
+    def initial_plan(self, elevators: List[Elevator], presses: List[ButtonPush], rng: Random) \
+            -> Dict[Elevator, List[Stop]]:
+        """
+        The stops every elevator has to make for the people on board, with the presses assigned to them at random.
+        """
+        # Each elevator has a set of stops they have to hit, corresponding with the set of people on board.
+        e_to_must_stops = self._get_already_planned_stops(elevators)
+        e_to_stops = {e: [(s, None) for s in e_to_must_stops[e]] for e in e_to_must_stops}
+        SOSAElevatorStrategy.assign_stops_randomly(e_to_stops, presses, {}, rng)
+        return e_to_stops
+
+    @staticmethod
+    def to_schedule(plan: Dict[Elevator, List[Stop]], current_time) -> ElevatorSchedule:
+        """
+        Turns an annealed plan of (floor, direction) stops into a schedule.
+        """
+        # An elevator heads on from its last stop the way the press it picks up there asked to go: a press is only
+        # picked up by a start going its way.
+        final_dirs = {e: plan[e][-1][1] for e in plan if len(plan[e]) > 0 and plan[e][-1][1] is not None}
+        plan = {e: [floor for floor, _ in plan[e]] for e in plan}
+        SOSAElevatorStrategy.clean_plan(plan)
+        if tracer.is_debug:
+            tracer.debug(current_time, "Generated Plan")
+            for e in plan:
+                tracer.debug(current_time, "{} {} {}", e, plan[e], final_dirs[e] if e in final_dirs else "")
+        return ElevatorSchedule(plan, final_dirs, current_time)
@@ -2,7 +2,11 @@ import unittest
 from heapq import heappop
 
 from elevate.ButtonPush import ButtonPush
+from elevate.RandomStreams import RandomStream
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
 from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.Run import Run
 from elevate.TravelGoal import TravelGoal
 from elevate.Elevator import Elevator
 
@@ -175,6 +179,38 @@ class TestBoringSchedule(unittest.TestCase):
             "Stopping at floors in the wrong order!"
         )
 
+    def test_squeeze_in_indexes_match_scan(self):
+        strategy = BoringElevatorStrategy()
+        for d, stops in [("UP", [1, 4, 5, 9]), ("DOWN", [12, 8, 7, 2]), ("UP", [6, 2, 9])]:
+            for floor in range(-1, 14):
+                expected = [i for i in range(len(stops) - 1)
+                            if strategy.is_floor_in_dir(stops[i], floor, d)
+                            and strategy.is_floor_in_dir(floor, stops[i + 1], d)]
+                self.assertEqual(Run(d, stops).squeeze_in_indexes(floor), expected, (d, stops, floor))
+
+    def test_persisted_runs_only_replan_what_changed(self):
+        e1, e2 = Elevator(passenger_goals=set()), Elevator(location=20, passenger_goals=set())
+        strategy = BoringElevatorStrategy(persist_runs=True)
+        presses = [ButtonPush(3, "UP", 0)]
+        schedule = strategy.get_plan_update([e1, e2], presses, 0, None)
+        self.assertEqual(schedule.elevator_to_floors[e1], [3])
+
+        presses.append(ButtonPush(25, "DOWN", 1))
+        update = strategy.get_plan_update([e1, e2], presses, 1, schedule)
+        self.assertEqual(update.elevator_to_floors, {e1: [3], e2: [25]})
+        self.assertEqual(update.changed_elevators, {e2})
+        self.assertEqual(update.elevator_to_time[e1], schedule.elevator_to_time[e1])
+
+    def test_persisted_runs_plan_as_well_as_from_scratch(self):
+        def run(persist_runs):
+            return ElevatorSimulator(OfficeBuildingTravelBehavior(40), BoringElevatorStrategy(persist_runs=persist_runs),
+                                     8, seed=RandomStream(3)).run(num_people=500)
+        from_scratch, persisted = run(False), run(True)
+        self.assertEqual(persisted.num_completed, from_scratch.num_completed)
+        # Before presses that later ones pushed back were given out again, this was 36.2s against 28.8s
+        self.assertLess(persisted.avg_wait, from_scratch.avg_wait * 1.1)
+        self.assertLess(persisted.max_wait, from_scratch.max_wait * 1.5)
+
 
 if __name__ == '__main__':
     unittest.main()
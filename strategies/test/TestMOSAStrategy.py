@@ -0,0 +1,81 @@
+import time
+import unittest
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.RandomStreams import RandomStream
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.MOSAElevatorStrategy import MOSAElevatorStrategy
+from elevate.strategies.ParetoArchive import ParetoArchive
+
+
+class TestParetoArchive(unittest.TestCase):
+    def test_keeps_only_non_dominated(self):
+        archive = ParetoArchive(2)
+        self.assertTrue(archive.add((3, 3), "a"))
+        self.assertTrue(archive.add((1, 5), "b"))
+        self.assertFalse(archive.add((4, 4), "dominated by a"))
+        self.assertFalse(archive.add((3, 3), "same as a"))
+        self.assertTrue(archive.add((2, 2), "dominates a"))
+        self.assertEqual(sorted(archive.items), ["b", "dominates a"])
+
+    def test_prunes_the_most_crowded(self):
+        archive = ParetoArchive(2, capacity=3)
+        for x, name in [(0, "end"), (5, "middle"), (5.1, "crowded"), (10, "other end")]:
+            archive.add((x, 10 - x), name)
+        self.assertEqual(len(archive), 3)
+        self.assertIn("end", archive.items)
+        self.assertIn("other end", archive.items)
+
+    def test_best_uses_weights(self):
+        archive = ParetoArchive(2)
+        archive.add((0, 10), "first")
+        archive.add((10, 0), "second")
+        self.assertEqual(archive.best([1, 0]), "first")
+        self.assertEqual(archive.best([0, 1]), "second")
+
+
+class TestMOSAStrategy(unittest.TestCase):
+    def test_plans_within_budget(self):
+        e1, e2 = Elevator(passenger_goals=set()), Elevator(location=20, passenger_goals=set())
+        presses = [ButtonPush(3, "UP", 0), ButtonPush(12, "DOWN", 0), ButtonPush(30, "DOWN", 1)]
+        strategy = MOSAElevatorStrategy(RandomStream(1), time_budget=.2, num_simulations=2)
+
+        start = time.perf_counter()
+        schedule = strategy.get_plan([e1, e2], presses, 2)
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(sorted(f for e in (e1, e2) for f in schedule.elevator_to_floors[e]), [3, 12, 30])
+
+    def test_no_budget_plans_like_boring(self):
+        e1, e2 = Elevator(passenger_goals=set()), Elevator(location=20, passenger_goals=set())
+        presses = [ButtonPush(3, "UP", 0), ButtonPush(12, "DOWN", 0)]
+        strategy = MOSAElevatorStrategy(RandomStream(1), time_budget=0, num_simulations=2)
+        strategy.evaluate_objectives = None  # Nothing may be rolled out
+
+        schedule = strategy.get_plan([e1, e2], presses, 2)
+        boring = BoringElevatorStrategy(RandomStream(1)).get_plan([e1, e2], presses, 2)
+        self.assertEqual(schedule.elevator_to_floors, boring.elevator_to_floors)
+        self.assertFalse(schedule.deadline_hit)
+
+    def test_max_steps_fixes_the_work(self):
+        e1, e2 = Elevator(passenger_goals=set()), Elevator(location=20, passenger_goals=set())
+        presses = [ButtonPush(3, "UP", 0), ButtonPush(12, "DOWN", 0), ButtonPush(30, "DOWN", 1)]
+        strategy = MOSAElevatorStrategy(RandomStream(1), time_budget=None, num_simulations=2, max_steps=2)
+        rollouts = []
+        evaluate_objectives = strategy.evaluate_objectives
+        strategy.evaluate_objectives = lambda snapshot, plans, rng: \
+            rollouts.append(len(plans)) or evaluate_objectives(snapshot, plans, rng)
+
+        schedule = strategy.get_plan([e1, e2], presses, 2)
+        # The plan it starts from, then 2 and 3 candidates for the two steps
+        self.assertEqual(sum(rollouts), 1 + 2 + 3)
+        self.assertEqual(sorted(f for e in (e1, e2) for f in schedule.elevator_to_floors[e]), [3, 12, 30])
+        self.assertFalse(schedule.deadline_hit)
+
+        with self.assertRaises(ValueError):
+            MOSAElevatorStrategy(time_budget=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
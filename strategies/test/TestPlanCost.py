@@ -0,0 +1,69 @@
+import unittest
+from random import Random
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.strategies.PlanCost import SurrogatePlanCost, IncrementalPlanCost
+from elevate.strategies.SOSAElevatorStrategy import SOSAElevatorStrategy
+from elevate.TravelGoal import TravelGoal
+
+
+class TestSurrogatePlanCost(unittest.TestCase):
+    def setUp(self):
+        self.e1, self.e2 = Elevator(passenger_goals=set()), Elevator(location=10, passenger_goals=set())
+        self.presses = [ButtonPush(3, "UP", 0), ButtonPush(12, "DOWN", 0)]
+        self.cost = SurrogatePlanCost([self.e1, self.e2], self.presses, 0)
+
+    def test_wait_is_time_to_reach_the_press(self):
+        plan = {self.e1: [(3, "UP")], self.e2: [(12, "DOWN")]}
+        expected = (ElevatorPhysicsCalculator.time_to(0, 3) + ElevatorPhysicsCalculator.time_to(10, 12)) / 2
+        self.assertAlmostEqual(self.cost(plan), expected)
+
+    def test_nearest_elevators_are_cheapest(self):
+        near = {self.e1: [(3, "UP")], self.e2: [(12, "DOWN")]}
+        far = {self.e1: [(12, "DOWN")], self.e2: [(3, "UP")]}
+        self.assertLess(self.cost(near), self.cost(far))
+
+    def test_unserved_press_is_penalized(self):
+        plan = {self.e1: [(3, "UP")], self.e2: []}
+        self.assertAlmostEqual(self.cost(plan), (ElevatorPhysicsCalculator.time_to(0, 3) + 600) / 2)
+
+    def test_stops_serve_the_way_they_leave(self):
+        presses = [ButtonPush(5, "UP", 0), ButtonPush(5, "DOWN", 0)]
+        cost = SurrogatePlanCost([self.e1, self.e2], presses, 0)
+        to_5 = ElevatorPhysicsCalculator.time_to(0, 5)
+        # Leaving floor 5 downward only picks up the DOWN press, however many times it stops there
+        down_twice = {self.e1: [(5, "DOWN"), (2, None), (5, "DOWN"), (1, None)], self.e2: []}
+        self.assertAlmostEqual(cost(down_twice), (to_5 + 600) / 2)
+        # Both ways round, each press gets its own stop
+        both = {self.e1: [(5, "UP"), (9, None)], self.e2: [(5, "DOWN"), (2, None)]}
+        self.assertAlmostEqual(cost(both), (to_5 + ElevatorPhysicsCalculator.time_to(10, 5)) / 2)
+
+
+class TestIncrementalPlanCost(unittest.TestCase):
+    def test_matches_surrogate_along_a_random_walk(self):
+        rng = Random(2)
+        elevators = [Elevator(location=rng.randint(0, 40), passenger_goals=set()) for _ in range(4)]
+        elevators[0].passenger_goals = {TravelGoal(0, 0, 17), TravelGoal(0, 0, 30)}
+        presses = [ButtonPush(rng.randint(0, 40), rng.choice(["UP", "DOWN"]), rng.uniform(0, 20)) for _ in range(25)]
+        plan = {e: [] for e in elevators}
+        plan[elevators[0]] = [(17, None), (30, None)]
+        SOSAElevatorStrategy.assign_stops_randomly(plan, presses, {}, rng)
+
+        full = SurrogatePlanCost(elevators, presses, 20)
+        incremental = IncrementalPlanCost(elevators, presses, 20)
+        self.assertAlmostEqual(incremental.reset(plan), full(plan))
+        for step in range(200):
+            candidate, changes = SOSAElevatorStrategy.perturb_with_changes(plan, rng)
+            self.assertEqual(sum(map(len, candidate.values())), sum(map(len, plan.values())))
+            proposal = incremental.propose(candidate, changes)
+            self.assertAlmostEqual(proposal.cost, full(candidate), places=6)
+            if step % 3 == 0:
+                incremental.accept(proposal)
+                plan = candidate
+                self.assertAlmostEqual(incremental.cost(), full(plan), places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from random import Random
+
+from elevate.Events import ElevatorStop
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator
+from elevate.strategies.Run import Run
+
+
+class TestRun(unittest.TestCase):
+    def test_insert_stop(self):
+        run = Run("DOWN", [9, 3])
+        run.insert_stop(5, 1, 12.5)
+        run.add_stop(1)
+        self.assertEqual(run.stops.tolist(), [9, 5, 3, 1])
+        self.assertEqual(run.times.tolist(), [0, 12.5, 0, 0])
+        self.assertTrue(run.is_monotone)
+
+    def test_update_times_matches_stop_by_stop(self):
+        rng = Random(3)
+        for num_runs in (1, 3, 20):  # Both below and above vectorize_from
+            runs = []
+            for _ in range(num_runs):
+                direction = rng.choice(["UP", "DOWN"])
+                stops = sorted(rng.sample(range(40), 4), reverse=direction == "DOWN")
+                runs.append(Run(direction, stops))
+            runs[0].times[0] = 17.25
+
+            expected = []
+            prev_time, prev_floor = 17.25, runs[0][0]
+            for run in runs:
+                for floor in run.stops:
+                    prev_time += ElevatorPhysicsCalculator.time_to(prev_floor, floor)
+                    expected.append(prev_time)
+                    prev_time += ElevatorStop.duration
+                    prev_floor = floor
+
+            Run.update_times(runs)
+            self.assertEqual([t for run in runs for t in run.times], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import gc
+import time
+import unittest
+from random import Random
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.RandomStreams import RandomStream
+from elevate.Schedule import ElevatorSchedule
+from elevate.Simulator import ElevatorSimulator
+from elevate.Snapshot import SimulatorSnapshot
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.TravelGoal import TravelGoal
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.MOSAElevatorStrategy import MOSAElevatorStrategy
+from elevate.strategies.SOSAElevatorStrategy import SOSAElevatorStrategy
+
+
+class TestSOSAStrategy(unittest.TestCase):
+    def setUp(self):
+        self.e1, self.e2 = Elevator(passenger_goals=set()), Elevator(location=10, passenger_goals=set())
+        self.presses = [ButtonPush(3, "UP", 100), ButtonPush(12, "DOWN", 101)]
+        self.snapshot = SimulatorSnapshot.capture([self.e1, self.e2], self.presses, 102)
+        self.plans = [
+            {self.e1: [(3, "UP")], self.e2: [(12, "DOWN")]},
+            {self.e1: [(3, "UP"), (12, "DOWN")], self.e2: []},
+            {self.e1: [], self.e2: [(12, "DOWN"), (3, "UP")]},
+        ]
+
+    def test_perturb_does_not_touch_the_original(self):
+        plan = {self.e1: [(3, "UP"), (5, None)], self.e2: [(12, "DOWN")]}
+        before = {e: list(stops) for e, stops in plan.items()}
+        SOSAElevatorStrategy.perturb(plan, Random(1))
+        self.assertEqual(plan, before)
+
+    def test_parallel_evaluation_matches_serial(self):
+        serial = SOSAElevatorStrategy(RandomStream(4), num_simulations=2)
+        parallel = SOSAElevatorStrategy(RandomStream(4), max_workers=2, num_simulations=2)
+        try:
+            self.assertEqual(parallel.evaluate_candidates(self.snapshot, self.plans, Random(5)),
+                             serial.evaluate_candidates(self.snapshot, self.plans, Random(5)))
+        finally:
+            parallel.close()
+
+    def test_workers_follow_the_published_snapshot(self):
+        later = SimulatorSnapshot.capture([self.e1, self.e2], self.presses + [ButtonPush(7, "UP", 150)], 160)
+        serial = SOSAElevatorStrategy(RandomStream(4), num_simulations=2)
+        parallel = SOSAElevatorStrategy(RandomStream(4), max_workers=2, num_simulations=2)
+        try:
+            for snapshot in [self.snapshot, later]:
+                for _ in range(2):
+                    self.assertEqual(parallel.evaluate_candidates(snapshot, self.plans, Random(5)),
+                                     serial.evaluate_candidates(snapshot, self.plans, Random(5)))
+            # Once per replan, not once per batch
+            self.assertEqual(parallel.publish(later), 2)
+        finally:
+            parallel.close()
+
+    def start_pool(self, strategy: SOSAElevatorStrategy):
+        """
+        :return: the worker processes of the pool strategy started to evaluate some plans
+        """
+        strategy.evaluate_candidates(self.snapshot, self.plans, Random(5))
+        return list(strategy._pool._processes.values())
+
+    def test_pool_is_released(self):
+        # At the end of a run
+        strategy = SOSAElevatorStrategy(RandomStream(4), max_workers=2, num_simulations=2)
+        workers = self.start_pool(strategy)
+        ElevatorSimulator(OfficeBuildingTravelBehavior(10), strategy, seed=1).run(
+            trip_source=[TravelGoal(0, 0, 3), TravelGoal(5, 6, 0)])
+        self.assertIsNone(strategy._pool)
+        self.assertFalse(any(w.is_alive() for w in workers))
+
+        # On leaving a with block
+        with SOSAElevatorStrategy(RandomStream(4), max_workers=2, num_simulations=2) as strategy:
+            workers = self.start_pool(strategy)
+        self.assertFalse(any(w.is_alive() for w in workers))
+
+        # When the strategy is dropped without being closed
+        strategy = SOSAElevatorStrategy(RandomStream(4), max_workers=2, num_simulations=2)
+        workers = self.start_pool(strategy)
+        del strategy
+        gc.collect()
+        self.assertFalse(any(w.is_alive() for w in workers))
+
+
+class TestPlanDirections(unittest.TestCase):
+    def setUp(self):
+        self.e1, self.e2 = Elevator(passenger_goals=set()), Elevator(location=10, passenger_goals=set())
+        self.presses = [ButtonPush(5, "UP", 0), ButtonPush(5, "DOWN", 1), ButtonPush(9, "DOWN", 2)]
+
+    def test_directions_survive_a_round_trip(self):
+        schedule = ElevatorSchedule({self.e1: [5, 9], self.e2: [5, 2]}, {self.e1: "DOWN"}, 3)
+        strategy = SOSAElevatorStrategy(RandomStream(1))
+        plan = strategy.from_schedule(schedule, [self.e1, self.e2], self.presses)
+        self.assertEqual(plan, {self.e1: [(5, "UP"), (9, "DOWN")], self.e2: [(5, "DOWN"), (2, None)]})
+        self.assertEqual(SOSAElevatorStrategy.to_schedule(plan, 3).elevator_to_final_dir, {self.e1: "DOWN"})
+
+    def test_moved_stops_keep_their_direction(self):
+        # The DOWN press on 5 is the later one, but it's the one this stop was for
+        schedule = SOSAElevatorStrategy.to_schedule({self.e1: [(9, None), (5, "DOWN")], self.e2: []}, 3)
+        self.assertEqual(schedule.elevator_to_final_dir, {self.e1: "DOWN"})
+
+    def test_seed_schedule_is_kept_when_nothing_beats_it(self):
+        # Boring heads on DOWN from 5, though the first press there was UP
+        presses = [ButtonPush(5, "UP", 0), ButtonPush(5, "DOWN", 1)]
+        e = Elevator(location=2, passenger_goals={TravelGoal(0, 0, 7)})
+        # With no rollouts every plan costs the same, so the seed is never beaten
+        for elevators in [[self.e1], [self.e1, e]]:
+            schedule = SOSAElevatorStrategy(RandomStream(1), num_simulations=0).get_plan(elevators, presses, 2)
+            boring = BoringElevatorStrategy(RandomStream(1)).get_plan(elevators, presses, 2)
+            self.assertEqual(schedule.elevator_to_floors, boring.elevator_to_floors)
+            self.assertEqual(schedule.elevator_to_final_dir, boring.elevator_to_final_dir)
+            self.assertEqual(schedule.elevator_to_final_dir[self.e1], "DOWN")
+
+
+class TestAnytimePlanning(unittest.TestCase):
+    def test_out_of_time_falls_back_on_boring(self):
+        e1, e2 = Elevator(passenger_goals=set()), Elevator(location=10, passenger_goals=set())
+        presses = [ButtonPush(3, "UP", 100), ButtonPush(12, "DOWN", 101)]
+        schedule = SOSAElevatorStrategy(RandomStream(4)).get_plan_by([e1, e2], presses, 102, time.perf_counter())
+        boring = BoringElevatorStrategy(RandomStream(4)).get_plan([e1, e2], presses, 102)
+
+        self.assertTrue(schedule.deadline_hit)
+        self.assertEqual(schedule.elevator_to_floors, boring.elevator_to_floors)
+
+    def test_simulator_counts_deadlines_hit(self):
+        stats = ElevatorSimulator(OfficeBuildingTravelBehavior(40), SOSAElevatorStrategy(num_simulations=1),
+                                  seed=1, plan_deadline=0).run(num_people=5)
+        self.assertGreater(stats.num_replans, 0)
+        self.assertEqual(stats.num_deadlines_hit, stats.num_replans)
+
+
+class TestStartOfTheDay(unittest.TestCase):
+    """
+    Left to work out the height of the building for themselves, the SA strategies used to see a building no taller
+    than floor 1 at the start of the day, whose interfloor traffic could never be generated.
+    """
+    def trips(self):
+        return [TravelGoal(0, 0, 1), TravelGoal(5, 0, 6), TravelGoal(20, 1, 0), TravelGoal(30, 4, 0)]
+
+    def test_press_near_the_lobby(self):
+        elevators = [Elevator(passenger_goals=set()), Elevator(passenger_goals=set())]
+        schedule = SOSAElevatorStrategy(RandomStream(0), num_simulations=2).get_plan(
+            elevators, [ButtonPush(1, "DOWN", 0)], 1)
+        self.assertEqual(sorted(f for floors in schedule.elevator_to_floors.values() for f in floors), [1])
+
+    def test_full_runs(self):
+        for strategy in [SOSAElevatorStrategy(), MOSAElevatorStrategy(time_budget=.1)]:
+            stats = ElevatorSimulator(OfficeBuildingTravelBehavior(10), strategy, seed=1).run(trip_source=self.trips())
+            self.assertEqual(stats.num_completed, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from random import Random
+
+from elevate.CompletedGoals import CompletedGoals
+from elevate.RunStats import RunStats
+from elevate.TravelGoal import TravelGoal
+
+
+def random_goals(n, seed=1):
+    rng = Random(seed)
+    goals = []
+    for i in range(n):
+        goal = TravelGoal(float(i), rng.randrange(40), rng.randrange(40))
+        goal.board_time = goal.time + rng.random() * 60
+        goal.finish_time = goal.board_time + rng.random() * 60
+        goals.append(goal)
+    return goals
+
+
+class TestCompletedGoals(unittest.TestCase):
+    def test_round_trip(self):
+        goals = random_goals(50)
+        completed = CompletedGoals(capacity=4)  # Has to grow a few times
+        for g in goals:
+            completed.append(g)
+
+        def fields(gs):
+            return [(g.time, g.start_floor, g.end_floor, g.board_time, g.finish_time) for g in gs]
+        self.assertEqual(len(completed), 50)
+        self.assertEqual(fields(completed), fields(goals))
+        self.assertEqual(fields(completed[30:]), fields(goals[30:]))
+        self.assertEqual(fields([completed[-1]]), fields(goals[-1:]))
+
+    def test_run_stats(self):
+        goals = random_goals(200)
+        stats = RunStats(CompletedGoals.from_travel_goals(goals), {})
+        self.assertEqual(stats.num_completed, 200)
+        self.assertAlmostEqual(stats.avg_wait, sum(g.board_time - g.time for g in goals) / 200)
+        self.assertAlmostEqual(stats.avg_total, sum(g.finish_time - g.time for g in goals) / 200)
+        self.assertEqual(stats.max_wait, max(g.board_time - g.time for g in goals))
+        self.assertEqual(RunStats([], {}).avg_wait, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
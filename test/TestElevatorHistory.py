@@ -0,0 +1,45 @@
+import unittest
+from random import Random
+
+from elevate.Elevator import Elevator
+from elevate.ElevatorHistory import ElevatorHistory
+
+
+class TestElevatorHistory(unittest.TestCase):
+    def setUp(self):
+        rng = Random(4)
+        self.elevator = Elevator()
+        self.events = []  # (time, floor, load, kind), alternating starts and stops
+        t, floor = 0., 0
+        for i in range(1000):
+            t += rng.random() * 10
+            if i % 2 == 1:
+                floor = rng.randrange(40)
+            kind = ElevatorHistory.START if i % 2 == 0 else ElevatorHistory.STOP
+            self.events.append((t, floor, rng.randrange(10), kind))
+
+    def record(self, **kwargs):
+        history = ElevatorHistory([self.elevator], chunk_size=64, **kwargs)
+        for event in self.events:
+            history.record(self.elevator, *event)
+        return history
+
+    def test_totals_dont_depend_on_retention(self):
+        expected_distance = sum(abs(b[1] - a[1]) for a, b in zip(self.events, self.events[1:]))
+        expected_moving = sum(b[0] - a[0] for a, b in zip(self.events, self.events[1:])
+                              if a[3] == ElevatorHistory.START and b[3] == ElevatorHistory.STOP)
+        expected_utilization = expected_moving / (self.events[-1][0] - self.events[0][0])
+        for kwargs in [{}, {"max_events": 10}, {"decimation": 7}]:
+            history = self.record(**kwargs)
+            self.assertEqual(history.total_distance(), expected_distance, kwargs)
+            self.assertAlmostEqual(history.utilization(), expected_utilization, msg=kwargs)
+            self.assertEqual(history.num_events(self.elevator), len(self.events))
+
+    def test_retention(self):
+        self.assertEqual(self.record()[self.elevator], [e[:3] for e in self.events])
+        self.assertEqual(self.record(max_events=10)[self.elevator], [e[:3] for e in self.events[-10:]])
+        self.assertEqual(self.record(decimation=7)[self.elevator], [e[:3] for e in self.events[::7]])
+
+
+if __name__ == '__main__':
+    unittest.main()
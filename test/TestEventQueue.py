@@ -0,0 +1,45 @@
+import unittest
+
+from elevate.Elevator import Elevator
+from elevate.EventQueue import ElevatorEventQueue
+from elevate.Events import ElevatorStart, ElevatorStop
+
+
+class TestEventQueue(unittest.TestCase):
+    def test_pops_in_time_order(self):
+        e = Elevator()
+        queue = ElevatorEventQueue([ElevatorStop(e, 3, 1), ElevatorStart(e, 1, 0), ElevatorStop(e, 2, 4)])
+        self.assertEqual([queue.pop().time for _ in range(3)], [1, 2, 3])
+        self.assertEqual(len(queue), 0)
+
+    def test_ties_pop_in_push_order(self):
+        e1, e2, e3 = Elevator(), Elevator(), Elevator()
+        queue = ElevatorEventQueue()
+        for e in [e2, e3, e1]:
+            queue.push(ElevatorStart(e, 5, 0))
+        self.assertEqual([queue.pop().elevator for _ in range(3)], [e2, e3, e1])
+
+    def test_reschedule_skips_cancelled_events(self):
+        e1, e2 = Elevator(), Elevator()
+        queue = ElevatorEventQueue([ElevatorStart(e1, 1, 0), ElevatorStop(e1, 4, 3), ElevatorStop(e2, 2, 7)])
+
+        queue.reschedule([e1], [ElevatorStop(e1, 6, 5)])
+
+        self.assertEqual(len(queue), 2)
+        self.assertEqual([ev.floor for ev in queue], [7, 5])
+        self.assertEqual(queue.events_for(e1)[0].floor, 5)
+        self.assertEqual(queue.pop().floor, 7)
+        self.assertEqual(queue.pop().floor, 5)
+        self.assertEqual(len(queue), 0)
+
+    def test_compacts_stale_entries(self):
+        e = Elevator()
+        queue = ElevatorEventQueue()
+        for i in range(1000):
+            queue.reschedule([e], [ElevatorStop(e, i, 1), ElevatorStop(e, i + 1, 2)])
+        self.assertEqual(len(queue), 2)
+        self.assertLess(len(queue._heap), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import math
+import unittest
+
+from elevate.MonteCarlo import Estimate, MonteCarloRunner, SimulationConfig, run_replicate, t_critical_95
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+from elevate.strategies.RandomElevatorStrategy import RandomElevatorStrategy
+
+
+class TestEstimate(unittest.TestCase):
+    def test_interval(self):
+        estimate = Estimate([1., 2., 3., 4.])
+        self.assertEqual(estimate.mean, 2.5)
+        self.assertAlmostEqual(estimate.sd, math.sqrt(5 / 3))
+        self.assertAlmostEqual(estimate.half_width, 3.182 * math.sqrt(5 / 3) / 2)
+        self.assertAlmostEqual(estimate.ci_low, 2.5 - estimate.half_width)
+
+    def test_single_value(self):
+        estimate = Estimate([5.])
+        self.assertEqual(estimate.mean, 5)
+        self.assertTrue(math.isnan(estimate.sd))
+        self.assertTrue(math.isnan(estimate.half_width))
+
+    def test_t_critical_values(self):
+        self.assertEqual(t_critical_95(30), 2.042)
+        # Published values past the end of the table
+        for df, t in [(40, 2.021), (60, 2.000), (120, 1.980)]:
+            self.assertAlmostEqual(t_critical_95(df), t, places=3)
+        self.assertLess(t_critical_95(31), t_critical_95(30))
+        self.assertTrue(math.isnan(t_critical_95(0)))
+
+
+class TestMonteCarloRunner(unittest.TestCase):
+    def setUp(self):
+        behavior = OfficeBuildingTravelBehavior(20)
+        self.configs = [SimulationConfig(BoringElevatorStrategy, behavior, 2, num_people=40, label="a"),
+                        SimulationConfig(BoringElevatorStrategy, behavior, 2, num_people=40, label="b"),
+                        SimulationConfig(RandomElevatorStrategy, behavior, 2, num_people=40, label="random")]
+        self.runner = MonteCarloRunner(self.configs, num_replicates=3, root_seed=11, max_workers=1)
+
+    def test_matches_serial_replicates(self):
+        results = self.runner.run()
+        seeds = self.runner.replicate_seeds()
+        for config, config_results in zip(self.configs, results):
+            self.assertIs(config_results.config, config)
+            serial = [run_replicate(config, seed) for seed in seeds]
+            self.assertEqual([s.avg_wait for s in config_results.stats], [s.avg_wait for s in serial])
+            self.assertEqual([s.total_dist for s in config_results.stats], [s.total_dist for s in serial])
+
+    def test_difference_is_paired(self):
+        a, b, random = self.runner.run()
+        same = a.difference(b, "avg_wait")
+        self.assertEqual(same.mean, 0)
+        self.assertEqual(same.half_width, 0)
+        # Replicates of different strategies differ, but are paired up replicate by replicate
+        different = a.difference(random, "avg_wait")
+        self.assertEqual(different.n, 3)
+        self.assertAlmostEqual(different.mean, a["avg_wait"].mean - random["avg_wait"].mean)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from elevate.OnlineStats import P2Quantile, RunningMoments
+from elevate.RandomStreams import RandomStream
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+class TestRunningMoments(unittest.TestCase):
+    def test_matches_numpy(self):
+        values = np.random.default_rng(1).normal(1e6, 3, 1000)  # A big offset is where naive sums of squares fail
+        moments = RunningMoments()
+        for x in values.tolist():
+            moments.add(x)
+        self.assertAlmostEqual(moments.mean, values.mean())
+        self.assertAlmostEqual(moments.variance, values.var(ddof=1), places=6)
+        self.assertEqual(moments.max, values.max())
+
+
+class TestP2Quantile(unittest.TestCase):
+    def test_exact_while_small(self):
+        estimate = P2Quantile(.5)
+        for x in [5, 1, 3]:
+            estimate.add(x)
+        self.assertEqual(estimate.value, 3)
+
+    def test_estimates_quantiles(self):
+        values = np.random.default_rng(2).exponential(30, 20000)
+        for p in (.5, .9, .99):
+            estimate = P2Quantile(p)
+            for x in values.tolist():
+                estimate.add(x)
+            exact = np.quantile(values, p)
+            self.assertLess(abs(estimate.value - exact) / exact, .02, p)
+
+
+class TestStreamingRunStats(unittest.TestCase):
+    def test_without_keeping_goals(self):
+        def run(keep_goals):
+            return ElevatorSimulator(OfficeBuildingTravelBehavior(40), BoringElevatorStrategy(), seed=RandomStream(3),
+                                     keep_goals=keep_goals).run(num_people=200)
+        kept, streamed = run(True), run(False)
+        self.assertEqual(streamed.num_completed, kept.num_completed)
+        self.assertAlmostEqual(streamed.avg_wait, kept.avg_wait)
+        self.assertEqual(streamed.max_total, kept.max_total)
+        self.assertLess(abs(streamed.p50_wait - kept.p50_wait), .1 * kept.p50_wait)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import time
+import unittest
+
+from elevate.PhaseTimers import Phase, PhaseTimers
+from elevate.RandomStreams import RandomStream
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+class TestPhaseTimers(unittest.TestCase):
+    def test_timed_iterable(self):
+        timers = PhaseTimers()
+        self.assertEqual(list(timers.timed(Phase.TRIP_GENERATION, range(7))), list(range(7)))
+        self.assertEqual(timers.count(Phase.TRIP_GENERATION), 7)
+        self.assertGreaterEqual(timers.total(Phase.TRIP_GENERATION), 0)
+        self.assertEqual(list(timers.report()), [Phase.TRIP_GENERATION])
+
+    def test_nested_phases_are_not_counted_twice(self):
+        timers = PhaseTimers()
+        # A second of simulating, half of which went on a replan
+        start = time.perf_counter() - 1
+        recorded_at_start = timers.recorded
+        timers.record(Phase.PLANNING, time.perf_counter() - .5)
+        timers.record(Phase.SIMULATE, start, recorded_at_start)
+        self.assertAlmostEqual(timers.total(Phase.PLANNING), .5, places=2)
+        self.assertAlmostEqual(timers.total(Phase.SIMULATE), .5, places=2)
+        self.assertAlmostEqual(timers.recorded, 1, places=2)
+
+    def test_run_reports_phases(self):
+        def run(time_phases):
+            return ElevatorSimulator(OfficeBuildingTravelBehavior(40), BoringElevatorStrategy(), seed=RandomStream(9),
+                                     time_phases=time_phases).run(num_people=100)
+        untimed = run(False)
+        start = time.perf_counter()
+        timed = run(True)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(untimed.phases, {})
+        self.assertEqual(timed.avg_wait, untimed.avg_wait)  # Timing doesn't change the run
+
+        self.assertEqual(set(timed.phases), set(Phase.all))
+        self.assertEqual(timed.phases[Phase.PLANNING]["count"], timed.num_replans)
+        self.assertEqual(timed.phases[Phase.EVENT_GENERATION]["count"], timed.num_replans)
+        self.assertEqual(timed.phases[Phase.TRIP_GENERATION]["count"], timed.num_completed)
+        self.assertAlmostEqual(timed.replans_per_trip, timed.num_replans / timed.num_completed)
+        for phase in timed.phases.values():
+            self.assertGreater(phase["total"], 0)
+        self.assertLessEqual(sum(phase["total"] for phase in timed.phases.values()), elapsed)
+        # Simulate is called before every trip and once at the end, but only the calls with events to process count
+        self.assertLess(timed.phases[Phase.SIMULATE]["count"], timed.num_completed + 1)
+        self.assertIn("Replans/trip", repr(timed))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from elevate.PhysicsCalculator import ElevatorPhysicsCalculator, TravelTimeTable, travel_time, states_at_t
+
+
+class TestTravelTimes(unittest.TestCase):
+    def test_closed_form_matches_calculator(self):
+        rng = random.Random(3)
+        for _ in range(2000):
+            d = rng.uniform(-150, 150)
+            v = rng.choice([0, rng.uniform(-8, 8)])
+            self.assertEqual(travel_time(d, v), ElevatorPhysicsCalculator(d, v).delta_t)
+
+    def test_table_matches_calculator(self):
+        table = TravelTimeTable.for_profile()
+        for start in range(0, 45, 4):
+            for stop in range(0, 45, 3):
+                expected = ElevatorPhysicsCalculator((stop - start) * 3.9, 0).delta_t
+                self.assertEqual(ElevatorPhysicsCalculator.time_to(start, stop), expected)
+                self.assertEqual(table.times[start, stop], expected)
+
+    def test_table_grows(self):
+        table = TravelTimeTable(a=1, v_max=5, meters_per_floor=3, num_floors=4)
+        self.assertEqual(table.between(0, 200), ElevatorPhysicsCalculator(600, 0, a=1, v_max=5).delta_t)
+        self.assertGreaterEqual(table.times.shape[0], 201)
+        self.assertEqual(ElevatorPhysicsCalculator.time_to(2, 9, a=1, v_max=5, meters_per_floor=3),
+                         table.between(2, 9))
+
+
+class TestStatesAtT(unittest.TestCase):
+    def test_batch_matches_calculator(self):
+        rng = random.Random(9)
+        cases = []
+        for _ in range(500):
+            d = rng.choice([0, rng.uniform(-150, 150)])
+            v = rng.choice([0, rng.uniform(-8, 8)])
+            cases.append((d, v, rng.uniform(0, ElevatorPhysicsCalculator(d, v).delta_t)))
+        positions, velocities = states_at_t(*zip(*cases))
+        for (d, v, t), p, vel in zip(cases, positions, velocities):
+            expected_p, expected_v = ElevatorPhysicsCalculator(d, v).state_at_t(t)
+            self.assertAlmostEqual(p, expected_p, places=9)
+            self.assertAlmostEqual(vel, expected_v, places=9)
+
+    def test_stopping_leaves_no_velocity(self):
+        # Three floors down from a standstill, looked at a hair before the elevator gets there
+        d = -3 * ElevatorPhysicsCalculator.meters_per_floor
+        t = ElevatorPhysicsCalculator(d, 0).delta_t - 1e-12
+        positions, velocities = states_at_t([d], [0], [t])
+        self.assertAlmostEqual(positions[0], d)
+        self.assertEqual(velocities[0], 0)
+        # So stopping on the floor it's at takes no time, rather than a turnaround
+        self.assertEqual(ElevatorPhysicsCalculator.time_to(0., 0, velocities[0]), 0)
+        self.assertGreater(ElevatorPhysicsCalculator.time_to(0., 0, -3.5e-12), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
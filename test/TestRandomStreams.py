@@ -0,0 +1,31 @@
+import unittest
+
+from elevate.RandomStreams import RandomStream
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+class TestRandomStreams(unittest.TestCase):
+    def test_children_depend_only_on_root_and_position(self):
+        a1, a2 = RandomStream(42).spawn(2)
+        root = RandomStream(42)
+        b1 = root.spawn(1)[0]
+        b2 = root.spawn(1)[0]
+
+        self.assertEqual(a1.python.random(), b1.python.random())
+        self.assertEqual(a2.numpy.random(), b2.numpy.random())
+        self.assertNotEqual(a1.python.random(), a2.python.random())
+
+    def test_seeded_simulations_are_reproducible(self):
+        def run(seed):
+            return ElevatorSimulator(OfficeBuildingTravelBehavior(10), BoringElevatorStrategy(), 2, seed).run(30)
+
+        first, second, other = run(7), run(7), run(8)
+        self.assertEqual(first.avg_wait, second.avg_wait)
+        self.assertEqual(first.total_dist, second.total_dist)
+        self.assertNotEqual(first.avg_wait, other.avg_wait)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from elevate.ElevatorHistory import ElevatorHistory
+from elevate.RandomStreams import RandomStream
+from elevate.Results import ResultsWriter, export_csv, read_results
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.TravelGoal import TravelGoal
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+class TestResults(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.elv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        goals = []
+        with ResultsWriter(self.path, chunk_size=3) as writer:
+            for i in range(10):
+                goal = TravelGoal(i * 1.5, i, 40 - i)
+                goal.board_time, goal.finish_time = goal.time + 2, goal.time + 30.25
+                goals.append(goal)
+                writer.add_goal(goal)
+                writer.add_event(i % 3, goal.time, i, i + 1, ElevatorHistory.STOP)
+
+        completed, events = read_results(self.path)
+        self.assertEqual(completed.to_travel_goals()[4].finish_time, goals[4].finish_time)
+        self.assertEqual(completed.start_floors.tolist(), list(range(10)))
+        self.assertEqual(events["elevator"].tolist(), [i % 3 for i in range(10)])
+        self.assertEqual(events["load"].tolist(), list(range(1, 11)))
+
+        csv_path = os.path.join(self.directory.name, "summary.csv")
+        export_csv(self.path, csv_path)
+        with open(csv_path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[2], "1,39,1.5,2.0,30.25")
+
+    def test_truncated_file(self):
+        with ResultsWriter(self.path) as writer:
+            for i in range(10):
+                writer.add_event(0, i, i, 1, ElevatorHistory.STOP)
+        # Cut off in the middle of the last column, then in the middle of the chunk's header
+        for cut in [os.path.getsize(self.path) - 3, len(ResultsWriter.magic) + 3]:
+            with open(self.path, "r+b") as f:
+                f.truncate(cut)
+            with self.assertRaises(ValueError):
+                read_results(self.path)
+
+    def test_run_streams_results(self):
+        simulator = ElevatorSimulator(OfficeBuildingTravelBehavior(40), BoringElevatorStrategy(), seed=RandomStream(5))
+        stats = simulator.run(num_people=100, logResults=True, results_path=self.path)
+        completed, events = read_results(self.path)
+        self.assertEqual(len(completed), stats.num_completed)
+        self.assertAlmostEqual(float(completed.wait_times.mean()), stats.avg_wait)
+        num_events = sum(simulator.elevator_history.num_events(e) for e in simulator.elevators)
+        self.assertEqual(len(events["time"]), num_events)
+
+
+if __name__ == '__main__':
+    unittest.main()
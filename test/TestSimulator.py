@@ -0,0 +1,91 @@
+import unittest
+
+from elevate.RandomStreams import RandomStream
+from elevate.Schedule import ElevatorSchedule
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.strategies.BaseElevatorStrategy import ElevatorStrategy
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+class FixedPlanStrategy(ElevatorStrategy):
+    """
+    Plans whatever floors it's told to, one list per elevator.
+    """
+    def __init__(self):
+        super().__init__(RandomStream(0))
+        self.plans = []
+
+    def get_plan(self, elevators, presses, current_time) -> ElevatorSchedule:
+        return ElevatorSchedule({e: list(floors) for e, floors in zip(elevators, self.plans)}, {}, current_time)
+
+
+class RegenerateEverythingStrategy(BoringElevatorStrategy):
+    """
+    Boring, but every elevator counts as changed on every replan.
+    """
+    def get_plan_update(self, elevators, presses, current_time, previous_schedule, deadline=None):
+        return self.get_plan_by(elevators, presses, current_time, deadline)
+
+
+class TestIncrementalReplanning(unittest.TestCase):
+    def test_unchanged_elevators_keep_their_events(self):
+        strategy = FixedPlanStrategy()
+        simulator = ElevatorSimulator(OfficeBuildingTravelBehavior(20), strategy, 2)
+        e1, e2 = simulator.elevators
+        strategy.plans = [[5, 9], [3]]
+        simulator.update_elevator_schedule(0)
+        e1_events = simulator.pending_elevator_events.events_for(e1)
+        e1_times = simulator.current_schedule.elevator_to_time[e1]
+
+        # Half a second later, only the second elevator's plan changes
+        strategy.plans = [[5, 9], [7]]
+        simulator.update_elevator_schedule(.5)
+        schedule = simulator.current_schedule
+        self.assertEqual(schedule.changed_elevators, {e2})
+        self.assertEqual(schedule.elevator_to_time[e1], e1_times)
+        kept = simulator.pending_elevator_events.events_for(e1)
+        self.assertEqual(len(kept), len(e1_events))
+        for event, old_event in zip(kept, e1_events):
+            self.assertIs(event, old_event)
+
+        regenerated = simulator.pending_elevator_events.events_for(e2)
+        self.assertEqual([ev.floor for ev in regenerated], [0, 7])
+        self.assertEqual(regenerated[0].time, .5)
+        self.assertEqual(schedule.elevator_to_time[e2], ElevatorSchedule.find_stop_times(e2, [7], .5))
+
+    def test_same_goals_as_regenerating_everything(self):
+        def run(strategy):
+            simulator = ElevatorSimulator(OfficeBuildingTravelBehavior(20), strategy, 3, seed=RandomStream(2))
+            return simulator.run(num_people=150), simulator.completed_goals
+        incremental_stats, incremental = run(BoringElevatorStrategy())
+        full_stats, full = run(RegenerateEverythingStrategy())
+
+        def trips(goals):
+            return sorted(zip(goals.times.tolist(), goals.start_floors.tolist(), goals.end_floors.tolist()))
+        self.assertEqual(incremental_stats.num_completed, full_stats.num_completed)
+        self.assertEqual(trips(incremental), trips(full))
+        self.assertAlmostEqual(incremental_stats.avg_wait, full_stats.avg_wait)
+        self.assertAlmostEqual(incremental_stats.avg_total, full_stats.avg_total)
+
+
+class TestBuildingSizes(unittest.TestCase):
+    def run_building(self, num_floors, num_elevators, num_people, seed):
+        simulator = ElevatorSimulator(OfficeBuildingTravelBehavior(num_floors), BoringElevatorStrategy(), num_elevators,
+                                      seed=RandomStream(seed))
+        stats = simulator.run(num_people=num_people)
+        self.assertEqual(len(simulator.pending_button_presses), 0)
+        self.assertGreater(stats.num_completed, 2 * num_people)
+        return simulator
+
+    def test_taller_than_40_floors(self):
+        simulator = self.run_building(60, 4, 150, 1)
+        self.assertGreater(max(simulator.completed_goals.end_floors.tolist()), 40)
+
+    def test_small_busy_building(self):
+        # Elevators this busy come to rest right on the floor they're asked to stop at again
+        self.run_building(10, 2, 1000, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
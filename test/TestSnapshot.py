@@ -0,0 +1,78 @@
+import unittest
+
+from elevate.ButtonPush import ButtonPush
+from elevate.Elevator import Elevator
+from elevate.RandomStreams import RandomStream
+from elevate.Simulator import ElevatorSimulator
+from elevate.Snapshot import SimulatorSnapshot
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior
+from elevate.TravelGoal import TravelGoal
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+def goal_results(goals):
+    return [(g.time, g.start_floor, g.end_floor, g.board_time, g.finish_time) for g in goals]
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        behavior = OfficeBuildingTravelBehavior(40, rng=RandomStream(1))
+        self.goals = behavior.generate_trip_table(150).to_travel_goals()
+        self.simulator = ElevatorSimulator(behavior, BoringElevatorStrategy(RandomStream(2)))
+        # Play the first half of the day by hand, the way run does
+        self.simulator.update_elevator_schedule(0)
+        for goal in self.goals[:75]:
+            self.simulator.simulate(goal.time)
+            self.simulator.current_time = goal.time
+            if self.simulator.add_travel_goal(goal):
+                self.simulator.update_elevator_schedule(goal.time)
+
+    def test_fork_continues_like_the_original(self):
+        num_done = len(self.simulator.completed_goals)
+        fork = self.simulator.fork(BoringElevatorStrategy(RandomStream(3)))
+        self.simulator.strategy = BoringElevatorStrategy(RandomStream(3))
+
+        fork.run(trip_source=[TravelGoal(g.time, g.start_floor, g.end_floor) for g in self.goals[75:]])
+        self.simulator.run(trip_source=self.goals[75:])
+
+        self.assertEqual(goal_results(fork.completed_goals), goal_results(self.simulator.completed_goals[num_done:]))
+        self.assertEqual([e.index for e in fork.elevators], [e.index for e in self.simulator.elevators])
+
+    def test_forks_are_independent(self):
+        snapshot = self.simulator.snapshot()
+        locations = [e.location for e in self.simulator.elevators]
+        first = ElevatorSimulator.from_snapshot(snapshot, self.simulator.travel_behavior, BoringElevatorStrategy())
+        first.run(trip_source=[])
+        second = ElevatorSimulator.from_snapshot(snapshot, self.simulator.travel_behavior, BoringElevatorStrategy())
+
+        self.assertEqual([e.location for e in self.simulator.elevators], locations)
+        self.assertEqual([e.location for e in second.elevators], locations)
+        self.assertEqual(len(second.pending_button_presses), len(self.simulator.pending_button_presses))
+        self.assertEqual(len(second.pending_elevator_events), len(self.simulator.pending_elevator_events))
+        self.assertFalse(first.has_pending())
+
+
+class TestPressesOnly(unittest.TestCase):
+    def test_stand_ins_go_the_way_they_were_asked(self):
+        # Past floor 40, which is as high as a snapshot used to assume buildings went
+        elevators = [Elevator(passenger_goals=set()), Elevator(location=50, passenger_goals={TravelGoal(0, 1, 52)})]
+        presses = [ButtonPush(45, "UP", 100), ButtonPush(48, "DOWN", 101)]
+        snapshot = SimulatorSnapshot.capture(elevators, presses, 102)
+        self.assertEqual(snapshot.num_floors, 52)
+
+        _, goals_by_press, _, _ = snapshot.restore()
+        goals = {press.floor: goals[0] for press, goals in goals_by_press.items()}
+        self.assertEqual(goals[45].direction(), "UP")
+        self.assertEqual(goals[48].direction(), "DOWN")
+
+    def test_building_height(self):
+        presses = [ButtonPush(45, "UP", 100)]
+        self.assertEqual(SimulatorSnapshot.building_height([Elevator(location=30.5, passenger_goals=set())], presses),
+                         46)
+        self.assertEqual(SimulatorSnapshot.building_height([Elevator(passenger_goals=set())], []), 2)
+        self.assertEqual(SimulatorSnapshot.capture([Elevator(passenger_goals=set())], presses, 102, num_floors=60)
+                         .num_floors, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from elevate.Tracing import Tracer, TraceLevel, RingBufferSink, BinaryFileSink, NullSink, read_binary_trace
+
+
+class Unformattable:
+    def __format__(self, format_spec):
+        raise AssertionError("Disabled levels should never format their arguments!")
+
+
+class TestTracing(unittest.TestCase):
+    def test_disabled_levels_do_not_format(self):
+        sink = RingBufferSink()
+        tracer = Tracer(TraceLevel.INFO, sink)
+        tracer.debug(0, "{}", Unformattable())
+        tracer.trace(0, "{}", Unformattable())
+        tracer.info(1, "Running {} total goals", 3)
+
+        self.assertEqual(sink.messages(), ["Running 3 total goals"])
+        self.assertFalse(tracer.is_debug)
+        self.assertTrue(tracer.is_info)
+
+    def test_null_sink_disables_everything(self):
+        tracer = Tracer(TraceLevel.TRACE, NullSink())
+        self.assertFalse(tracer.is_warn)
+        tracer.warn(0, "{}", Unformattable())
+
+    def test_ring_buffer_keeps_latest(self):
+        sink = RingBufferSink(capacity=2)
+        tracer = Tracer(TraceLevel.DEBUG, sink)
+        for i in range(5):
+            tracer.debug(i, "event {}", i)
+        self.assertEqual(sink.messages(), ["event 3", "event 4"])
+
+    def test_binary_round_trip(self):
+        path = os.path.join(tempfile.mkdtemp(), "trace.bin")
+        tracer = Tracer(TraceLevel.DEBUG, BinaryFileSink(path))
+        tracer.debug(1.5, "Picking up {} travel goal(s)", 2)
+        tracer.warn(2.5, "ünicode")
+        tracer.configure(TraceLevel.OFF, NullSink())  # closes the file
+
+        self.assertEqual(
+            list(read_binary_trace(path)),
+            [(1.5, TraceLevel.DEBUG, "Picking up 2 travel goal(s)"), (2.5, TraceLevel.WARN, "ünicode")]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior, CompositeTravelBehavior, UpPeakTravelBehavior, \
+    InterfloorTravelBehavior, UpDownPeakTravelBehavior
+
+
+class TestTripTables(unittest.TestCase):
+    def test_office_trip_table(self):
+        behavior = OfficeBuildingTravelBehavior(20)
+        table = behavior.generate_trip_table(2000, np.random.default_rng(7))
+
+        self.assertTrue(np.all(np.diff(table.times) >= 0), "Trips should be sorted by time")
+        self.assertTrue(np.all(table.start_floors != table.end_floors))
+        self.assertTrue(np.all((0 <= table.end_floors) & (table.end_floors <= 20)))
+        # Everyone arrives and leaves, and some of them go to lunch or on trips too
+        self.assertEqual(np.count_nonzero(table.start_floors == 0) - np.count_nonzero(table.end_floors == 0), 0)
+        self.assertGreater(len(table), 2 * 2000)
+
+        goals = table.to_travel_goals()
+        self.assertEqual(len(goals), len(table))
+        self.assertEqual(goals[0].time, table.times[0])
+        self.assertIsInstance(goals[0].start_floor, int)
+
+    def test_same_seed_same_table(self):
+        behavior = OfficeBuildingTravelBehavior(20)
+        t1 = behavior.generate_trip_table(100, np.random.default_rng(1))
+        t2 = behavior.generate_trip_table(100, np.random.default_rng(1))
+        np.testing.assert_array_equal(t1.times, t2.times)
+        np.testing.assert_array_equal(t1.end_floors, t2.end_floors)
+
+    def test_composite_trip_table(self):
+        behavior = CompositeTravelBehavior(10, {
+            UpPeakTravelBehavior(10, 100, 600): .5,
+            InterfloorTravelBehavior(10, 100, 600): .5
+        })
+        table = behavior.generate_trip_table(500, np.random.default_rng(3))
+
+        self.assertEqual(len(table), 500)
+        self.assertTrue(np.all((100 <= table.times) & (table.times <= 700)))
+        self.assertTrue(np.all(table.start_floors != table.end_floors))
+
+    def test_up_down_peak_trip_table(self):
+        table = UpDownPeakTravelBehavior(10, 100, 600).generate_trip_table(500, np.random.default_rng(4))
+
+        going_up = table.start_floors == 0
+        going_down = table.end_floors == 0
+        self.assertTrue(np.all(going_up != going_down), "Every trip should start or end on the ground floor")
+        self.assertGreater(np.count_nonzero(going_up), 150)
+        self.assertGreater(np.count_nonzero(going_down), 150)
+
+    def test_interfloor_needs_two_floors(self):
+        with self.assertRaises(ValueError):
+            InterfloorTravelBehavior(1, 100, 600)
+        table = InterfloorTravelBehavior(2, 100, 600).generate_trip_table(50, np.random.default_rng(5))
+        self.assertTrue(np.all(table.start_floors + table.end_floors == 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from elevate.RandomStreams import RandomStream
+from elevate.Simulator import ElevatorSimulator
+from elevate.TravelBehaviors import OfficeBuildingTravelBehavior, UpPeakTravelBehavior
+from elevate.TravelGoal import TravelGoal
+from elevate.TripSources import DailyTripSource, MergedTripSource, ReplayTripSource, TripTableSource, record_trips
+from elevate.TripTable import TripTable
+from elevate.strategies.BoringElevatorStrategy import BoringElevatorStrategy
+
+
+class TestTripSources(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        table = TripTable(np.arange(10) * 1.5, np.arange(10), np.arange(10) + 1, is_sorted=True)
+        for chunk_size in (1, 3, 10, 11):
+            goals = list(TripTableSource(table, time_offset=100, chunk_size=chunk_size))
+            self.assertEqual([(g.time, g.start_floor, g.end_floor) for g in goals],
+                             [(100 + i * 1.5, i, i + 1) for i in range(10)], chunk_size)
+
+    def test_days_follow_each_other(self):
+        source = DailyTripSource(OfficeBuildingTravelBehavior(20), 50, num_days=3, rng=np.random.default_rng(5))
+        times = [g.time for g in source]
+        self.assertEqual(times, sorted(times))
+        self.assertGreater(times[-1], 2 * DailyTripSource.day_length)
+
+    def test_trips_outside_their_day(self):
+        late = UpPeakTravelBehavior(10, DailyTripSource.day_length - 100, 1000)
+        with self.assertRaises(ValueError):
+            list(DailyTripSource(late, 50, num_days=2, rng=np.random.default_rng(1)))
+        self.assertEqual(len(list(DailyTripSource(late, 50, rng=np.random.default_rng(1)))), 50)
+
+    def test_merged_sources_are_in_time_order(self):
+        def offices():
+            return DailyTripSource(OfficeBuildingTravelBehavior(20), 40, rng=np.random.default_rng(2))
+        visitors = DailyTripSource(UpPeakTravelBehavior(20, 10 * 60 * 60, 4 * 60 * 60), 60,
+                                   rng=np.random.default_rng(3))
+        merged = [g.time for g in MergedTripSource(offices(), visitors)]
+        self.assertEqual(merged, sorted(merged))
+        self.assertEqual(len(merged), len(list(offices())) + 60)
+
+
+class TestReplayTripSource(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "day.trips")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        source = DailyTripSource(OfficeBuildingTravelBehavior(20), 300, num_days=2, rng=np.random.default_rng(8))
+        expected = [(g.time, g.start_floor, g.end_floor) for g in
+                    DailyTripSource(OfficeBuildingTravelBehavior(20), 300, num_days=2, rng=np.random.default_rng(8))]
+
+        replay = record_trips(source, self.path, chunk_size=100)
+        self.assertEqual(len(replay), len(expected))
+        self.assertEqual(os.path.getsize(self.path), ReplayTripSource.header.size + 16 * len(expected))
+        self.assertEqual([(g.time, g.start_floor, g.end_floor) for g in replay], expected)
+        # Goals recorded one by one come back the same too
+        record_trips(iter(replay), self.path + "2", chunk_size=7)
+        self.assertEqual([(g.time, g.start_floor, g.end_floor) for g in ReplayTripSource(self.path + "2")], expected)
+
+    def test_out_of_order(self):
+        with self.assertRaises(ValueError):
+            record_trips([TravelGoal(2, 0, 1), TravelGoal(1, 0, 1)], self.path)
+
+    def test_runs_replay_the_same_trips(self):
+        def simulator():
+            return ElevatorSimulator(OfficeBuildingTravelBehavior(40), BoringElevatorStrategy(), seed=RandomStream(6))
+        replay = simulator().record_trip_source(self.path, num_people=100)
+        generated, replayed = simulator().run(num_people=100), simulator().run(trip_source=replay)
+        self.assertEqual(replayed.num_completed, generated.num_completed)
+        self.assertEqual(replayed.avg_wait, generated.avg_wait)
+
+
+if __name__ == '__main__':
+    unittest.main()